@@ -1,101 +1,115 @@
-import pandas as pd
-from astroquery.vizier import Vizier
-from astropy.coordinates import SkyCoord
-from astropy import units as u
-import astropy.coordinates as coord
-#from intragen import testingset
-from intragen import raw1blgceph, raw1diskceph
-import statistics
-import numpy as np
-
-### Querying the Bailer Jones Catalogue for distances ###
-
-print('Beginning Ceph Query')
-
-def cephquery(dataframe):
-
-    # Create a new empty column for distances
-    dataframe['Distance'] = None
-    dataframe['SourceID'] = None
-
-    # Iterate through each row in the DataFrame
-    for index, row in dataframe.iterrows():
-        ra = row['Ra']
-        decl = row['Decl']
-
-        try:
-            # Connect to Vizier catalog
-            v = Vizier(catalog="I/352", columns=['*', 'RA_ICRS', 'DE_ICRS'])
-
-            # Query for nearby objects within 0.0001 degrees radius
-            result = v.query_region(
-                coord.SkyCoord(ra=ra, dec=decl, unit=(u.deg, u.deg), frame='icrs'),
-                radius=0.0001 * u.deg
-            )
-
-            # Check for results
-            if len(result) > 0:
-                # If results found, extract distance from the first object
-                distance = result[0]['rgeo'][0]
-                dataframe.at[index, 'Distance'] = distance
-                id = result[0]['Source'][0]
-                dataframe.at[index, 'SourceID']= id
-                
-            else:
-                # If no results, set distance to 0
-                dataframe.at[index, 'Distance'] = 0
-                dataframe.at[index, 'SourceID'] = 0
-
-        except Exception as e:
-            # Handle potential exceptions during Vizier query
-            print(f"Error querying Vizier for row {index}: {e}")
-            dataframe.at[index, 'Distance'] = 0  # Set distance to 0 for error cases
-            dataframe.at[index, 'SourceID'] = 0
-
-    return dataframe
-
-### BULGE Classical Cepheid QUERY / 1st ROUND CLEANSING ### 
-
-rawblgcephdistances = cephquery(raw1blgceph.copy())  # Avoid modifying original DataFrame
-#print(rawblgcephdistances)
-
-cleanblgceph = pd.DataFrame(columns = ['ID', 'mode', 'Ra', 'Decl', 'I', 'V', 'V-I', 'P1', 'Distance', 'SourceID']) #creating a new dataframe for the cleansed data
-for index, row in rawblgcephdistances.iterrows(): #looping through raw data dataframe
-    if np.float64(row['Distance']) != 0:
-        cleanblgceph.loc[len(cleanblgceph.index)] = [row['ID'], row['mode'], row['Ra'], row['Decl'], row['I'], row['V'], row['V-I'], row['P1'], row['Distance'], row['SourceID']] # adds the star at the end of the dataframe (last index)
-    else:
-        continue
-
-#print(cleanblgceph)
-print('stars removed from CEPH BLG', len(cleanblgceph) - len(raw1blgceph))
-print('CHECK 3')
-
-
-### DISK Classical Cepheid QUERY / 1st ROUND CLEANSING ### 
-
-rawdiskcephdistances = cephquery(raw1diskceph.copy())  # Avoid modifying original DataFrame
-#print(rawdiskcephdistances)
-
-cleandiskceph = pd.DataFrame(columns = ['ID', 'mode', 'Ra', 'Decl', 'I', 'V', 'V-I', 'P1', 'Distance', 'SourceID']) #creating a new dataframe for the cleansed data
-for index, row in rawdiskcephdistances.iterrows(): #looping through raw data dataframe
-    if np.float64(row['Distance']) != 0:
-        cleandiskceph.loc[len(cleandiskceph.index)] = [row['ID'], row['mode'], row['Ra'], row['Decl'], row['I'], row['V'], row['V-I'], row['P1'], row['Distance'], row['SourceID']] # adds the star at the end of the dataframe (last index)
-    else:
-        continue
-
-#print(cleandiskceph)
-print('stars removed from CEPH DISK', len(cleandiskceph) - len(raw1diskceph))
-print('CHECK 4')
-
-print('Querying complete, sending dataframes to intragen')
-
-### Functions to generate result data ###
-
-def logperiod(P):
-    return np.log10(P)
-
-print('Mean m of BLG Cepheid', statistics.mean(cleanblgceph['I']))
-print('Mean LogP of BLG Cepheid', statistics.mean(logperiod(cleanblgceph['P1'])))
-
-print('Mean m of DISK Cepheid', statistics.mean((cleandiskceph['I'])))
-print('Mean LogP of DISK DCepheid', statistics.mean(logperiod(cleandiskceph['P1'])))
+import pandas as pd
+#from intragen import testingset
+import numpy as np
+from crossmatch import MATCHSCHEMA, NOMATCH, batchquery, applyschema, matchedstars, gmagnitude, resolvematches, matchvalues
+from bjindex import defaultbackend
+
+### Querying the Bailer Jones Catalogue for distances ###
+
+def cephquery(dataframe, batched=True, backend=None, executor=None, resolution='nearest'):
+
+    # Batched mode - the whole dataframe is crossmatched in a few multi-target uploads (see crossmatch.py),
+    # or offline against the local Bailer Jones extract when bailerjonesextract.csv exists (see bjindex.py).
+    # The executor sets the number of parallel queries, rate limit and retries (see queryexecutor.py)
+    if batched:
+        if backend is None:
+            backend = defaultbackend()
+        return batchquery(dataframe, backend=backend, executor=executor, resolution=resolution)
+
+    # astroquery is only needed for the per-row queries
+    from astroquery.vizier import Vizier
+    from astropy import units as u
+    import astropy.coordinates as coord
+
+    # Create the crossmatch columns, filled in for every row below (see crossmatch.MATCHSCHEMA)
+    for column, value in NOMATCH.items():
+        dataframe[column] = np.full(len(dataframe), value, dtype=MATCHSCHEMA[column])
+    dataframe['Status'] = None
+
+    # Iterate through each row in the DataFrame
+    for index, row in dataframe.iterrows():
+        ra = row['Ra']
+        decl = row['Decl']
+
+        try:
+            # Connect to Vizier catalog
+            v = Vizier(catalog="I/352", columns=['*', 'RA_ICRS', 'DE_ICRS'])
+
+            # Query for nearby objects within 0.0001 degrees radius
+            result = v.query_region(
+                coord.SkyCoord(ra=ra, dec=decl, unit=(u.deg, u.deg), frame='icrs'),
+                radius=0.0001 * u.deg
+            )
+
+            # Check for results
+            if len(result) > 0:
+                # Every source in the cone is a candidate - the match is chosen as in the batched query (nearest by default)
+                candidates = result[0].to_pandas().assign(_q=0)
+                expected = gmagnitude([row['I']], [row['V-I']]) if resolution == 'magnitude' else None
+                match = resolvematches(candidates, np.array([ra]), np.array([decl]), resolution, expected)
+                for column, values in matchvalues(match).items():
+                    dataframe.at[index, column] = values[0]
+                dataframe.at[index, 'Status'] = 'matched'
+
+            else:
+                # If no results, set distance to 0
+                for column, value in NOMATCH.items():
+                    dataframe.at[index, column] = value
+                dataframe.at[index, 'Status'] = 'nomatch'
+
+        except Exception as e:
+            # Handle potential exceptions during Vizier query
+            print(f"Error querying Vizier for row {index}: {e}")
+            dataframe.at[index, 'Distance'] = np.nan  # Failed queries are kept apart from stars with no match, so they can be retried
+            dataframe.at[index, 'SourceID'] = 0
+            dataframe.at[index, 'Status'] = 'failed'
+
+    return applyschema(dataframe) # typed columns, as batchquery returns them
+
+### Functions to generate result data ###
+
+def logperiod(P):
+    return np.log10(P)
+
+# Queries the magnitude thresholded bulge and disk Classical Cepheid dataframes from intragen, and returns them with the
+# Bailer Jones 'Distance' and 'SourceID' of every matched star and the quality of its match ('Separation', 'MatchCount',
+# 'b_rgeo' / 'B_rgeo', see crossmatch.MATCHSCHEMA). resolution chooses among several sources in a cone (crossmatch.RESOLUTIONS).
+# Stars whose query still fails after the executor's retries are left out, and the pipeline does not cache the result
+# (pipeline.querycomplete) - they are queried again on the next run rather than hammered again straight away.
+
+def queryceph(raw1blgceph, raw1diskceph, resolution='nearest'):
+
+    print('Beginning Ceph Query')
+
+    ### BULGE Classical Cepheid QUERY / 1st ROUND CLEANSING ### 
+
+    rawblgcephdistances = cephquery(raw1blgceph.copy(), resolution=resolution)  # Avoid modifying original DataFrame
+    #print(rawblgcephdistances)
+
+    cleanblgceph = matchedstars(rawblgcephdistances) # the matched stars, selected at once
+
+    #print(cleanblgceph)
+    print('stars removed from CEPH BLG', len(cleanblgceph) - len(raw1blgceph))
+    print('CHECK 3')
+
+
+    ### DISK Classical Cepheid QUERY / 1st ROUND CLEANSING ### 
+
+    rawdiskcephdistances = cephquery(raw1diskceph.copy(), resolution=resolution)  # Avoid modifying original DataFrame
+    #print(rawdiskcephdistances)
+
+    cleandiskceph = matchedstars(rawdiskcephdistances) # the matched stars, selected at once
+
+    #print(cleandiskceph)
+    print('stars removed from CEPH DISK', len(cleandiskceph) - len(raw1diskceph))
+    print('CHECK 4')
+
+    print('Querying complete, sending dataframes to intragen')
+
+    print('Mean m of BLG Cepheid', cleanblgceph['I'].to_numpy(dtype=np.float64).mean())
+    print('Mean LogP of BLG Cepheid', logperiod(cleanblgceph['P1']).to_numpy(dtype=np.float64).mean())
+
+    print('Mean m of DISK Cepheid', (cleandiskceph['I']).to_numpy(dtype=np.float64).mean())
+    print('Mean LogP of DISK DCepheid', logperiod(cleandiskceph['P1']).to_numpy(dtype=np.float64).mean())
+
+    return cleanblgceph, cleandiskceph
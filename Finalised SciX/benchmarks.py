@@ -0,0 +1,438 @@
+import sys
+import time
+import pandas as pd
+import numpy as np
+
+### Benchmarks of the vectorized pipeline stages against the original implementations ###
+
+# Run with: python benchmarks.py [name ...] - with no names every benchmark is run
+
+DSCOLUMNS = ['ID', 'mode', 'Ra', 'Decl', 'I', 'V', 'V-I', 'P1', 'P2']
+
+# Best of repeat wall clock times (seconds) of func()
+
+def timeit(func, repeat=3):
+    best = np.inf
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def loadds(filename):
+    dataframe = pd.read_csv(filename)
+    dataframe.columns = DSCOLUMNS
+    dataframe = dataframe[dataframe['I'] > 13]
+    return dataframe[dataframe['I'] < 21.5]
+
+## Halo star rejection - row by row loop vs selection.halocut ##
+
+# The original dsdatasetgeneration loop, kept here as the reference implementation
+
+def halocutloop(rawds, a, b):
+    cleands = pd.DataFrame(columns = DSCOLUMNS)
+    for index, row in rawds.iterrows():
+        if np.float64(row['I']) > (np.float64(np.log10(row['P1'])) * a + b - 1.5):
+            cleands.loc[len(cleands.index)] = [row['ID'], row['mode'], row['Ra'], row['Decl'], row['I'], row['V'], row['V-I'], row['P1'], row['P2']]
+    return cleands
+
+def benchhalocut():
+    from selection import halocut
+
+    for filename in ['smcdsdata.csv', 'lmcdsdata.csv']:
+        rawds = loadds(filename)
+        a, b = np.polyfit(np.log10(rawds['P1']), rawds['I'], 1)
+
+        looptime, loopresult = timeit(lambda: halocutloop(rawds, a, b), repeat=1)
+        vectortime, vectorresult = timeit(lambda: halocut(rawds, a, b, 1.5))
+
+        same = loopresult['ID'].tolist() == vectorresult['ID'].tolist()
+        print(f'halocut {filename}: {len(rawds)} stars, loop {looptime:.3f} s, vectorized {vectortime * 1000:.2f} ms, '
+              f'speedup x{looptime / vectortime:.0f}, same stars kept: {same}')
+
+## Catalogue loading - CSV parsing vs memory-mapped columnar copy ##
+
+def benchcatalogues():
+    from catalogues import CATALOGUES, readcsv, loadcatalogue
+
+    for filename in ['smcdsdata.csv', 'lmcdsdata.csv', 'blgdsdata.csv', 'lmccephdata.csv']:
+        columns = CATALOGUES[filename]
+        loadcatalogue(filename, columns) # converts the catalogue if needed
+
+        csvtime, csvframe = timeit(lambda: readcsv(filename, columns))
+        columnartime, columnarframe = timeit(lambda: loadcatalogue(filename, columns))
+
+        csvmemory = csvframe.memory_usage(deep=True).sum() / 2**20
+        columnarmemory = columnarframe.memory_usage(deep=True).sum() / 2**20
+        print(f'catalogue {filename}: {len(csvframe)} stars, csv {csvtime * 1000:.1f} ms {csvmemory:.2f} MB, '
+              f'columnar {columnartime * 1000:.1f} ms {columnarmemory:.2f} MB')
+
+## P-L relation fitting - one np.polyfit per group vs one batched PLRelation fit ##
+
+def benchplrelation(ngroups=64):
+    from plrelation import PLRelation
+
+    rawds = loadds('lmcdsdata.csv')
+    rawds = rawds.assign(field=np.arange(len(rawds)) % ngroups) # stand-in for OGLE fields / period bins
+
+    def polyfits():
+        return {name: np.polyfit(np.log10(group['P1']), group['I'], 1) for name, group in rawds.groupby('field')}
+
+    looptime, loopresult = timeit(polyfits)
+    batchtime, batchresult = timeit(lambda: PLRelation.fromdataframe(rawds, 'field').fit())
+
+    same = all(np.allclose(tuple(batchresult[name]), loopresult[name]) for name in loopresult)
+    print(f'plrelation {ngroups} groups of {len(rawds) // ngroups} stars: polyfit loop {looptime * 1000:.1f} ms, '
+          f'batched {batchtime * 1000:.1f} ms, same coefficients: {same}')
+
+## Model distances - one Series computation per model vs the N x K plkernel evaluation ##
+
+# The original per-model distance function (one of eight), kept here as the reference implementation
+
+def modeldistance(I, P, slope, intercept):
+    dm = ((np.float64(slope) * np.float64(np.log10(P))) + np.float64(intercept))
+    var2 = ((I) - dm) / 5
+    return 10 * 10 ** var2
+
+def benchdistances():
+    from plkernel import MODELS, modelstack, logperiod, modeldistances
+
+    rawds = loadds('lmcdsdata.csv')
+    relations = {name: (-2.4 - 0.2 * i, -1.0 - 0.1 * i) for i, name in enumerate(MODELS)}
+
+    def permodel():
+        return np.column_stack([modeldistance(rawds['I'], rawds['P1'], *relations[name]) for name in MODELS])
+
+    looptime, loopresult = timeit(permodel)
+    kerneltime, kernelresult = timeit(lambda: modeldistances(rawds['I'], logperiod(rawds['P1']), *modelstack(relations)))
+
+    print(f'distances {len(rawds)} stars x {len(MODELS)} models: per-model functions {looptime * 1000:.2f} ms, '
+          f'kernel {kerneltime * 1000:.2f} ms, same distances: {np.allclose(loopresult, kernelresult, rtol=1e-12)}')
+
+## Bootstrap - 10k resamples of the LMC Delta Scuti P-L relation and the SMC distance it gives ##
+
+def benchbootstrap(nresamples=10000):
+    from bootstrap import bootstrap
+
+    rawlmcds = loadds('lmcdsdata.csv')
+    rawsmcds = loadds('smcdsdata.csv')
+    M = rawlmcds['I'] - 5 * np.log10(49590 / 10)
+
+    bootstraptime, result = timeit(lambda: bootstrap(M, rawlmcds['P1'], (rawsmcds['I'], rawsmcds['P1']), nresamples, seed=0), repeat=1)
+    low, median, high = result.interval('distance')
+    print(f'bootstrap {nresamples} resamples of {len(rawlmcds)} stars: {bootstraptime:.2f} s, '
+          f'SMC distance {median:.0f} pc (95% interval {low:.0f} - {high:.0f})')
+
+## Streaming ingestion - whole catalogue in memory vs chunked sufficient statistics ##
+
+# Peak traced memory (MB) and result of func()
+
+def peakmemory(func):
+    import tracemalloc
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20, result
+
+def benchstreaming(copies=40):
+    import os
+    import tempfile
+    from selection import halocut
+    from dsmodeseparation import separatemodes, streamrelations, Mlmc
+
+    # a full size stand-in: the LMC catalogue repeated
+    with open('lmcdsdata.csv') as f:
+        lines = f.readlines()
+    path = os.path.join(tempfile.mkdtemp(), 'fulllmcdsdata.csv')
+    with open(path, 'w') as f:
+        f.writelines(lines * copies)
+
+    def inmemory():
+        rawds = loadds(path)
+        a, b = np.polyfit(np.log10(rawds['P1']), rawds['I'], 1)
+        Fundamental, FirstOvertone = separatemodes(halocut(rawds, a, b, 1.5))
+        return np.polyfit(np.log10(Fundamental['P1']), Mlmc(Fundamental['I']), 1)
+
+    memorytime, (memorypeak, memoryresult) = timeit(lambda: peakmemory(inmemory), repeat=1)
+    streamtime, (streampeak, streamresult) = timeit(lambda: peakmemory(lambda: streamrelations('smcdsdata.csv', path)), repeat=1)
+
+    same = np.allclose(tuple(streamresult['FundLMC']), memoryresult)
+    print(f'streaming {len(lines) * copies} stars: in memory {memorytime:.2f} s peak {memorypeak:.0f} MB, '
+          f'streamed {streamtime:.2f} s peak {streampeak:.0f} MB, same Fundamental LMC relation: {same}')
+    os.remove(path)
+
+## Incremental P-L update - refit from scratch vs merging the new stars' statistics ##
+
+def benchincremental(fraction=0.01):
+    from plrelation import PLRelation
+
+    rawds = loadds('lmcdsdata.csv')
+    split = int(len(rawds) * (1 - fraction))
+    old, new = rawds.iloc[:split], rawds.iloc[split:]
+    fit = PLRelation().add('LMC', old['I'], old['P1']).fit()['LMC']
+
+    refittime, refit = timeit(lambda: PLRelation().add('LMC', rawds['I'], rawds['P1']).fit()['LMC'])
+    updatetime, updated = timeit(lambda: fit.update(new['I'], new['P1']))
+
+    same = np.allclose(tuple(refit), tuple(updated), rtol=1e-12)
+    print(f'incremental {len(new)} new stars on {len(old)}: refit {refittime * 1000:.2f} ms, update {updatetime * 1000:.3f} ms, same relation: {same}')
+
+## Multi-band P-L fits - one batched fit per band vs all the bands sharing the period statistics ##
+
+def benchbands(ngroups=64):
+    from plrelation import PLRelation
+    from catalogues import BANDS, withmagnitude
+
+    rawds = withmagnitude(loadds('lmcdsdata.csv'), BANDS)
+    rawds = rawds.assign(field=np.arange(len(rawds)) % ngroups)
+
+    singletime, single = timeit(lambda: PLRelation.fromdataframe(rawds, 'field', 'I').fit())
+    pertime, perband = timeit(lambda: {band: PLRelation.fromdataframe(rawds, 'field', band).fit() for band in BANDS})
+    sharedtime, shared = timeit(lambda: PLRelation.fromdataframe(rawds, 'field', BANDS).fit())
+
+    same = all(np.allclose(tuple(perband[band][name]), tuple(shared[band][name])) for band in BANDS for name in perband[band])
+    print(f'bands {BANDS} {ngroups} groups of {len(rawds) // ngroups} stars: I only {singletime * 1000:.1f} ms, '
+          f'one fit per band {pertime * 1000:.1f} ms, shared {sharedtime * 1000:.1f} ms, same coefficients: {same}')
+
+## Coordinates - one string conversion per row vs whole column coordinates.parsera / parsedec ##
+
+def sexagesimalloop(values, hour):
+    degrees = []
+    for value in values:
+        fields = [float(i) for i in value.lstrip('+-').split(':')]
+        if len(fields) == 2: # right ascension without its hour
+            degrees.append(15 * (hour + fields[0] / 60 + fields[1] / 3600))
+        else:
+            sign = -1 if value.startswith('-') else 1
+            degrees.append(sign * (fields[0] + fields[1] / 60 + fields[2] / 3600))
+    return np.array(degrees)
+
+def benchcoordinates():
+    from coordinates import parsedec, parsera
+
+    rawds = pd.read_csv('lmcdsdata.csv')
+    rawds.columns = DSCOLUMNS
+    decl = rawds['Decl'].to_numpy(dtype=str)
+    ra = rawds['Ra'].to_numpy(dtype=str)
+
+    looptime, loopresult = timeit(lambda: sexagesimalloop(decl, 0))
+    vectortime, vectorresult = timeit(lambda: parsedec(decl))
+    ratime, raresult = timeit(lambda: parsera(ra, firsthour=0))
+
+    print(f'coordinates {len(rawds)} declinations: loop {looptime * 1000:.1f} ms, vectorized {vectortime * 1000:.1f} ms, '
+          f'same degrees: {np.allclose(loopresult, vectorresult, rtol=0, atol=1e-12)}; '
+          f'{len(rawds)} truncated right ascensions with hours recovered {ratime * 1000:.1f} ms')
+
+## Sky index - full table scan per region vs skyindex.SkyIndex queries ##
+
+def benchskyindex(ncones=200, radius=0.5):
+    from catalogues import CATALOGUES, loadcatalogue
+    from crossmatch import angularseparation
+    from skyindex import SkyIndex
+
+    rawds = loadcatalogue('blgdsdata.csv', CATALOGUES['blgdsdata.csv'])
+    ra = np.asarray(rawds['Ra'], dtype=np.float64)
+    decl = np.asarray(rawds['Decl'], dtype=np.float64)
+    centres = np.random.default_rng(0).choice(len(rawds), ncones)
+
+    def scans():
+        return [np.nonzero(angularseparation(ra[i], decl[i], ra, decl) <= radius)[0] for i in centres]
+
+    buildtime, index = timeit(lambda: SkyIndex(ra, decl))
+    scantime, scanresult = timeit(scans)
+    indextime, indexresult = timeit(lambda: index.cones(ra[centres], decl[centres], radius))
+
+    same = all(np.array_equal(i, j) for i, j in zip(scanresult, indexresult))
+    print(f'skyindex {ncones} cones of {radius} deg over {len(rawds)} stars: scans {scantime * 1000:.1f} ms, '
+          f'index {indextime * 1000:.1f} ms (built in {buildtime * 1000:.1f} ms), same stars: {same}')
+
+## Crossmatch post-filter - the row by row rebuild of the matched stars vs crossmatch.matchedstars ##
+
+def benchmatchfilter(nstars=16000):
+    from crossmatch import applyschema, matchedstars
+
+    rawds = loadds('lmcdsdata.csv')
+    rawds = rawds.iloc[np.arange(nstars) % len(rawds)].reset_index(drop=True) # stand-in for the full bulge table
+    rng = np.random.default_rng(0)
+    matched = rng.random(nstars) < 0.8
+    rawds = rawds.assign(Distance=np.where(matched, rng.uniform(1000, 10000, nstars), 0), SourceID=np.where(matched, np.arange(nstars), 0),
+                         Status=np.where(matched, 'matched', 'nomatch'))
+    applyschema(rawds)
+    columns = list(DSCOLUMNS) + ['Distance', 'SourceID']
+
+    # the original cleanblgds loop
+    def rebuild():
+        clean = pd.DataFrame(columns = columns)
+        for index, row in rawds.iterrows():
+            if row['Status'] == 'matched':
+                clean.loc[len(clean.index)] = [row[column] for column in columns]
+        return clean
+
+    looptime, loopresult = timeit(rebuild, repeat=1)
+    filtertime, filterresult = timeit(lambda: matchedstars(rawds))
+
+    same = np.array_equal(loopresult['SourceID'].to_numpy(dtype=np.int64), filterresult['SourceID'].to_numpy())
+    print(f'matchfilter {nstars} crossmatched stars: row by row {looptime:.2f} s {loopresult.memory_usage(deep=True).sum() / 2**20:.1f} MB, '
+          f'vectorized {filtertime * 1000:.1f} ms {filterresult.memory_usage(deep=True).sum() / 2**20:.1f} MB, same stars: {same}')
+
+## Accuracy metrics - statistics calls per model x population vs evaluation.accuracymetrics ##
+
+def benchmetrics(npopulations=8, nstars=20000):
+    import statistics
+    from evaluation import accuracymetrics
+    from plkernel import MODELS, modelstack, modeldistances, logperiod
+
+    rawds = loadds('lmcdsdata.csv')
+    rng = np.random.default_rng(0)
+    relations = {name: (-3.0 + 0.1 * rng.standard_normal(), -1.0 + 0.1 * rng.standard_normal()) for name in MODELS}
+    populations = {}
+    for i in range(npopulations):
+        frame = rawds.iloc[rng.integers(0, len(rawds), nstars)].reset_index(drop=True)
+        populations[f'population {i}'] = (frame.assign(Distance=rng.uniform(1000, 10000, nstars)), 'P1')
+
+    # the original summaries - one list of accuracies per model x population through the statistics module
+    def perpair():
+        rows = {}
+        slopes, zeropoints = modelstack(relations)
+        for name, (frame, period) in populations.items():
+            modeldist = modeldistances(frame['I'], logperiod(frame[period]), slopes, zeropoints)
+            for k, model in enumerate(MODELS):
+                errors = ((modeldist[:, k] - frame['Distance']) / frame['Distance'] * 100).tolist()
+                rows[name, model] = (statistics.mean(errors), statistics.pstdev(errors), statistics.median([abs(e) for e in errors]))
+        return rows
+
+    looptime, loopresult = timeit(perpair, repeat=1)
+    metricstime, metrics = timeit(lambda: accuracymetrics(populations, relations))
+
+    same = np.allclose([loopresult[pair] for pair in metrics.index], metrics[['bias', 'scatter', 'accuracy']].to_numpy())
+    print(f'metrics {npopulations} populations x {len(MODELS)} models of {nstars} stars: statistics module {looptime:.2f} s, '
+          f'evaluation.accuracymetrics {metricstime * 1000:.1f} ms (+ weighted MAD / neff), same values with equal weights: {same}')
+
+## Compiled P-L models - refitting the relations vs loading a model file, and scalar vs batch distances ##
+
+def benchplmodel(nstars=100000):
+    import contextlib
+    import io
+    import os
+    import tempfile
+    import dsdatasetgeneration
+    import dsmodeseparation
+    from plkernel import compilemodels, savemodels, loadmodels
+
+    def refit():
+        with contextlib.redirect_stdout(io.StringIO()):
+            clean = dsdatasetgeneration.cleanse(*dsdatasetgeneration.loadmcds())
+            return dsmodeseparation.fitrelations(*dsmodeseparation.separate(*clean))
+
+    fittime, relations = timeit(refit, repeat=1)
+    with tempfile.TemporaryDirectory() as outdir:
+        path = savemodels({'ds': compilemodels(relations)}, os.path.join(outdir, 'plmodels.json'))
+        size = os.path.getsize(path)
+        loadtime, models = timeit(lambda: loadmodels(path))
+    model = models['ds']['FundLMC']
+
+    rng = np.random.default_rng(0)
+    I, logP = rng.uniform(13, 21, nstars), rng.uniform(-1.4, -0.6, nstars)
+    scalartime, scalar = timeit(lambda: [model.distance(m, p) for m, p in zip(I.tolist(), logP.tolist())], repeat=1)
+    batchtime, batch = timeit(lambda: model.distance(I, logP))
+
+    print(f'plmodel fit {fittime:.2f} s vs load {size} byte model file {loadtime * 1e6:.0f} us; {nstars} distances one call per star '
+          f'{scalartime / nstars * 1e9:.0f} ns/star, batch {batchtime / nstars * 1e9:.1f} ns/star, same distances: {np.allclose(scalar, batch, rtol=1e-12)}')
+
+## Distance service - latency and throughput of distanceservice over HTTP, with and without micro-batching ##
+
+# Percentile latencies (ms) and stars per second of nrequests requests of nstars stars each, sent by concurrency clients
+
+def loadtest(url, nrequests, nstars, concurrency):
+    import json
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    rng = np.random.default_rng(0)
+    body = json.dumps({'kind': 'ds', 'I': rng.uniform(13, 21, nstars).tolist(), 'P': (10 ** rng.uniform(-1.4, -0.6, nstars)).tolist(),
+                       'mode': rng.choice(['F', 'FO'], nstars).tolist()}).encode()
+
+    def send(i):
+        start = time.perf_counter()
+        with urllib.request.urlopen(urllib.request.Request(url, body, {'Content-Type': 'application/json'})) as response:
+            assert len(json.loads(response.read())['distance']) == nstars
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = np.array(list(pool.map(send, range(nrequests)))) * 1000
+    elapsed = time.perf_counter() - start
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), nrequests * nstars / elapsed
+
+def benchservice():
+    import contextlib
+    import io
+    import threading
+    import dsdatasetgeneration
+    import dsmodeseparation
+    from plkernel import compilemodels
+    from distanceservice import WINDOW, DistanceEstimator, makeserver
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        clean = dsdatasetgeneration.cleanse(*dsdatasetgeneration.loadmcds())
+        estimator = DistanceEstimator({'ds': compilemodels(dsmodeseparation.fitrelations(*dsmodeseparation.separate(*clean)))})
+
+    # (label, requests, stars per request, concurrent clients)
+    loads = [('bulk', 20, 5000, 1), ('bulk', 40, 5000, 4), ('small', 2000, 10, 32)]
+    for window in (0, WINDOW):
+        server = makeserver(estimator, port=0, window=window)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = 'http://%s:%d/distances' % server.server_address[:2]
+        for label, nrequests, nstars, concurrency in loads:
+            p50, p95, throughput = loadtest(url, nrequests, nstars, concurrency)
+            print(f'service window {window * 1000:.0f} ms, {label} {nrequests} requests x {nstars} stars, {concurrency} clients: '
+                  f'latency p50 {p50:.1f} ms p95 {p95:.1f} ms, {throughput:.0f} stars/s')
+        server.shutdown()
+        server.server_close()
+
+## Graphs - drawn one after another vs rendering.flush in a process pool ##
+
+def benchrendering(nfigures=16):
+    import os
+    import tempfile
+    import rendering
+    from dsdatasetgeneration import fitapparent, plotapparent
+
+    rawds = loadds('lmcdsdata.csv')
+    slope, intercept = fitapparent(rawds)
+
+    def draw(workers):
+        with tempfile.TemporaryDirectory() as outdir:
+            rendering.configure(outdir, workers)
+            for i in range(nfigures):
+                rendering.render(plotapparent, rawds, slope, intercept, f'Figure {i}')
+            return len(rendering.flush())
+
+    serialtime, serial = timeit(lambda: draw(1), repeat=1)
+    pooltime, pooled = timeit(lambda: draw(None), repeat=1)
+    rendering.configure(None)
+    print(f'rendering {nfigures} graphs of {len(rawds)} stars: one process {serialtime:.2f} s, '
+          f'{os.cpu_count()} processes {pooltime:.2f} s, graphs written: {serial}, {pooled}')
+
+BENCHMARKS = {
+    'halocut': benchhalocut,
+    'catalogues': benchcatalogues,
+    'plrelation': benchplrelation,
+    'distances': benchdistances,
+    'bootstrap': benchbootstrap,
+    'streaming': benchstreaming,
+    'incremental': benchincremental,
+    'bands': benchbands,
+    'coordinates': benchcoordinates,
+    'skyindex': benchskyindex,
+    'matchfilter': benchmatchfilter,
+    'rendering': benchrendering,
+    'metrics': benchmetrics,
+    'plmodel': benchplmodel,
+    'service': benchservice,
+}
+
+if __name__ == '__main__':
+    for name in (sys.argv[1:] or BENCHMARKS):
+        BENCHMARKS[name]()
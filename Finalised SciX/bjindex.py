@@ -0,0 +1,84 @@
+import os
+import functools
+import pandas as pd
+import numpy as np
+
+from crossmatch import CANDIDATE_COLUMNS, BOUND_COLUMNS, GAIA, GMAG_COLUMN, VizierBackend, querycandidates
+from querycache import CachedBackend, QueryCache, CACHEFILE
+from coordinates import radec
+from skyindex import SkyIndex
+
+### Offline crossmatch against a local extract of the Bailer Jones Catalogue ###
+
+# The OGLE bulge and disk fields never move, so the Bailer Jones sources around them only need downloading once.
+# The extract (Source, RA_ICRS, DE_ICRS, rgeo, the b_rgeo / B_rgeo bounds and the Gaia G magnitude Gmag - older extracts
+# without the last three still load) is loaded into a sky index (see skyindex.py) and every star of a dataframe is matched in one vectorized call - no
+# network needed.
+
+BJEXTRACT = 'bailerjonesextract.csv' # default location of the local extract
+EXTRACT_COLUMNS = ['Source', 'RA_ICRS', 'DE_ICRS', 'rgeo'] + BOUND_COLUMNS + [GMAG_COLUMN]
+
+## Local Bailer Jones index - usable as a crossmatch backend (see crossmatch.batchquery) ##
+
+class LocalBackend:
+
+    def __init__(self, table):
+        self.table = table.reset_index(drop=True)
+        self.index = SkyIndex(self.table['RA_ICRS'], self.table['DE_ICRS'])
+
+    @classmethod
+    def fromfile(cls, path=BJEXTRACT):
+        dtypes = {'Source': np.int64, 'RA_ICRS': np.float64, 'DE_ICRS': np.float64, 'rgeo': np.float64, 'b_rgeo': np.float64, 'B_rgeo': np.float64, GMAG_COLUMN: np.float64}
+        table = pd.read_csv(path, usecols=lambda column: column in EXTRACT_COLUMNS, dtype=dtypes)
+        return cls(table)
+
+    def query(self, ra, decl, radius):
+        if len(ra) == 0 or len(self.table) == 0:
+            return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+        # all target/source pairs closer than the search radius, found in a single tree-against-tree pass
+        target, row = self.index.pairs(ra, decl, radius)
+
+        candidates = self.table.iloc[row].reset_index(drop=True)
+        candidates.insert(0, '_q', target)
+        return candidates
+
+## Building the extract ##
+
+# Downloads every Bailer Jones source within radius of the stars in the given dataframes (once) and writes the extract.
+# A radius wider than the crossmatch radius keeps the extract valid if the search radius is later increased.
+# The Bailer Jones catalogue has no magnitudes, so the G magnitudes of its sources are queried from Gaia EDR3 over the
+# same cones (gaiabackend) and joined on Source - they let crossmatch.resolvematches pick by magnitude.
+
+def downloadextract(dataframes, path=BJEXTRACT, radius=0.001, backend=None, gaiabackend=None):
+    if backend is None:
+        backend = VizierBackend(columns=[column for column in EXTRACT_COLUMNS if column != GMAG_COLUMN])
+    if gaiabackend is None:
+        gaiabackend = VizierBackend(GAIA, columns=['Source', 'RA_ICRS', 'DE_ICRS', GMAG_COLUMN])
+
+    blocks, gaia = [], []
+    for dataframe in dataframes:
+        ra, decl = radec(dataframe)
+        for name, source, found in [('Bailer Jones', backend, blocks), ('Gaia', gaiabackend, gaia)]:
+            candidates, failed = querycandidates(ra, decl, source, radius)
+            if failed.any():
+                raise RuntimeError(f'{name} query failed for {int(failed.sum())} stars, extract not written')
+            found.append(candidates)
+
+    extract = pd.concat(blocks, ignore_index=True).drop(columns=GMAG_COLUMN, errors='ignore').drop_duplicates('Source')
+    magnitudes = pd.concat(gaia, ignore_index=True).reindex(columns=['Source', GMAG_COLUMN]).drop_duplicates('Source')
+    extract = extract.merge(magnitudes, on='Source', how='left')[EXTRACT_COLUMNS]
+    extract.to_csv(path, index=False)
+    print('Bailer Jones extract written', path, len(extract))
+    return extract
+
+# Backend used by dsquery/cephquery - the local extract when one exists, otherwise Vizier behind the on-disk query
+# cache (see querycache.py). Built once per run.
+
+@functools.lru_cache(maxsize=None)
+def defaultbackend(path=BJEXTRACT, cachefile=CACHEFILE):
+    if os.path.exists(path):
+        print('Using local Bailer Jones extract', path)
+        return LocalBackend.fromfile(path)
+    print('No local Bailer Jones extract found, querying Vizier through the cache', cachefile)
+    return CachedBackend(VizierBackend(), QueryCache(cachefile))
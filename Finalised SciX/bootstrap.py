@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+### Bootstrap uncertainties of the P-L relations and of the distances they give ###
+
+# The stars of a P-L relation are resampled with replacement thousands of times and the relation refitted on every
+# resample. Optionally the stars of a target galaxy are resampled too and its mean model distance recomputed with each
+# refitted relation. The resamples are drawn as (resamples x stars) index arrays and fitted with array operations -
+# there is no Python loop per resample. Resamples are split into fixed size chunks with their own random streams, so
+# the result for a given seed is the same whether the chunks run in this process or in a process pool.
+
+RESAMPLES = 10000
+LEVEL = 0.95
+CHUNK = 500 # resamples per chunk / pool task
+BLOCK = 2000000 # largest index array drawn at once (elements)
+
+# How many times each star is drawn in each resample - a (resamples x stars) array
+
+def resamplecounts(rng, n, size):
+    idx = rng.integers(0, n, (size, n))
+    idx += np.arange(size)[:, None] * n
+    return np.bincount(idx.ravel(), minlength=size * n).reshape(size, n)
+
+# Least squares M = slope * logP + zeropoint of every resample at once - the per-star terms x, y, x², xy (centred on
+# the sample means, so the sums do not cancel) are summed for all the resamples with one matrix product
+
+def fitresamples(logP, M, counts):
+    xmean, ymean = logP.mean(), M.mean()
+    x, y = logP - xmean, M - ymean
+    Sx, Sy, Sxx, Sxy = (counts @ np.column_stack([x, y, x * x, x * y]) / len(x)).T
+
+    slope = (Sxy - Sx * Sy) / (Sxx - Sx * Sx)
+    zeropoint = (ymean + Sy) - slope * (xmean + Sx)
+    return slope, zeropoint
+
+# Mean model distance (parsecs) of the resampled target stars under each resampled relation
+
+def meandistances(I, logP, slope, zeropoint, idx):
+    dm = slope[:, None] * logP[idx] + zeropoint[:, None]
+    return (10 * 10 ** ((I[idx] - dm) / 5)).mean(axis=1)
+
+def bootstrapchunk(logP, M, target, nresamples, seed):
+    rng = np.random.default_rng(seed)
+    n = len(logP)
+    rows = max(1, BLOCK // max(n, 1))
+
+    slopes, zeropoints, distances = [], [], []
+    for start in range(0, nresamples, rows):
+        size = min(rows, nresamples - start)
+        slope, zeropoint = fitresamples(logP, M, resamplecounts(rng, n, size))
+        slopes.append(slope)
+        zeropoints.append(zeropoint)
+        if target is not None:
+            targetI, targetlogP = target
+            m = len(targetI)
+            distances.append(meandistances(targetI, targetlogP, slope, zeropoint, rng.integers(0, m, (size, m))))
+
+    distance = np.concatenate(distances) if target is not None else None
+    return np.concatenate(slopes), np.concatenate(zeropoints), distance
+
+# Bootstrap samples of a relation - interval() gives the percentile confidence interval of 'slope', 'zeropoint' or
+# 'distance' (present when a target was given) as (low, median, high)
+
+class BootstrapResult:
+
+    def __init__(self, slope, zeropoint, distance=None):
+        self.slope = slope
+        self.zeropoint = zeropoint
+        self.distance = distance
+
+    def interval(self, name, level=LEVEL):
+        tail = 50 * (1 - level)
+        low, median, high = np.percentile(getattr(self, name), [tail, 50, 100 - tail])
+        return low, median, high
+
+    def summary(self, level=LEVEL):
+        names = ['slope', 'zeropoint'] + (['distance'] if self.distance is not None else [])
+        rows = [self.interval(name, level) + (np.std(getattr(self, name), ddof=1),) for name in names]
+        return pd.DataFrame(rows, index=names, columns=['low', 'median', 'high', 'std'])
+
+# magnitude / period - the stars the relation is fitted to (absolute magnitudes, periods in days)
+# target         - optional (apparent I magnitudes, periods) of the stars of the galaxy the relation gives a distance to
+# workers        - number of processes; None or 1 runs every chunk in this process
+
+def bootstrap(magnitude, period, target=None, nresamples=RESAMPLES, seed=None, workers=None):
+    logP = np.log10(np.asarray(period, dtype=np.float64))
+    M = np.asarray(magnitude, dtype=np.float64)
+    if target is not None:
+        target = (np.asarray(target[0], dtype=np.float64), np.log10(np.asarray(target[1], dtype=np.float64)))
+
+    sizes = [min(CHUNK, nresamples - start) for start in range(0, nresamples, CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers and workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(bootstrapchunk, *zip(*[(logP, M, target, size, chunkseed) for size, chunkseed in zip(sizes, seeds)])))
+    else:
+        chunks = [bootstrapchunk(logP, M, target, size, chunkseed) for size, chunkseed in zip(sizes, seeds)]
+
+    slope = np.concatenate([chunk[0] for chunk in chunks])
+    zeropoint = np.concatenate([chunk[1] for chunk in chunks])
+    distance = np.concatenate([chunk[2] for chunk in chunks]) if target is not None else None
+    return BootstrapResult(slope, zeropoint, distance)
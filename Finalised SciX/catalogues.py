@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+### Loading the OGLE IV catalogues into pandaS dataframes ###
+
+# Column layout of the OGLE IV Catalogue of Delta Scuti Variables and of Classical Cepheid Variables exports
+DSCOLUMNS = ['ID', 'mode', 'Ra', 'Decl', 'I', 'V', 'V-I', 'P1', 'P2']
+CEPHCOLUMNS = ['ID', 'mode', 'Ra', 'Decl', 'I', 'V', 'V-I', 'P1']
+
+# Every catalogue export in the repository and its column layout
+CATALOGUES = {
+    'smcdsdata.csv': DSCOLUMNS,
+    'lmcdsdata.csv': DSCOLUMNS,
+    'blgdsdata.csv': DSCOLUMNS,
+    'diskdsdata.csv': DSCOLUMNS,
+    'blgdsdatafinal.csv': DSCOLUMNS,
+    'diskdsdatafinal.csv': DSCOLUMNS,
+    'TESTINGSET.csv': DSCOLUMNS,
+    'TESTINGSET2.csv': DSCOLUMNS,
+    'smccephdata.csv': CEPHCOLUMNS,
+    'lmccephdata.csv': CEPHCOLUMNS,
+    'diskcephdata.csv': CEPHCOLUMNS,
+    'blgcephdatafinal.csv': CEPHCOLUMNS,
+    'diskcephdatafinal.csv': CEPHCOLUMNS,
+}
+
+# OGLE IV telescope saturation and sensitivity limits (I-band apparent magnitude)
+ILOWER = 13
+IUPPER = 21.5
+
+# V and V-I of the stars without a V-band magnitude
+MISSING = -99.99
+
+# Photometric bands of the exports, fitted together by the multi-band P-L relations (see plrelation.py)
+BANDS = ['I', 'V']
+
+# Stars whose value is not the MISSING marker - float32 columns hold -99.99 only to float32 precision
+
+def isknown(values):
+    return np.abs(np.asarray(values, dtype=np.float64) - MISSING) > 1e-3
+
+## Derived columns ##
+
+# Reddening-free Wesenheit index W = I - R (V-I), with the OGLE ratio of total to selective extinction R = 1.55.
+# It is added to every catalogue once, when the catalogue is loaded (and kept in the columnar copy), as column 'W' -
+# NaN for the stars without a V magnitude.
+WESENHEIT = 1.55
+
+def wesenheit(dataframe, ratio=WESENHEIT):
+    I = np.asarray(dataframe['I'], dtype=np.float64)
+    colour = np.asarray(dataframe['V-I'], dtype=np.float64)
+    return np.where(isknown(colour), I - ratio * colour, np.nan).astype(np.float32)
+
+DERIVED = {'W': wesenheit}
+
+def derivecolumns(dataframe):
+    for column, derive in DERIVED.items():
+        dataframe[column] = derive(dataframe)
+    return dataframe
+
+# Stars with a known value of a magnitude column ('I', or 'W' for the Wesenheit fits and distances) - or of every
+# column of a list of them (BANDS for the multi-band fits)
+
+def withmagnitude(dataframe, magnitude='I'):
+    values = np.asarray(dataframe[magnitude], dtype=np.float64).reshape(len(dataframe), -1)
+    return dataframe[(np.isfinite(values) & isknown(values)).all(axis=1)]
+
+## Columnar catalogues ##
+
+# The first time a catalogue is loaded it is converted to <name>.columns/ - one .npy file per column plus meta.json -
+# and from then on the columns are memory-mapped instead of re-parsing the CSV. The conversion is redone whenever the
+# CSV changes (size or modification time).
+#   - magnitudes and colour are float32 (given to 3 decimals), as is the derived Wesenheit index,
+#   - periods and coordinates stay float64 (periods are given to 8 significant figures) - or strings, for the exports
+#     with sexagesimal coordinates,
+#   - ID and mode are categorical (integer codes + categories).
+# Every loaded catalogue records the export it was read from in dataframe.attrs['source'] (see coordinates.radec).
+# FORMAT is bumped whenever what is stored changes, so older conversions are redone.
+FLOAT32 = ['I', 'V', 'V-I', 'W']
+CATEGORICAL = ['ID', 'mode']
+COLUMNAR = True
+FORMAT = 4
+
+def columnarpath(filename):
+    return os.path.splitext(filename)[0] + '.columns'
+
+def sourcestamp(filename):
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+# The catalogue exports have no header line - the first star is read as the header and the columns are then renamed,
+# so (as in the original analysis) the first star of every catalogue is left out.
+# Ra/Decl are kept as exported - coordinates.radec converts them to degrees where they are needed.
+
+def readcsv(filename, columns):
+    dataframe = pd.read_csv (filename)
+    dataframe.columns = columns
+    dataframe.attrs['source'] = filename
+    return derivecolumns(dataframe)
+
+def convertcatalogue(filename, columns, dataframe=None):
+    if dataframe is None:
+        dataframe = readcsv(filename, columns)
+
+    path = columnarpath(filename)
+    os.makedirs(path, exist_ok=True)
+
+    kinds = {}
+    for column in list(columns) + list(DERIVED):
+        values = dataframe[column]
+        if column in CATEGORICAL:
+            categorical = pd.Categorical(values)
+            np.save(os.path.join(path, column + '.codes.npy'), np.asarray(categorical.codes, dtype=np.int32))
+            np.save(os.path.join(path, column + '.categories.npy'), np.asarray(categorical.categories, dtype=str))
+            kinds[column] = 'category'
+        elif column in FLOAT32:
+            np.save(os.path.join(path, column + '.npy'), values.to_numpy(dtype=np.float32))
+            kinds[column] = 'float32'
+        elif pd.api.types.is_numeric_dtype(values):
+            np.save(os.path.join(path, column + '.npy'), values.to_numpy(dtype=np.float64))
+            kinds[column] = 'float64'
+        else:
+            np.save(os.path.join(path, column + '.npy'), np.asarray(values, dtype=str))
+            kinds[column] = 'str'
+
+    # written last - a conversion that was interrupted is never mistaken for a complete one
+    meta = {'format': FORMAT, 'columns': list(columns), 'kinds': kinds, 'rows': len(dataframe), 'source': sourcestamp(filename)}
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return path
+
+# Memory-mapped columnar catalogue, or None if there is no up to date conversion of the CSV
+
+def loadcolumnar(filename, columns):
+    path = columnarpath(filename)
+    metafile = os.path.join(path, 'meta.json')
+    if not os.path.exists(metafile):
+        return None
+    with open(metafile) as f:
+        meta = json.load(f)
+    if meta.get('format') != FORMAT or meta['columns'] != list(columns):
+        return None
+    if os.path.exists(filename) and meta['source'] != sourcestamp(filename):
+        return None
+
+    data = {}
+    for column in list(columns) + list(DERIVED):
+        if meta['kinds'][column] == 'category':
+            codes = np.load(os.path.join(path, column + '.codes.npy'), mmap_mode='r')
+            categories = np.load(os.path.join(path, column + '.categories.npy'), mmap_mode='r')
+            data[column] = pd.Categorical.from_codes(codes, categories)
+        else:
+            data[column] = np.load(os.path.join(path, column + '.npy'), mmap_mode='r')
+    dataframe = pd.DataFrame(data, copy=False)
+    dataframe.attrs['source'] = filename
+    return dataframe
+
+def loadcatalogue(filename, columns, columnar=COLUMNAR):
+    if not columnar:
+        return readcsv(filename, columns)
+
+    dataframe = loadcolumnar(filename, columns)
+    if dataframe is None:
+        try:
+            convertcatalogue(filename, columns)
+        except OSError: # read-only checkout - carry on with the CSV
+            return readcsv(filename, columns)
+        dataframe = loadcolumnar(filename, columns)
+    return dataframe
+
+# apparent magnitude thresholding - based on OGLE IV telescope saturation and sensitivity limits
+
+def magthreshold(dataframe, lower=ILOWER, upper=IUPPER):
+    dataframe = dataframe[dataframe['I'] > lower]
+    return dataframe[dataframe['I'] < upper]
+
+## Streaming ingestion ##
+
+# Full size OGLE collections (hundreds of thousands to millions of stars) are read in fixed size chunks: every chunk is
+# renamed, given the columnar dtypes (float32 magnitudes, categorical ID and mode - the categories are those of the
+# chunk, so concatenated chunks with different categories fall back to plain columns) and magnitude thresholded as it is read, so no more than
+# one chunk of the raw table is ever held in memory. The derived columns are computed before the magnitudes are
+# narrowed, exactly as in the columnar copy. As with loadcatalogue, the first line of the file is taken as the header,
+# and the coordinates are left as exported.
+
+CHUNKSIZE = 100000
+
+def streamcatalogue(filename, columns, chunksize=CHUNKSIZE, lower=ILOWER, upper=IUPPER):
+    for chunk in pd.read_csv(filename, chunksize=chunksize):
+        chunk.columns = columns
+        chunk.attrs['source'] = filename
+        chunk = derivecolumns(chunk)
+        for column in chunk.columns:
+            if column in CATEGORICAL:
+                chunk[column] = chunk[column].astype('category')
+            elif column in FLOAT32:
+                chunk[column] = chunk[column].astype(np.float32)
+        yield magthreshold(chunk, lower, upper)
+
+# Converts every catalogue up front: python catalogues.py [filename ...]
+
+if __name__ == '__main__':
+    for filename in (sys.argv[1:] or CATALOGUES):
+        if os.path.exists(filename):
+            print('converted', filename, '->', convertcatalogue(filename, CATALOGUES[filename]))
@@ -1,121 +1,118 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import statistics
-from scipy import stats
-
-from cephdatasetgeneration import cleanlmcceph, cleansmcceph 
-
-### Distances to the LMC and SMC ### Used to Generate the P-L Relations
-
-DistSMC = 62440
-DistLMC = 49590
-
-### Creating new dataframes for the Fundamental Mode of Pulsation and the First Overtone of Pulsation ###
-
-#SMC Dataframes
-
-Fundamentalsmcceph = cleansmcceph.drop(cleansmcceph[cleansmcceph['mode'] != ('F')].index)
-
-FirstOvertonesmcceph = cleansmcceph.drop(cleansmcceph[cleansmcceph['mode'] == ('F')].index)
-
-#LMC Dataframes
-
-Fundamentallmcceph = cleanlmcceph.drop(cleanlmcceph[cleanlmcceph['mode'] != ('F')].index)
-
-FirstOvertonelmcceph = cleanlmcceph.drop(cleanlmcceph[cleanlmcceph['mode'] == ('F')].index)
-
-#print((Fundamentalsmcceph))
-#print(len(FirstOvertonesmcceph))
-
-#print(len(Fundamentallmcceph))
-#print(len(FirstOvertonelmcceph))
-
-### Generating P-L Relations, Absolute Magnitude (M) vs log Period (logP) ###
-
-# Functions required:
-
-#1. Function that returns the log10 of the Period of pulsation 
-
-def logperiod(P):
-    return np.log10(P)
-
-#2. Function that calculates the Absolute Magnitude given the assumed constant distance to the specific Magellanic cloud
-
-def Msmc(I):
-    return(I - 5*np.log10(DistSMC/10)) # For SMC
-
-def Mlmc(I):
-    return(I - 5*np.log10(DistLMC/10)) # For LMC
-
-## Generating P-L relation graphs and acquiring the coefficients of the relationships ##
-
-# Fundamental Mode P-L Relations
-
-#SMC P-L Relationship 
-y = ((Msmc(Fundamentalsmcceph['I'])).tolist())
-x = ((logperiod(Fundamentalsmcceph['P1'])).tolist())
-#Delta Scuti SMC Fundamental Mode: Absolute Magnitude vs logP
-plt.scatter(x, y, marker=".")
-a, b = np.polyfit(x, y, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolute I-band Magnitude')
-LOBF = [i * a + b for i in x]
-plt.plot(x, LOBF, color = "red")
-plt.text(0.4, -6, 'M = ' + format(a.round(3)) + 'logP ' + "+ " + format(b.round(3)))
-plt.title('Cepheid SMC Fundamental Mode: Absolute Magnitude vs logP')
-plt.show()
-
-
-
-#LMC P-L Relationship
-w = ((Mlmc(Fundamentallmcceph['I'])).tolist())
-q = ((logperiod(Fundamentallmcceph['P1'])).tolist())
-
-plt.scatter(q, w, marker=".")
-c, d = np.polyfit(q, w, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolue I-band Magnitude')
-LOBF = [i * c + d for i in q]
-plt.plot(q, LOBF, color = "red")
-plt.text(0.4, -5, 'M = ' + format(c.round(3)) + 'logP ' + "+ " + format(d.round(3)))
-plt.title('Cepheid LMC Fundamental Mode: Absolute Magnitude vs logP')
-plt.show()
-
-
-
-# First Overtone P-L Relations
-
-#SMC P-L Relationship 
-y = ((Msmc(FirstOvertonesmcceph['I'])).tolist())
-x = ((logperiod(FirstOvertonesmcceph['P1'])).tolist())
-
-plt.scatter(x, y, marker=".")
-m, n = np.polyfit(x, y, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolue I-band Magnitude')
-LOBF = [i * m + n for i in x]
-plt.plot(x, LOBF, color = "red")
-plt.text(-0.2, -4, 'M = ' + format(m.round(3)) + 'logP ' + "+ " + format(n.round(3)))
-plt.title('Cepheid SMC First Overtone: Absolute Magnitude vs logP')
-plt.show()
-
-
-
-#LMC P-L Relationship
-w = ((Mlmc(FirstOvertonelmcceph['I'])).tolist())
-q = ((logperiod(FirstOvertonelmcceph['P1'])).tolist())
-
-plt.scatter(q, w, marker=".")
-k, l = np.polyfit(q, w, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolue I-band Magnitude')
-LOBF = [i * k + l for i in q]
-plt.plot(q, LOBF, color = "red")
-plt.text(-0.2, -5, 'M = ' + format(k.round(3)) + 'logP ' + "+ " + format(l.round(3)))
-plt.title('Cepheid LMC First Overtone: Absolute Magnitude vs logP')
-plt.show()
-
-
-
-
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy import stats
+
+from plrelation import fitcloudrelations, updatecloudrelations, streamcloudrelations, bootstrapcloudrelations
+from bootstrap import RESAMPLES, LEVEL
+from catalogues import CEPHCOLUMNS, CHUNKSIZE
+from rendering import render, scatter
+
+### Distances to the LMC and SMC ### Used to Generate the P-L Relations
+
+DistSMC = 62440
+DistLMC = 49590
+
+### Creating new dataframes for the Fundamental Mode of Pulsation and the First Overtone of Pulsation ###
+
+def separatemodes(cleanceph):
+
+    Fundamentalceph = cleanceph.drop(cleanceph[cleanceph['mode'] != ('F')].index)
+
+    FirstOvertoneceph = cleanceph.drop(cleanceph[cleanceph['mode'] == ('F')].index)
+
+    return Fundamentalceph, FirstOvertoneceph
+
+def separate(cleansmcceph, cleanlmcceph):
+
+    #SMC Dataframes
+    Fundamentalsmcceph, FirstOvertonesmcceph = separatemodes(cleansmcceph)
+
+    #LMC Dataframes
+    Fundamentallmcceph, FirstOvertonelmcceph = separatemodes(cleanlmcceph)
+
+    #print((Fundamentalsmcceph))
+    #print(len(FirstOvertonesmcceph))
+
+    #print(len(Fundamentallmcceph))
+    #print(len(FirstOvertonelmcceph))
+
+    return Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph
+
+### Generating P-L Relations, Absolute Magnitude (M) vs log Period (logP) ###
+
+# Functions required:
+
+#1. Function that returns the log10 of the Period of pulsation
+
+def logperiod(P):
+    return np.log10(P)
+
+#2. Function that calculates the Absolute Magnitude given the assumed constant distance to the specific Magellanic cloud
+
+def Msmc(I):
+    return(I - 5*np.log10(DistSMC/10)) # For SMC
+
+def Mlmc(I):
+    return(I - 5*np.log10(DistLMC/10)) # For LMC
+
+# Period column of each mode (both modes are fitted against P1), and the absolute magnitude
+# function and period column of each of the four relations (see plrelation.cloudsamples)
+
+PERIODS = {'Fund': 'P1', 'FO': 'P1'}
+MODES = {mode + galaxy: (absolute, period) for mode, period in PERIODS.items() for galaxy, absolute in [('SMC', Msmc), ('LMC', Mlmc)]}
+
+## Generating P-L relation graphs and acquiring the coefficients of the relationships ##
+
+# Draws the P-L relation graph of a fitted relation
+
+def plotrelation(M, P, relation, title, textpos, ylabel='Absolute I-band Magnitude'):
+    slope, intercept = relation
+    y = ((M).tolist())
+    x = ((logperiod(P)).tolist())
+
+    scatter(x, y, marker=".")
+    plt.xlabel('Log10 of Period(days)')
+    plt.ylabel(ylabel)
+    LOBF = [i * slope + intercept for i in x]
+    plt.plot(x, LOBF, color = "red")
+    plt.text(textpos[0], textpos[1], 'M = ' + format(slope.round(3)) + 'logP ' + "+ " + format(intercept.round(3)))
+    plt.title(title)
+
+# Returns the four P-L relations as {model name: PLFit} - each fit unpacks as (gradient, y intercept)
+# FundSMC = (a, b), FundLMC = (c, d), FOSMC = (m, n), FOLMC = (k, l)
+# M = slope * logP + intercept is fitted for all four at once (see plrelation.py)
+# magnitude is the apparent magnitude column fitted - 'I', or 'W' for the reddening-free Wesenheit relations (the stars
+# without a V magnitude are left out beforehand with catalogues.withmagnitude)
+# A list of bands (e.g. catalogues.BANDS) fits every band from the one pass over the periods and returns
+# {band: {model name: PLFit}} - the stars need all the bands (catalogues.withmagnitude)
+
+def fitrelations(Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph, magnitude='I'):
+    return fitcloudrelations(MODES, [Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph], magnitude)
+
+# Merges newly released Magellanic stars (cleansed and mode separated like the originals, empty dataframes for the
+# groups without new stars) into the relations fitted by fitrelations - O(new stars), the original stars are not needed
+
+def updaterelations(relations, Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph, magnitude='I'):
+    return updatecloudrelations(MODES, relations, [Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph], magnitude)
+
+# Streaming version of fitrelations for full size catalogues (see plrelation.streamcloudrelations), bounded by the chunk
+# size. Returns the same {model name: PLFit} as fitrelations (the Cepheids get no halo rejection by default).
+
+def streamrelations(smcfile='smccephdata.csv', lmcfile='lmccephdata.csv', chunksize=CHUNKSIZE, magnitude='I'):
+    return streamcloudrelations(MODES, separatemodes, CEPHCOLUMNS, smcfile, lmcfile, chunksize, halomode='none', magnitude=magnitude)
+
+# Bootstrap confidence intervals of the four relations and of the distances they give (see plrelation.bootstrapcloudrelations)
+
+def bootstraprelations(Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph, nresamples=RESAMPLES, seed=0, workers=None, level=LEVEL, magnitude='I'):
+    return bootstrapcloudrelations(MODES, [Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph], nresamples, seed, workers, level, magnitude)
+
+def plotrelations(Fundamentalsmcceph, FirstOvertonesmcceph, Fundamentallmcceph, FirstOvertonelmcceph, relations):
+
+    # Fundamental Mode P-L Relations
+    render(plotrelation, Msmc(Fundamentalsmcceph['I']), Fundamentalsmcceph['P1'], relations['FundSMC'], 'Cepheid SMC Fundamental Mode: Absolute Magnitude vs logP', (0.4, -6))
+    render(plotrelation, Mlmc(Fundamentallmcceph['I']), Fundamentallmcceph['P1'], relations['FundLMC'], 'Cepheid LMC Fundamental Mode: Absolute Magnitude vs logP', (0.4, -5), ylabel='Absolue I-band Magnitude')
+
+    # First Overtone P-L Relations
+    render(plotrelation, Msmc(FirstOvertonesmcceph['I']), FirstOvertonesmcceph['P1'], relations['FOSMC'], 'Cepheid SMC First Overtone: Absolute Magnitude vs logP', (-0.2, -4), ylabel='Absolue I-band Magnitude')
+    render(plotrelation, Mlmc(FirstOvertonelmcceph['I']), FirstOvertonelmcceph['P1'], relations['FOLMC'], 'Cepheid LMC First Overtone: Absolute Magnitude vs logP', (-0.2, -5), ylabel='Absolue I-band Magnitude')
@@ -0,0 +1,255 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+### Right ascension / declination columns as float64 degrees ###
+
+# The catalogue exports come with two kinds of coordinates:
+#   - bulge/disk exports (blg*/disk*/TESTINGSET2) give decimal degrees, e.g. 258.22959, -29.801806
+#   - Magellanic exports (smc*/lmc*) and TESTINGSET give sexagesimal strings with the hours of the right ascension cut off
+#     by the spreadsheet they went through, e.g. Ra = '30:21.2' (minutes:seconds of time), Decl = '-70:12:54.7'
+# Whole columns are converted at once - the strings are split on ':' column-wise and combined with NumPy arithmetic - and
+# the result is range checked, so every catalogue can go through crossmatch.py / bjindex.py the same way. Coordinates
+# are only parsed where they are used (radec - crossmatch, sky index, extinction), never when a catalogue is loaded,
+# streamed or fitted: the P-L relations need nothing but the magnitudes and periods.
+
+# Recovering the truncated hours: the OGLE IDs are given in order of right ascension, so consecutive stars are never more
+# than half an hour apart and the hour changes wherever the minutes wrap round (np.unwrap with a period of one hour).
+# Only the hour of the first star read is needed. For the Magellanic exports it was chosen so that the median right
+# ascension falls on the centre of the Cloud, for TESTINGSET it was checked against the decimal TESTINGSET2.
+# The LMC Cepheid export starts again from a lower right ascension where the later OGLE IV additions begin (RESTARTS:
+# ID of the first star of such a run and its hour). The last few dozen SMC Cepheids are not in order at all - their hours
+# are only the nearest guess.
+# Recovered hours are only trusted once checked: an export with truncated right ascensions is verified when a re-export of
+# it with full right ascensions (REFERENCES, in the same directory) gives every star they share within TOLERANCE (the
+# rounding of the truncated values to 0.1 s of time). A wrong hour moves every star of a run by 15 degrees of right
+# ascension and would match it with the wrong Bailer Jones sources, so radec refuses unverified recovered coordinates
+# unless unverified=True. python coordinates.py checks every export of FIRSTHOUR - at present only TESTINGSET has a
+# reference, the Magellanic exports need re-exporting with full right ascensions before they can be crossmatched.
+FIRSTHOUR = {
+    'smcdsdata.csv': 23,
+    'lmcdsdata.csv': 0,
+    'smccephdata.csv': 0,
+    'lmccephdata.csv': 4,
+    'TESTINGSET.csv': 17,
+}
+RESTARTS = {
+    'lmccephdata.csv': {'OGLE-LMC-CEP-3362': 3},
+}
+REFERENCES = {
+    'TESTINGSET.csv': 'TESTINGSET2.csv',
+}
+TOLERANCE = 1 / 3600 # degrees
+
+# Splits sexagesimal strings into (negative, fields, count) - fields is an N x 3 float64 array padded with NaN (NaN for
+# anything that is not a number either), count the number of ':' separated fields of every string (1 for decimal values).
+# The strings are laid out as an N x width byte matrix and every field is read off it with array arithmetic: a digit is
+# worth 10**(integer digits of its field - digits of the field up to and including it). Catalogue columns nearly always
+# share one layout (same width, separators and decimal point in the same places) - then the place values of the first
+# string hold for every row and the fields are a single matrix product.
+
+def splitsexagesimal(values):
+    strings = np.asarray(values, dtype=str)
+    try:
+        chars = np.char.strip(strings).astype(bytes)
+    except UnicodeEncodeError: # non-ASCII - never a coordinate
+        chars = np.full(len(strings), b'?')
+    width = max(chars.dtype.itemsize, 1)
+    matrix = np.frombuffer(chars.tobytes(), dtype=np.uint8).reshape(len(chars), width)
+
+    negative = matrix[:, 0] == ord('-')
+    signed = negative | (matrix[:, 0] == ord('+'))
+    digit = (matrix >= ord('0')) & (matrix <= ord('9'))
+    numbers = np.where(digit, matrix.astype(np.float64) - ord('0'), 0)
+
+    # everything but the digits and the sign, compared with the first string
+    layout = np.where(digit, 0, matrix)
+    layout[:, 0] = np.where(signed, ord('+'), layout[:, 0])
+    if len(chars) and (layout == layout[0]).all():
+        weights, fields, count = placevalues(matrix[:1], digit[:1], signed[:1])
+        fields = np.where(np.isnan(fields), np.nan, numbers @ weights[0].T)
+        return negative, fields, np.repeat(count, len(chars))
+
+    weights, fields, count = placevalues(matrix, digit, signed)
+    fields = np.where(np.isnan(fields), np.nan, np.einsum('nw,nfw->nf', numbers, weights))
+
+    # decimal values in any other notation (e.g. 2.58e2) are left to pandas
+    other = np.isnan(fields[:, 0]) & (count == 1)
+    if other.any():
+        fields[other, 0] = np.abs(pd.to_numeric(pd.Series(strings[other]), errors='coerce').to_numpy(dtype=np.float64))
+        negative[other] = np.char.startswith(np.char.strip(strings[other]), '-')
+    return negative, fields, count
+
+# Place value of every character of a byte matrix in each of the three fields (N x 3 x width, 0 for anything but the
+# digits of that field), fields that are not valid numbers (NaN, 0 otherwise) and the number of fields of every string
+
+def placevalues(matrix, digit, signed):
+    width = matrix.shape[1]
+    colon = matrix == ord(':')
+    point = matrix == ord('.')
+    field = np.cumsum(colon, axis=1, dtype=np.int16)
+    count = field[:, -1] + 1
+
+    # only digits, points, ':' separators, a leading sign and the zero padding of the byte matrix are allowed
+    other = ~(digit | point | colon | (matrix == 0))
+    other[:, 0] &= ~signed
+    bad = other.any(axis=1)
+
+    position = np.arange(width)
+    powers = 10.0**np.arange(-width, width + 1) # looked up instead of raising 10 to every exponent
+    weights = np.zeros((len(matrix), 3, width))
+    fields = np.zeros((len(matrix), 3))
+    for i in range(3):
+        infield = field == i
+        digits = digit & infield
+        points = point & infield
+        pointat = np.where(points.any(axis=1), np.argmax(points, axis=1), width)
+        integer = (digits & (position < pointat[:, None])).sum(axis=1, dtype=np.int16)
+        exponent = integer[:, None] - np.cumsum(digits, axis=1, dtype=np.int16)
+        weights[:, i] = np.where(digits, powers[exponent + width], 0)
+        valid = digits.any(axis=1) & (points.sum(axis=1, dtype=np.int16) <= 1) & ~bad
+        fields[~valid, i] = np.nan
+    return weights, fields, count
+
+# Raises a ValueError naming a few of the offending values
+
+def checkvalid(name, values, valid):
+    if not valid.all():
+        bad = np.asarray(values)[~valid]
+        raise ValueError(f'{int((~valid).sum())} invalid {name} values, e.g. {list(bad[:5])}')
+
+# Full right ascensions in seconds of time of truncated ones (seconds of time within the hour, in catalogue order)
+#   - firsthour is the hour of the first value,
+#   - reference is instead the full right ascension (seconds of time) of the star preceding them, e.g. the last star of
+#     the previous chunk,
+#   - restarts gives the hour of the values where a new run in order of right ascension begins (NaN elsewhere).
+
+def unwraphours(seconds, firsthour=None, reference=None, restarts=None):
+    if reference is not None:
+        unwrapped = np.unwrap(np.concatenate(([reference], seconds)), period=3600)[1:]
+    elif firsthour is None:
+        raise ValueError('right ascension without hours - pass the hour of the first star (see coordinates.FIRSTHOUR)')
+    else:
+        unwrapped = np.unwrap(seconds, period=3600) + 3600 * firsthour
+
+    if restarts is not None:
+        # every value is shifted by whole hours so that the latest restart before it gets its given hour
+        start = ~np.isnan(restarts)
+        shift = np.where(start, 3600 * np.nan_to_num(restarts) + seconds - unwrapped, 0)
+        unwrapped = unwrapped + shift[np.maximum.accumulate(np.where(start, np.arange(len(seconds)), 0))]
+    return np.mod(unwrapped, 86400)
+
+# Right ascension in degrees from decimal degrees, 'HH:MM:SS.s' or truncated 'MM:SS.s' values
+
+def parsera(values, firsthour=None, reference=None, restarts=None):
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        ra = values.astype(np.float64)
+        checkvalid('right ascension', values, (ra >= 0) & (ra < 360))
+        return ra
+
+    negative, fields, count = splitsexagesimal(values)
+    ra = np.full(len(values), np.nan)
+
+    decimal = count == 1
+    ra[decimal] = fields[decimal, 0]
+
+    full = count == 3
+    ra[full] = 15 * (fields[full, 0] + fields[full, 1] / 60 + fields[full, 2] / 3600)
+
+    # truncated values are NaN when the hour of the first star is not known
+    truncated = count == 2
+    unknown = truncated & (firsthour is None) & (reference is None)
+    if unknown.any():
+        print(f'Warning: {int(unknown.sum())} right ascensions without hours and no hour of the first star (see coordinates.FIRSTHOUR) - left as NaN')
+    elif truncated.any():
+        seconds = 60 * fields[truncated, 0] + fields[truncated, 1]
+        if restarts is not None:
+            restarts = np.asarray(restarts, dtype=np.float64)[truncated]
+        ra[truncated] = unwraphours(seconds, firsthour, reference, restarts) / 240 # 240 seconds of time per degree
+
+    # minutes and seconds are fields 1, 2 of full values and fields 0, 1 of truncated ones
+    inrange = np.where(truncated, (fields[:, 0] < 60) & (fields[:, 1] < 60), (fields[:, 1] < 60) & (fields[:, 2] < 60))
+    valid = ((ra >= 0) & (ra < 360) | unknown) & ~negative & (count <= 3) & (decimal | inrange)
+    checkvalid('right ascension', values, valid)
+    return ra
+
+# Declination in degrees from decimal degrees, '+-DD:MM:SS.s' or '+-DD:MM' values
+
+def parsedec(values):
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        decl = values.astype(np.float64)
+        checkvalid('declination', values, (decl >= -90) & (decl <= 90))
+        return decl
+
+    negative, fields, count = splitsexagesimal(values)
+    minutes = np.where(count >= 2, fields[:, 1], 0)
+    seconds = np.where(count >= 3, fields[:, 2], 0)
+    decl = np.where(negative, -1, 1) * (fields[:, 0] + minutes / 60 + seconds / 3600)
+
+    valid = (decl >= -90) & (decl <= 90) & (count <= 3) & (minutes < 60) & (seconds < 60)
+    checkvalid('declination', values, valid)
+    return decl
+
+# Right ascensions of an export with truncated ones, hours recovered with FIRSTHOUR / RESTARTS, and the IDs of its stars
+# (the first line of the file is a star too)
+
+def recoveredra(filename):
+    name = os.path.basename(filename)
+    dataframe = pd.read_csv(filename, header=None, usecols=[0, 2], names=['ID', 'Ra'])
+    restarts = dataframe['ID'].map(RESTARTS[name]).to_numpy(dtype=np.float64) if name in RESTARTS else None
+    return dataframe['ID'].to_numpy(dtype=str), parsera(dataframe['Ra'], FIRSTHOUR.get(name), restarts=restarts)
+
+# Largest difference (degrees) between the recovered right ascensions of an export and those of its reference, NaN when
+# it has no reference or they share no stars
+
+def checkhours(filename):
+    name = os.path.basename(filename)
+    reference = os.path.join(os.path.dirname(filename), REFERENCES.get(name, ''))
+    if name not in REFERENCES or name not in FIRSTHOUR or not os.path.exists(reference):
+        return np.nan
+    ids, ra = recoveredra(filename)
+    referenced = pd.read_csv(reference, header=None, usecols=[0, 2], names=['ID', 'Ra'])
+    referenced = pd.Series(parsera(referenced['Ra']), index=referenced['ID'].to_numpy(dtype=str))
+    shared = np.isin(ids, referenced.index)
+    if not shared.any():
+        return np.nan
+    return float(np.max(np.abs(ra[shared] - referenced.loc[ids[shared]].to_numpy())))
+
+def verifiedhours(filename):
+    return checkhours(filename) <= TOLERANCE # False for NaN
+
+# 'Ra'/'Decl' of a dataframe as float64 degree arrays, whichever form they are stored in. The catalogues keep their
+# coordinates as exported (see catalogues.py) and record the file they come from in dataframe.attrs['source'], which
+# picks the hours of truncated right ascensions (FIRSTHOUR / RESTARTS) - the hours are recovered from the stars of the
+# dataframe in catalogue order. Without a known hour the truncated right ascensions are NaN; recovered hours that are
+# not verified raise a ValueError unless unverified=True (or the caller gives firsthour itself).
+
+def radec(dataframe, firsthour=None, unverified=False):
+    source = dataframe.attrs.get('source')
+    restarts = None
+    if source is not None and firsthour is None and os.path.basename(source) in FIRSTHOUR:
+        name = os.path.basename(source)
+        truncated = dataframe['Ra'].dtype.kind not in 'iuf' and (np.char.count(np.asarray(dataframe['Ra'], dtype=str), ':') == 1).any()
+        if truncated and not unverified and not verifiedhours(source):
+            raise ValueError(f'the right ascension hours of {name} are recovered from the order of its stars and not verified against '
+                             f'a full right ascension export (coordinates.REFERENCES) - re-export it with full right ascensions, '
+                             f'or pass unverified=True')
+        firsthour = FIRSTHOUR[name]
+        if name in RESTARTS:
+            restarts = dataframe['ID'].astype(str).map(RESTARTS[name]).to_numpy(dtype=np.float64)
+    return parsera(dataframe['Ra'], firsthour, restarts=restarts), parsedec(dataframe['Decl'])
+
+# Checks the recovered hours of every export with truncated right ascensions: python coordinates.py
+
+if __name__ == '__main__':
+    for filename in FIRSTHOUR:
+        if os.path.exists(filename):
+            difference = checkhours(filename)
+            if np.isnan(difference):
+                print(filename, 'unverified - no full right ascension export to check the recovered hours against')
+            else:
+                print(filename, 'verified' if difference <= TOLERANCE else 'WRONG HOURS', f'against {REFERENCES[filename]}, '
+                      f'largest difference {difference * 3600:.2f} arcsec')
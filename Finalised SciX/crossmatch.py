@@ -0,0 +1,259 @@
+import pandas as pd
+import numpy as np
+
+from queryexecutor import QueryExecutor
+from coordinates import radec
+from catalogues import isknown
+
+### Batched crossmatch against the Bailer Jones Catalogue (Vizier I/352) ###
+
+# Instead of one cone search per star, the positions of a whole dataframe are sent to the backend in a few large blocks.
+# Every backend returns a single candidate table per block, where the '_q' column holds the (0 based) position of the
+# target inside the block - this lets the chosen 'rgeo'/'Source' be mapped straight back onto the dataframe rows.
+
+CATALOGUE = 'I/352' # Bailer Jones distances to Gaia EDR3 sources
+RADIUS = 0.0001 # cone radius in degrees, same as the per-row dsquery/cephquery searches
+CHUNKSIZE = 2000 # number of targets uploaded to the backend at once
+
+CANDIDATE_COLUMNS = ['_q', 'Source', 'RA_ICRS', 'DE_ICRS', 'rgeo']
+BOUND_COLUMNS = ['b_rgeo', 'B_rgeo'] # 16th / 84th percentiles of rgeo, when the backend provides them
+GAIA = 'I/350' # Gaia EDR3 - the G magnitudes of the Bailer Jones sources (I/352 has none), joined on Source
+GMAG_COLUMN = 'Gmag'
+
+# How a star with several candidates inside its cone is matched:
+#   nearest   - the candidate closest to the star
+#   magnitude - the candidate whose Gaia G magnitude ('Gmag' column of the candidates) is closest to the G expected from
+#               the star's I and V-I (gmagnitude), then the nearest - stars without a V-I colour are matched by position.
+#               Only the local extract has Gmag (bjindex.downloadextract joins it from Gaia EDR3) - with a backend
+#               without it (Vizier I/352) the stars are matched by position, with a warning
+RESOLUTIONS = ['nearest', 'magnitude']
+
+## Crossmatch result schema ##
+
+# Columns added to a crossmatched dataframe and their types:
+#   Distance - Bailer Jones geometric distance rgeo (parsecs), 0 for stars without a match, NaN where the query failed
+#   SourceID - Gaia EDR3 source of the match, 0 without a match
+#   Separation - angular distance (arcseconds) between the star and its match, NaN without a match
+#   MatchCount - number of Bailer Jones sources inside the cone, 0 without a match
+#   b_rgeo, B_rgeo - lower / upper bound of the distance (parsecs), NaN without a match or when the backend has no bounds
+#   Status   - 'matched', 'nomatch' or 'failed', categorical
+#   Matched  - null mask of the columns above: True only where they hold a match
+STATUSES = pd.CategoricalDtype(['matched', 'nomatch', 'failed'])
+MATCHSCHEMA = {'Distance': np.float64, 'SourceID': np.int64, 'Separation': np.float64, 'MatchCount': np.int64,
+               'b_rgeo': np.float64, 'B_rgeo': np.float64, 'Status': STATUSES, 'Matched': bool}
+
+# values of the stars without a match
+NOMATCH = {'Distance': 0, 'SourceID': 0, 'Separation': np.nan, 'MatchCount': 0, 'b_rgeo': np.nan, 'B_rgeo': np.nan}
+
+# Casts the crossmatch columns of a dataframe to the schema in place (Matched is derived from Status, columns a
+# crossmatch did not fill in get their NOMATCH value)
+
+def applyschema(dataframe):
+    for column, value in NOMATCH.items():
+        if column not in dataframe.columns:
+            dataframe[column] = value
+    dataframe['Status'] = dataframe['Status'].astype(STATUSES)
+    dataframe['Matched'] = (dataframe['Status'] == 'matched').to_numpy()
+    for column, dtype in MATCHSCHEMA.items():
+        dataframe[column] = dataframe[column].astype(dtype)
+    return dataframe
+
+# The matched stars of a crossmatched dataframe in one vectorized selection - a compact copy with a fresh index, without
+# the Status / Matched bookkeeping columns. The number of stars whose query failed is kept in attrs['failed'], so a
+# partial crossmatch can be told from a complete one (see pipeline.querycomplete)
+
+def matchedstars(dataframe):
+    columns = [column for column in dataframe.columns if column not in ('Status', 'Matched')]
+    matched = dataframe.loc[dataframe['Matched'].to_numpy(), columns].reset_index(drop=True)
+    matched.attrs['failed'] = int((dataframe['Status'] == 'failed').sum())
+    return matched
+
+# Angular separation (degrees) between two sets of positions - haversine form, accurate at the sub-arcsecond radii used here
+
+def angularseparation(ra1, decl1, ra2, decl2):
+    ra1, decl1, ra2, decl2 = (np.radians(np.asarray(i, dtype=np.float64)) for i in (ra1, decl1, ra2, decl2))
+    hav = np.sin((decl2 - decl1) / 2)**2 + np.cos(decl1) * np.cos(decl2) * np.sin((ra2 - ra1) / 2)**2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(hav, 0, 1))))
+
+## Backends ##
+
+# Vizier backend - one multi-target query_region call per block of positions
+
+class VizierBackend:
+
+    def __init__(self, catalog=CATALOGUE, columns=('*', 'RA_ICRS', 'DE_ICRS')):
+        self.catalog = catalog
+        self.columns = list(columns)
+
+    def query(self, ra, decl, radius):
+        # astroquery is only needed when actually talking to Vizier
+        from astroquery.vizier import Vizier
+        from astropy import units as u
+        import astropy.coordinates as coord
+
+        # row_limit=-1, otherwise Vizier truncates the combined answer for the whole block to 50 rows
+        v = Vizier(catalog=self.catalog, columns=self.columns, row_limit=-1)
+        result = v.query_region(
+            coord.SkyCoord(ra=np.asarray(ra), dec=np.asarray(decl), unit=(u.deg, u.deg), frame='icrs'),
+            radius=radius * u.deg
+        )
+
+        if len(result) == 0:
+            return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+        candidates = result[0].to_pandas()
+        if '_q' in candidates.columns:
+            candidates['_q'] = candidates['_q'].astype(np.int64) - 1 # Vizier numbers the targets from 1
+        else:
+            candidates['_q'] = 0 # single target blocks come back without a target column
+        return candidates
+
+# Table backend - crossmatches against a catalogue extract already held in memory (fixtures, local stand-in services)
+
+class TableBackend:
+
+    def __init__(self, table):
+        self.table = table.reset_index(drop=True)
+        self.ra = self.table['RA_ICRS'].to_numpy(dtype=np.float64)
+        self.decl = self.table['DE_ICRS'].to_numpy(dtype=np.float64)
+
+    def query(self, ra, decl, radius):
+        ra = np.asarray(ra, dtype=np.float64)
+        decl = np.asarray(decl, dtype=np.float64)
+
+        # brute force target x catalogue separation matrix - fine for the small tables this backend is meant for
+        separation = angularseparation(ra[:, None], decl[:, None], self.ra[None, :], self.decl[None, :])
+        target, row = np.nonzero(separation <= radius)
+
+        candidates = self.table.iloc[row].reset_index(drop=True)
+        candidates.insert(0, '_q', target.astype(np.int64))
+        return candidates
+
+## Batched query ##
+
+# Sends the Ra/Decl columns of a dataframe to the backend in blocks of chunksize targets (concurrently, see
+# queryexecutor.py) and returns every candidate, with '_q' converted to the positional index of the star within the
+# full dataframe, together with a mask of the stars whose block could not be queried
+
+def querycandidates(ra, decl, backend=None, radius=RADIUS, chunksize=CHUNKSIZE, executor=None):
+    if backend is None:
+        backend = VizierBackend()
+    if executor is None:
+        executor = QueryExecutor()
+
+    starts = list(range(0, len(ra), chunksize))
+    results = executor.run(backend, [(ra[start:start + chunksize], decl[start:start + chunksize]) for start in starts], radius)
+
+    blocks = []
+    failed = np.zeros(len(ra), dtype=bool)
+    for start, candidates in zip(starts, results):
+        if candidates is None:
+            failed[start:start + chunksize] = True
+            continue
+        if len(candidates) == 0:
+            continue
+        candidates = candidates.copy()
+        candidates['_q'] = candidates['_q'].to_numpy(dtype=np.int64) + start
+        blocks.append(candidates)
+
+    if len(blocks) == 0:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS), failed
+    return pd.concat(blocks, ignore_index=True), failed
+
+# Expected Gaia G magnitude of stars from their I magnitude and V-I colour (G - V polynomial of Riello et al. 2021),
+# NaN for the stars without a V-I colour
+
+def gmagnitude(I, colour):
+    I = np.asarray(I, dtype=np.float64)
+    colour = np.asarray(colour, dtype=np.float64)
+    colour = np.where(isknown(colour), colour, np.nan)
+    return I + colour - 0.01760 - 0.006860 * colour - 0.1732 * colour**2
+
+# Chooses one candidate per target (see RESOLUTIONS) in a single vectorized pass over the whole candidate table.
+# expected is the expected G magnitude of every target (magnitude resolution only).
+# Returns the chosen candidates with their separation '_r' (degrees) and the number of candidates of their target '_n'.
+
+def resolvematches(candidates, ra, decl, resolution='nearest', expected=None):
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f'unknown match resolution {resolution!r}, expected one of {RESOLUTIONS}')
+    if len(candidates) == 0:
+        return candidates.assign(_r=np.empty(0), _n=np.empty(0, dtype=np.int64))
+
+    q = candidates['_q'].to_numpy(dtype=np.int64)
+    separation = angularseparation(ra[q], decl[q], candidates['RA_ICRS'], candidates['DE_ICRS'])
+
+    # sort keys, the last one first: target, then magnitude difference (magnitude resolution), then separation
+    keys = [separation]
+    if resolution == 'magnitude' and (GMAG_COLUMN not in candidates.columns or expected is None):
+        print('Warning: no Gaia G magnitudes of the Bailer Jones sources (build the local extract with bjindex.downloadextract)'
+              ' - matching by position instead')
+        resolution = 'nearest'
+    if resolution == 'magnitude':
+        difference = np.abs(candidates[GMAG_COLUMN].to_numpy(dtype=np.float64) - np.asarray(expected, dtype=np.float64)[q])
+        keys.append(np.nan_to_num(difference, nan=np.inf))
+    order = np.lexsort(keys + [q])
+
+    # the first candidate of every target in that order
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = q[order][1:] != q[order][:-1]
+    chosen = order[first]
+
+    counts = np.bincount(q)
+    return candidates.iloc[chosen].assign(_r=separation[chosen], _n=counts[q[chosen]])
+
+# Crossmatch column values of resolved candidates, in MATCHSCHEMA order
+
+def matchvalues(matches):
+    values = {
+        'Distance': matches['rgeo'].to_numpy(dtype=np.float64),
+        'SourceID': matches['Source'].to_numpy(dtype=np.int64),
+        'Separation': matches['_r'].to_numpy(dtype=np.float64) * 3600,
+        'MatchCount': matches['_n'].to_numpy(dtype=np.int64),
+    }
+    for column in BOUND_COLUMNS:
+        values[column] = matches[column].to_numpy(dtype=np.float64) if column in matches.columns else np.full(len(matches), np.nan)
+    return values
+
+# Batched equivalent of dsquery/cephquery - adds the MATCHSCHEMA columns to the dataframe in place.
+# Status is 'matched', 'nomatch' (no Bailer Jones source inside the cone) or 'failed' (the query itself failed).
+# Unmatched stars keep Distance = 0 / SourceID = 0 as in the per-row queries, failed stars get Distance = NaN.
+# Ra/Decl may be decimal or full sexagesimal values (see coordinates.py). resolution picks the match of stars with
+# several candidates (RESOLUTIONS).
+
+def batchquery(dataframe, backend=None, radius=RADIUS, chunksize=CHUNKSIZE, executor=None, resolution='nearest'):
+    ra, decl = radec(dataframe)
+
+    candidates, failed = querycandidates(ra, decl, backend, radius, chunksize, executor)
+    expected = gmagnitude(dataframe['I'], dataframe['V-I']) if resolution == 'magnitude' else None
+    matches = resolvematches(candidates, ra, decl, resolution, expected)
+    q = matches['_q'].to_numpy(dtype=np.int64)
+
+    columns = {}
+    for column, values in matchvalues(matches).items():
+        filled = np.full(len(dataframe), NOMATCH[column], dtype=MATCHSCHEMA[column])
+        filled[q] = values
+        columns[column] = filled
+    columns['Distance'][failed] = np.nan
+    status = np.full(len(dataframe), 'nomatch', dtype='<U7')
+    status[q] = 'matched'
+    status[failed] = 'failed'
+
+    for column, values in columns.items():
+        dataframe[column] = values
+    dataframe['Status'] = status
+    applyschema(dataframe)
+    if failed.any():
+        print('Bailer Jones query failed for', int(failed.sum()), 'stars - rerun them with retryfailed')
+    return dataframe
+
+# Queries the failed stars of an already crossmatched dataframe again, leaving every other row untouched
+
+def retryfailed(dataframe, backend=None, radius=RADIUS, chunksize=CHUNKSIZE, executor=None, resolution='nearest'):
+    failed = (dataframe['Status'] == 'failed').to_numpy()
+    if not failed.any():
+        return dataframe
+
+    retried = batchquery(dataframe[failed].copy(), backend, radius, chunksize, executor, resolution)
+    for column in MATCHSCHEMA:
+        dataframe.loc[failed, column] = retried[column].to_numpy()
+    return applyschema(dataframe)
@@ -0,0 +1,177 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import types
+
+### Stage-level artifact caching for the SciX pipeline ###
+
+# Every stage is a named node: a function, the nodes whose outputs it takes (in order), keyword parameters, the data
+# files it reads and options that do not change its result (e.g. a number of worker processes). The output of a node is
+# pickled to the cache directory under a key that hashes
+#   - the node name and parameters,
+#   - the code of the node function and of the repository functions it calls,
+#   - the contents of its input files,
+#   - the keys of the nodes it depends on.
+# So changing the 1.5 mag halo cut re-runs only the nodes downstream of the cleansing, and editing a plotting function
+# re-uses every upstream artifact. Nodes with cache=False (plots, printed summaries) always run.
+# A node may also be given a complete function of its output - when it returns False (e.g. a crossmatch some of whose
+# queries failed) the output is used for this run but not written, nor are the outputs of the nodes downstream of it,
+# so the next run computes them again instead of keeping the partial result.
+
+CACHEDIR = '.scixcache'
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Source of a function plus every function and class from this repository it refers to (directly or through a module attribute),
+# so that editing a helper such as selection.halocut invalidates the nodes that use it
+
+def codehash(func):
+    sources = {}
+    pending = [func]
+    while pending:
+        func = pending.pop()
+        name = f'{func.__module__}.{func.__qualname__}'
+        if name in sources:
+            continue
+        if isinstance(func, type): # classes - their source, then the functions their methods call
+            sources[name] = inspect.getsource(func)
+            methods = [getattr(value, '__func__', value) for value in vars(func).values()] # unwraps class/static methods
+            pending.extend(method for method in methods if isinstance(method, types.FunctionType))
+            continue
+        try:
+            sources[name] = inspect.getsource(func)
+        except (OSError, TypeError):
+            sources[name] = repr(func)
+            continue
+
+        names = set(func.__code__.co_names)
+        for const in func.__code__.co_consts: # nested functions and comprehensions
+            if isinstance(const, types.CodeType):
+                names.update(const.co_names)
+
+        for name in sorted(names):
+            value = func.__globals__.get(name)
+            candidates = [value]
+            if isinstance(value, types.ModuleType) and inrepository(value):
+                candidates = [getattr(value, attr, None) for attr in sorted(names)]
+            for candidate in candidates:
+                if isinstance(candidate, (types.FunctionType, type)) and inrepository(candidate):
+                    pending.append(candidate)
+
+    # sorted, so the hash does not depend on the order the functions were found in
+    digest = hashlib.sha1()
+    for name in sorted(sources):
+        digest.update(name.encode())
+        digest.update(sources[name].encode())
+    return digest.hexdigest()
+
+# functions and modules defined in this folder
+
+def inrepository(obj):
+    if isinstance(obj, types.ModuleType):
+        filename = getattr(obj, '__file__', None) or ''
+    elif isinstance(obj, type):
+        filename = getattr(sys.modules.get(obj.__module__), '__file__', None) or ''
+    else:
+        filename = obj.__code__.co_filename
+    return os.path.dirname(os.path.abspath(filename)) == HERE
+
+def filehash(path):
+    if not os.path.exists(path):
+        return 'missing'
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class Node:
+
+    def __init__(self, name, func, deps=(), params=None, files=(), cache=True, options=None, complete=None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = dict(params or {})
+        self.options = dict(options or {})
+        self.files = list(files)
+        self.cache = cache
+        self.complete = complete
+
+class DAG:
+
+    def __init__(self, cachedir=CACHEDIR, usecache=True):
+        self.cachedir = cachedir
+        self.usecache = usecache
+        self.nodes = {}
+        self.keys = {}
+        self.results = {}
+        self.hits = []
+        self.computed = []
+        self.incomplete = []
+
+    def add(self, name, func, deps=(), params=None, files=(), cache=True, options=None, complete=None):
+        for dep in deps:
+            if dep not in self.nodes:
+                raise KeyError(f'node {name} depends on unknown node {dep}')
+        self.nodes[name] = Node(name, func, deps, params, files, cache, options, complete)
+
+    # Cache key of a node - only needs the keys of the upstream nodes, never their outputs (options are left out)
+
+    def key(self, name):
+        if name not in self.keys:
+            node = self.nodes[name]
+            digest = hashlib.sha1()
+            digest.update(name.encode())
+            digest.update(repr(sorted(node.params.items())).encode())
+            digest.update(codehash(node.func).encode())
+            for path in node.files:
+                digest.update(path.encode())
+                digest.update(filehash(path).encode())
+            for dep in node.deps:
+                digest.update(self.key(dep).encode())
+            self.keys[name] = digest.hexdigest()
+        return self.keys[name]
+
+    def path(self, name):
+        return os.path.join(self.cachedir, f'{name}-{self.key(name)[:16]}.pkl')
+
+    # Output of a node, loaded from the cache when possible - upstream nodes are only evaluated on a cache miss
+
+    def evaluate(self, name):
+        if name in self.results:
+            return self.results[name]
+
+        node = self.nodes[name]
+        path = self.path(name)
+        if node.cache and self.usecache and os.path.exists(path):
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            self.hits.append(name)
+        else:
+            inputs = [self.evaluate(dep) for dep in node.deps]
+            result = node.func(*inputs, **node.params, **node.options)
+            self.computed.append(name)
+            if any(dep in self.incomplete for dep in node.deps) or (node.complete is not None and not node.complete(result)):
+                self.incomplete.append(name)
+            elif node.cache:
+                os.makedirs(self.cachedir, exist_ok=True)
+                with open(path, 'wb') as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.results[name] = result
+        return result
+
+    def run(self, targets):
+        return {target: self.evaluate(target) for target in targets}
+
+    # Removes cached artifacts that no longer match the key of their node
+
+    def prune(self):
+        if not os.path.isdir(self.cachedir):
+            return
+        current = {os.path.basename(self.path(name)) for name in self.nodes}
+        for filename in os.listdir(self.cachedir):
+            if filename.endswith('.pkl') and filename not in current:
+                os.remove(os.path.join(self.cachedir, filename))
@@ -0,0 +1,255 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from catalogues import WESENHEIT, isknown
+from plkernel import MODELFILE, loadmodels, modeldistances
+
+### Distance estimates for new Delta Scuti / Cepheid candidates over HTTP ###
+
+# A small local service that loads a model file written by pipeline.py --save-models once and answers
+#   POST /distances  {"kind": "ds" | "ceph", "galaxy": "LMC" | "SMC" (optional, LMC by default),
+#                     "I": [...], "P": [...], "mode": [...], "V-I": [...] (optional)}
+# with {"distance": [...], "error": [...], "model": [...]} - one entry per star, in the order given.
+#   - P is the period (days) of the star's pulsation mode, mode 'F' (fundamental) or 'FO' (first overtone), and picks the
+#     Fund / FO relation of the galaxy's set,
+#   - stars with a V-I colour get their distance from the Wesenheit relations (W = I - 1.55 (V-I)) when the model file
+#     has them ('dsW' / 'cephW'), the others from the I band relations - 'model' names the relation used,
+#   - error is the 1 sigma distance uncertainty, from the covariance of the relation's coefficients and its scatter,
+#   - stars that cannot be placed (unknown mode, non-positive period, no I magnitude) get null distances and errors.
+# The stars of a request are columns rather than records, so thousands of stars are one JSON array per field and are
+# evaluated in one NumPy call. GET /models lists the loaded relations.
+
+# Micro-batching (off by default): with a window > 0, requests arriving while a batch is being gathered (up to window
+# seconds, or maxbatch stars) are evaluated together in one call per relation set and their results split back, so under
+# many small concurrent requests the NumPy call overhead is paid once per batch instead of once per request. On a single
+# core the HTTP and JSON handling of a request costs far more than its evaluation, and the window only adds latency
+# (see python benchmarks.py service) - it pays off when the evaluation is the larger part, e.g. with more cores.
+
+WINDOW = 0.002 # seconds, a typical batching window
+MAXBATCH = 65536 # stars
+PORT = 8765
+MODES = {'F': 'Fund', 'FO': 'FO'}
+GALAXIES = ['LMC', 'SMC']
+
+# Coefficients of the relations of one set, stacked for indexing by star:
+# names, slopes, zeropoints, covariances (K x 2 x 2) and scatters
+
+def stackset(models):
+    names = list(models)
+    slopes = np.array([models[name].slope for name in names])
+    zeropoints = np.array([models[name].zeropoint for name in names])
+    covariances = np.array([models[name].covariance for name in names])
+    scatters = np.array([models[name].scatter for name in names])
+    return names, slopes, zeropoints, covariances, scatters
+
+# I, P, mode and V-I of a batch of stars as arrays of the same length (V-I NaN when not given)
+
+def starcolumns(I, P, mode, colour=None):
+    I = np.atleast_1d(np.asarray(I, dtype=np.float64))
+    P = np.atleast_1d(np.asarray(P, dtype=np.float64))
+    mode = np.atleast_1d(np.asarray(mode, dtype=str))
+    colour = np.full(len(I), np.nan) if colour is None else np.atleast_1d(np.asarray(colour, dtype=np.float64))
+    if not len(I) == len(P) == len(mode) == len(colour) or I.ndim > 1 or P.ndim > 1 or mode.ndim > 1 or colour.ndim > 1:
+        raise ValueError(f'I, P, mode and V-I must be lists of the same length, got {len(I)}, {len(P)}, {len(mode)} and {len(colour)} values')
+    return I, P, mode, colour
+
+class DistanceEstimator:
+
+    # modelsets as returned by plkernel.loadmodels (its multi-band {band: {name: model}} sets are not served)
+
+    def __init__(self, modelsets):
+        self.modelsets = modelsets
+        self.stacks = {setname: stackset(models) for setname, models in modelsets.items()
+                       if not all(isinstance(bandmodels, dict) for bandmodels in models.values())}
+
+    @classmethod
+    def load(cls, path=MODELFILE):
+        return cls(loadmodels(path))
+
+    # ValueError unless kind names a relation set of the model file and galaxy is one of GALAXIES
+
+    def checkset(self, kind, galaxy):
+        if not isinstance(kind, str) or kind not in self.stacks:
+            raise ValueError(f'no {kind!r} relations in the model file, expected one of {sorted(self.stacks)}')
+        if galaxy not in GALAXIES:
+            raise ValueError(f'galaxy must be one of {GALAXIES}, got {galaxy!r}')
+
+    # Distances of a batch of stars of one kind - arrays of I, P (days), mode ('F' / 'FO') and optionally V-I
+    # returns the distances (parsecs), their 1 sigma errors and the relation of every star ('' where none applies)
+
+    def estimate(self, kind, I, P, mode, colour=None, galaxy='LMC'):
+        self.checkset(kind, galaxy)
+        I, P, mode, colour = starcolumns(I, P, mode, colour)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logP = np.log10(P)
+
+        # the Wesenheit index of the stars with a colour, when there are Wesenheit relations
+        magnitude, band = I.copy(), np.zeros(len(I), dtype=bool)
+        if kind + 'W' in self.stacks:
+            band = np.isfinite(colour) & isknown(colour)
+            magnitude[band] = I[band] - WESENHEIT * colour[band]
+
+        distance, error = np.full(len(I), np.nan), np.full(len(I), np.nan)
+        relation = np.full(len(I), '', dtype=object)
+        for setname, inset in [(kind, ~band), (kind + 'W', band)]:
+            if not inset.any():
+                continue
+            names, slopes, zeropoints, covariances, scatters = self.stacks[setname]
+            for code, prefix in MODES.items():
+                name = prefix + galaxy
+                stars = inset & (mode == code) & np.isfinite(logP) & np.isfinite(magnitude)
+                if name not in names or not stars.any():
+                    continue
+                k = names.index(name)
+                x = logP[stars]
+                distance[stars] = modeldistances(magnitude[stars], x, slopes[k:k + 1], zeropoints[k:k + 1])[:, 0]
+
+                # variance of M from the coefficients, plus the intrinsic scatter of the relation
+                C = covariances[k]
+                variance = C[0, 0] * x * x + 2 * C[0, 1] * x + C[1, 1] + scatters[k]**2
+                error[stars] = distance[stars] * np.log(10) / 5 * np.sqrt(variance)
+                relation[stars] = setname + ' ' + name
+        return distance, error, relation
+
+    def describe(self):
+        return {setname: {name: repr(model) for name, model in models.items()} for setname, models in self.modelsets.items()}
+
+## Micro-batching ##
+
+# Requests are queued with the event their caller waits on; one worker thread drains the queue, evaluates every
+# request gathered within the window that share a (kind, galaxy) together and hands each its slice of the results.
+
+class MicroBatcher:
+
+    def __init__(self, estimator, window=WINDOW, maxbatch=MAXBATCH):
+        self.estimator = estimator
+        self.window = window
+        self.maxbatch = maxbatch
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.worker = threading.Thread(target=self.serve, daemon=True)
+        self.worker.start()
+
+    def estimate(self, kind, I, P, mode, colour=None, galaxy='LMC'):
+        self.estimator.checkset(kind, galaxy)
+        pending = {'args': (kind, galaxy) + starcolumns(I, P, mode, colour), 'done': threading.Event()}
+        self.requests.put(pending)
+        pending['done'].wait()
+        if 'error' in pending:
+            raise pending['error']
+        return pending['result']
+
+    def gather(self):
+        batch = [self.requests.get()]
+        stars = len(batch[0]['args'][2])
+        deadline = time.monotonic() + self.window
+        while stars < self.maxbatch:
+            remaining = deadline - time.monotonic()
+            try:
+                pending = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(pending)
+            stars += len(pending['args'][2])
+        return batch
+
+    def serve(self):
+        while True:
+            batch = self.gather()
+            self.batches += 1
+            groups = {}
+            for pending in batch:
+                groups.setdefault(pending['args'][:2], []).append(pending)
+            for (kind, galaxy), group in groups.items():
+                self.evaluate(kind, galaxy, group)
+
+    def evaluate(self, kind, galaxy, group):
+        try:
+            sizes = [len(pending['args'][2]) for pending in group]
+            I, P, mode, colour = (np.concatenate([pending['args'][i] for pending in group]) for i in range(2, 6))
+            results = self.estimator.estimate(kind, I, P, mode, colour, galaxy)
+            bounds = np.cumsum(sizes)[:-1]
+            for pending, distance, error, relation in zip(group, *(np.split(result, bounds) for result in results)):
+                pending['result'] = (distance, error, relation)
+        except Exception as error: # a bad request fails its batch - each request is then retried on its own
+            if len(group) > 1:
+                for pending in group:
+                    self.evaluate(kind, galaxy, [pending])
+                return
+            group[0]['error'] = error
+        for pending in group:
+            pending['done'].set()
+
+## HTTP ##
+
+# Lists with null in place of NaN, for JSON
+
+def tojson(values):
+    return np.where(np.isnan(values), None, values).tolist()
+
+class DistanceHandler(BaseHTTPRequestHandler):
+
+    estimator = None # DistanceEstimator or MicroBatcher, set by makeserver
+
+    def reply(self, status, document):
+        body = json.dumps(document).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/models':
+            return self.reply(404, {'error': f'unknown path {self.path}'})
+        estimator = getattr(self.estimator, 'estimator', self.estimator)
+        self.reply(200, estimator.describe())
+
+    def do_POST(self):
+        if self.path != '/distances':
+            return self.reply(404, {'error': f'unknown path {self.path}'})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            distance, error, relation = self.estimator.estimate(request['kind'], request['I'], request['P'], request['mode'],
+                                                                request.get('V-I'), request.get('galaxy', 'LMC'))
+        except (KeyError, TypeError, ValueError) as problem:
+            return self.reply(400, {'error': f'{type(problem).__name__}: {problem}'})
+        self.reply(200, {'distance': tojson(distance), 'error': tojson(error), 'model': relation.tolist()})
+
+    def log_message(self, format, *args): # no line per request
+        pass
+
+# a backlog for many concurrent clients (the socketserver default of 5 resets their connections)
+
+class DistanceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+# Server answering on host:port (port 0 picks a free one - see server.server_address), batching requests for window
+# seconds (0 evaluates every request on its own)
+
+def makeserver(estimator, host='127.0.0.1', port=PORT, window=0, maxbatch=MAXBATCH):
+    handler = type('Handler', (DistanceHandler,), {'estimator': MicroBatcher(estimator, window, maxbatch) if window else estimator})
+    return DistanceServer((host, port), handler)
+
+# python distanceservice.py [--models PATH] [--host HOST] [--port PORT] [--window SECONDS] [--max-batch STARS]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Delta Scuti / Classical Cepheid P-L distance service')
+    parser.add_argument('--models', default=MODELFILE, help='model file written by pipeline.py --save-models')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--window', type=float, default=0, help=f'micro-batching window in seconds, e.g. {WINDOW} (default 0 - no batching)')
+    parser.add_argument('--max-batch', dest='maxbatch', type=int, default=MAXBATCH, help='most stars evaluated in one batch')
+    args = parser.parse_args()
+
+    server = makeserver(DistanceEstimator.load(args.models), args.host, args.port, args.window, args.maxbatch)
+    host, port = server.server_address[:2]
+    print(f'serving distances on http://{host}:{port}/distances')
+    server.serve_forever()
@@ -1,202 +1,52 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import colors
-import statistics
-from scipy import stats
-
-from dsmodeseparation import a,b,c,d,m,n,k,l,FirstOvertonelmcds,FirstOvertonesmcds,Fundamentallmcds,Fundamentalsmcds
-
-
-### Determining distances to the LMC and SMC using the generated relations/models ###
-
-## Fundamental Mode Distance determination ##
-
-def FundSMCdsDistance(I, P): # Using the P-L relationship generated by the Fundamental mode SMC Delta Scuti Variables, calculate distances to the LMC.
-    dm = ((np.float64(a) * np.float64(np.log10(P))) + np.float64(b))
-    var2 = ((I) - dm) / 5
-    dist = 10 * 10 ** var2
-    return dist
-
-def FundLMCdsDistance(I, P): # Using the P-L relationship generated by the Fundamental mode LMC Delta Scuti Variables, calculate distances to the SMC.
-    dm = ((np.float64(c) * np.float64(np.log10(P))) + np.float64(d))
-    var2 = ((I) - dm) / 5
-    dist = 10 * 10 ** var2
-    return dist
-
-#First Overtone Distance determination
-
-def FOSMCdsDistance(I, P): # Using the P-L relationship generated by the First Overtone SMC Delta Scuti Variables, calculate distances to the LMC.
-    dm = ((np.float64(m) * np.float64(np.log10(P))) + np.float64(n))
-    var2 = ((I) - dm) / 5
-    dist = 10 * 10 ** var2
-    return dist
-
-def FOLMCdsDistance(I, P): # Using the P-L relationship generated by the First Overtone LMC Delta Scuti Variables, calculate distances to the SMC.
-    dm = ((np.float64(k) * np.float64(np.log10(P))) + np.float64(l))
-    var2 = ((I) - dm) / 5
-    dist = 10 * 10 ** var2
-    return dist
-
-## Mean Distance determination and %Error ##
-
-# SMC Distance Error
-
-def SMCperror(dist):
-    print(dist)
-    print(np.abs((dist - 62440) / 62440)*100)
-
-# LMC Distance Error
-
-def LMCperror(dist):
-    print(dist)
-    print(np.abs((dist - 49590) / 49590)*100)
-
-
-### Distance Return ###
-
-# Distances derived from modelling data #
-
-# Fundamental Mode SMC Distances
-print("SMC Fund Dists")
-print(SMCperror(statistics.mean(FundLMCdsDistance(Fundamentalsmcds['I'], Fundamentalsmcds['P1']))))
-print(SMCperror(statistics.mean(FOSMCdsDistance(Fundamentalsmcds['I'], Fundamentalsmcds['P1']))))
-print(SMCperror(statistics.mean(FOLMCdsDistance(Fundamentalsmcds['I'], Fundamentalsmcds['P1']))))
-
-# Fundamental Mode LMC Distances
-print("LMC Fund Dists")
-print(LMCperror(statistics.mean(FundSMCdsDistance(Fundamentallmcds['I'], Fundamentallmcds['P1']))))
-print(LMCperror(statistics.mean(FOSMCdsDistance(Fundamentallmcds['I'], Fundamentallmcds['P1']))))
-print(LMCperror(statistics.mean(FOLMCdsDistance(Fundamentallmcds['I'], Fundamentallmcds['P1']))))
-
-# First Overtone SMC Distances
-print("SMC FO Dists")
-print(SMCperror(statistics.mean(FundSMCdsDistance(FirstOvertonesmcds['I'], FirstOvertonesmcds['P2']))))
-print(SMCperror(statistics.mean(FundLMCdsDistance(FirstOvertonesmcds['I'], FirstOvertonesmcds['P2']))))
-print(SMCperror(statistics.mean(FOLMCdsDistance(FirstOvertonesmcds['I'], FirstOvertonesmcds['P2']))))
- 
-# First Overtone LMC Distances
-print("LMC FO Dists")
-print(LMCperror(statistics.mean(FundSMCdsDistance(FirstOvertonelmcds['I'], FirstOvertonelmcds['P2']))))
-print(LMCperror(statistics.mean(FundLMCdsDistance(FirstOvertonelmcds['I'], FirstOvertonelmcds['P2']))))
-print(LMCperror(statistics.mean(FOSMCdsDistance(FirstOvertonelmcds['I'], FirstOvertonelmcds['P2']))))
-
-### Intragalactic Distances ###
-
-
-# Model Accuracy Function #
-def star_dist_accuracy(modeldist, truedist):
-    return np.abs(((truedist - modeldist)/truedist)*100)
-
-from intragen import Fundamentalblgds, FirstOvertoneblgds, Fundamentaldiskds, FirstOvertonediskds
-
-## Calculating the Model Distance for each dataframe - determining accuracy for each model ##
-
-###
-
-### Generating copies of the imported datasets ###
-
-FundamentalblgdsF = Fundamentalblgds.copy()
-FirstOvertoneblgdsF = FirstOvertoneblgds.copy()
-FundamentaldiskdsF = Fundamentaldiskds.copy()
-FirstOvertonediskdsF = FirstOvertonediskds.copy()
-
-# Fundamental Galactic Bulge Delta Scuti Dataframe #
-
-FundamentalblgdsF['SMCmodeldist'] = FundSMCdsDistance(FundamentalblgdsF['I'], FundamentalblgdsF['P1'])
-
-FundamentalblgdsF['LMCmodeldist'] = FundLMCdsDistance(FundamentalblgdsF['I'], FundamentalblgdsF['P1'])
-
-print('Fundamental BULGE SMC DS Accuracy %', statistics.median(star_dist_accuracy(FundamentalblgdsF['SMCmodeldist'], FundamentalblgdsF['Distance'])))
-print('Fundamental BULGE LMC DS Accuracy %', statistics.median(star_dist_accuracy(FundamentalblgdsF['LMCmodeldist'], FundamentalblgdsF['Distance'])))
-
-###
-
-# First Overtone Galactic Bulge Delta Scuti Dataframe #
-
-FirstOvertoneblgdsF['SMCmodeldist'] = FOSMCdsDistance(FirstOvertoneblgdsF['I'], FirstOvertoneblgdsF['P2'])
-
-FirstOvertoneblgdsF['LMCmodeldist'] = FOLMCdsDistance(FirstOvertoneblgdsF['I'], FirstOvertoneblgdsF['P2'])
-
-print('FirstOvertone BULGE SMC DS Accuracy %', statistics.median(star_dist_accuracy(FirstOvertoneblgdsF['SMCmodeldist'], FirstOvertoneblgdsF['Distance'])))
-print('FirstOvertone BULGE LMC DS Accuracy %', statistics.median(star_dist_accuracy(FirstOvertoneblgdsF['LMCmodeldist'], FirstOvertoneblgdsF['Distance'])))
-
-###
-
-# Fundamental Galactic Disk Delta Scuti Dataframe #
-
-FundamentaldiskdsF['SMCmodeldist'] = FundSMCdsDistance(FundamentaldiskdsF['I'], FundamentaldiskdsF['P1'])
-
-FundamentaldiskdsF['LMCmodeldist'] = FundLMCdsDistance(FundamentaldiskdsF['I'], FundamentaldiskdsF['P1'])
-
-print('Fundamental DISK SMC DS Accuracy %', statistics.median(star_dist_accuracy(FundamentaldiskdsF['SMCmodeldist'], FundamentaldiskdsF['Distance'])))
-print('Fundamental DISK LMC DS Accuracy %', statistics.median(star_dist_accuracy(FundamentaldiskdsF['LMCmodeldist'], FundamentaldiskdsF['Distance'])))
-
-###
-
-# First Overtone Galactic Disk Delta Scuti Dataframe #
-
-FirstOvertonediskdsF['SMCmodeldist'] = FundSMCdsDistance(FirstOvertonediskdsF['I'], FirstOvertonediskdsF['P1'])
-
-FirstOvertonediskdsF['LMCmodeldist'] = FundLMCdsDistance(FirstOvertonediskdsF['I'], FirstOvertonediskdsF['P1'])
-
-print('FirstOvertone DISK SMC DS Accuracy %', statistics.median(star_dist_accuracy(FirstOvertonediskdsF['SMCmodeldist'], FirstOvertonediskdsF['Distance'])))
-print('FirstOvertone DISK LMC DS Accuracy %', statistics.median(star_dist_accuracy(FirstOvertonediskdsF['LMCmodeldist'], FirstOvertonediskdsF['Distance'])))
-
-###
-
-# The resulting model and true distances will be exported to the Datavis file (Data visualiation file), Truedist vs Modeldist visualised.
-
-### Intergalactic Distances ###
-
-print('ds distances complete, sending dataframes to datavis')
-
-
-### Absolute Magnitude Calculations ###
-
-# Functions #
-
-def FundSMCM(P):
-    absm = (a * np.log10(P)) + b
-    return absm
-
-def FundLMCM(P):
-    absm = (c * np.log10(P)) + d
-    return absm
-
-def FOSMCM(P):
-    absm = (m * np.log10(P)) + n
-    return absm
-
-def FOLMCM(P):
-    absm = (k * np.log10(P)) + l
-    return absm
-
-# Magnitude Returns
-
-# Using SMC Fundamental #
-
-print(statistics.mean(FundSMCM(Fundamentallmcds['P1'])))
-print(statistics.mean(FundSMCM(FundamentalblgdsF['P1'])))
-print(statistics.mean(FundSMCM(FundamentaldiskdsF['P1'])))
-
-# Using SMC First Overtone #
-
-print(statistics.mean(FOSMCM(FirstOvertonelmcds['P1'])))
-print(statistics.mean(FOSMCM(FirstOvertoneblgdsF['P1'])))
-print(statistics.mean(FOSMCM(FirstOvertonediskdsF['P1'])))
-
-# Using LMC Fundamental #
-
-print(statistics.mean(FundLMCM(Fundamentalsmcds['P1'])))
-print(statistics.mean(FundLMCM(FundamentalblgdsF['P1'])))
-print(statistics.mean(FundLMCM(FundamentaldiskdsF['P1'])))
-
-# Using LMC First Overtone #
-
-print(statistics.mean(FOLMCM(FirstOvertonesmcds['P1'])))
-print(statistics.mean(FOLMCM(FirstOvertoneblgdsF['P1'])))
-print(statistics.mean(FOLMCM(FirstOvertonediskdsF['P1'])))
-
-
-
+from plkernel import extragalacticdistances, intragalacticdistances, updateintragalacticdistances, populationmagnitudes
+from plrelation import TOLERANCE
+from dsmodeseparation import PERIODS
+
+
+### Determining distances to the LMC and SMC using the generated relations/models ###
+
+# relations holds the P-L relations fitted by dsmodeseparation.fitrelations, {model name: PLFit} - each unpacks as (gradient, y intercept)
+# Every model distance / absolute magnitude comes from the plkernel functions: all four models are evaluated for every star
+# of a dataframe at once (rows are stars, columns are the models in MODELS order) with logP computed once per star. The
+# Delta Scuti specifics are the period columns of the modes (PERIODS) and of the bulge/disk populations (POPULATIONS).
+
+### Extragalactic Distances ###
+
+# Mean distance of the Cloud stars of each mode under the other models, and its %Error
+
+def extragalactic(relations, Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, magnitude='I'):
+    extragalacticdistances(relations, PERIODS, Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, magnitude)
+
+### Intragalactic Distances ###
+
+## Calculating the Model Distance for each dataframe - determining accuracy for each model ##
+
+# bulge/disk population: period column, models giving its SMC and LMC model distances
+
+POPULATIONS = {
+    'Fundamental BULGE': ('P1', 'FundSMC', 'FundLMC'),
+    'FirstOvertone BULGE': ('P2', 'FOSMC', 'FOLMC'),
+    'Fundamental DISK': ('P1', 'FundSMC', 'FundLMC'),
+    'FirstOvertone DISK': ('P1', 'FundSMC', 'FundLMC'),
+}
+
+# Takes the mode separated bulge/disk dataframes from intragen and returns copies with the SMC/LMC model distances added
+# magnitude is the apparent magnitude column the distances come from - 'I0' for extinction corrected dataframes (see extinction.py)
+
+def intragalactic(relations, Fundamentalblgds, FirstOvertoneblgds, Fundamentaldiskds, FirstOvertonediskds, magnitude='I'):
+    return intragalacticdistances('DS', POPULATIONS, relations, [Fundamentalblgds, FirstOvertoneblgds, Fundamentaldiskds, FirstOvertonediskds], magnitude)
+
+# After the relations were updated with new Magellanic stars (see dsmodeseparation.updaterelations): recomputes the model
+# distance columns of the already processed bulge/disk dataframes only for the models whose coefficients moved by more
+# than tolerance - returns the dataframes (the same objects where nothing changed) and the recomputed models
+
+def updateintragalactic(previous, relations, FundamentalblgdsF, FirstOvertoneblgdsF, FundamentaldiskdsF, FirstOvertonediskdsF, tolerance=TOLERANCE, magnitude='I'):
+    return updateintragalacticdistances(POPULATIONS, previous, relations, [FundamentalblgdsF, FirstOvertoneblgdsF, FundamentaldiskdsF, FirstOvertonediskdsF], tolerance, magnitude)
+
+
+### Absolute Magnitude Calculations ###
+
+# Magnitude Returns - mean absolute magnitude each model predicts for the other populations
+
+def absolutemagnitudes(relations, Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, FundamentalblgdsF, FirstOvertoneblgdsF, FundamentaldiskdsF, FirstOvertonediskdsF):
+    populationmagnitudes(relations, Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, FundamentalblgdsF, FirstOvertoneblgdsF, FundamentaldiskdsF, FirstOvertonediskdsF)
@@ -1,128 +1,123 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import colors
-import statistics
-from scipy import stats
-
-from dsdatasetgeneration import cleanlmcds, cleansmcds 
-
-### Distances to the LMC and SMC ### Used to Generate the P-L Relations
-
-DistSMC = 62440
-DistLMC = 49590
-
-### Creating new dataframes for the Fundamental Mode of Pulsation and the First Overtone of Pulsation ###
-
-#SMC Dataframes
-
-Fundamentalsmcds = cleansmcds.drop(cleansmcds[cleansmcds['P2'] != (-99.99)].index)
-
-FirstOvertonesmcds = cleansmcds.drop(cleansmcds[cleansmcds['mode'] == ('singlemode')].index)
-
-#LMC Dataframes
-
-Fundamentallmcds = cleanlmcds.drop(cleanlmcds[cleanlmcds['P2'] != (-99.99)].index)
-
-FirstOvertonelmcds = cleanlmcds.drop(cleanlmcds[cleanlmcds['mode'] == ('singlemode')].index)
-
-print(len(Fundamentalsmcds))
-print(len(FirstOvertonesmcds))
-
-print(len(Fundamentallmcds))
-print(len(FirstOvertonelmcds))
-
-### Generating P-L Relations, Absolute Magnitude (M) vs log Period (logP) ###
-
-# Functions required:
-
-#1. Function that returns the log10 of the Period of pulsation 
-
-def logperiod(P):
-    return np.log10(P)
-
-#2. Function that calculates the Absolute Magnitude given the assumed constant distance to the specific Magellanic cloud
-
-def Msmc(I):
-    return(I - 5*np.log10(DistSMC/10)) # For SMC
-
-def Mlmc(I):
-    return(I - 5*np.log10(DistLMC/10)) # For LMC
-
-## Generating P-L relation graphs and acquiring the coefficients of the relationships ##
-
-# Fundamental Mode P-L Relations
-
-#SMC P-L Relationship 
-y = ((Msmc(Fundamentalsmcds['I'])).tolist())
-x = ((logperiod(Fundamentalsmcds['P1'])).tolist())
-
-plt.scatter(x, y, marker=".")
-a, b = np.polyfit(x, y, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolute I-band Magnitude')
-LOBF = [i * a + b for i in x]
-plt.plot(x, LOBF, color = "red")
-plt.text(-1, -2, 'M = ' + format(a.round(3)) + 'logP ' + "+ " + format(b.round(3)))
-plt.title('Delta Scuti SMC Fundamental Mode: Absolute Magnitude vs logP')
-plt.ylim(-4, 4)
-plt.xlim(-1.6,-0.4)
-plt.show()
-
-
-
-#LMC P-L Relationship
-w = ((Mlmc(Fundamentallmcds['I'])).tolist())
-q = ((logperiod(Fundamentallmcds['P1'])).tolist())
-
-plt.scatter(q, w, marker=".")
-c, d = np.polyfit(q, w, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolue I-band Magnitude')
-LOBF = [i * c + d for i in q]
-plt.plot(q, LOBF, color = "red")
-plt.text(-0.8, -2, 'M = ' + format(c.round(3)) + 'logP ' + "+ " + format(d.round(3)))
-plt.title('Delta Scuti LMC Fundamental Mode: Absolute Magnitude vs logP')
-plt.ylim(-4, 4)
-plt.xlim(-1.6,-0.4)
-plt.show()
-
-
-
-# First Overtone P-L Relations
-
-#SMC P-L Relationship 
-y = ((Msmc(FirstOvertonesmcds['I'])).tolist())
-x = ((logperiod(FirstOvertonesmcds['P2'])).tolist())
-
-plt.scatter(x, y, marker=".")
-m, n = np.polyfit(x, y, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolute I-band Magnitude')
-LOBF = [i * m + n for i in x]
-plt.plot(x, LOBF, color = "red")
-plt.text(-0.9, -2, 'M = ' + format(m.round(3)) + 'logP ' + "+ " + format(n.round(3)))
-plt.title('Delta Scuti SMC First Overtone: Absolute Magnitude vs logP')
-plt.ylim(-4, 4)
-plt.xlim(-1.6,-0.4)
-plt.show()
-
-
-
-#LMC P-L Relationship
-w = ((Mlmc(FirstOvertonelmcds['I'])).tolist())
-q = ((logperiod(FirstOvertonelmcds['P2'])).tolist())
-
-plt.scatter(q, w, marker=".")
-k, l = np.polyfit(q, w, 1)
-plt.xlabel('Log10 of Period(days)')
-plt.ylabel('Absolute I-band Magnitude')
-LOBF = [i * k + l for i in q]
-plt.plot(q, LOBF, color = "red")
-plt.text(-0.9, -2, 'M = ' + format(k.round(3)) + 'logP ' + "+ " + format(l.round(3)))
-plt.title('Delta Scuti LMC First Overtone: Absolute Magnitude vs logP')
-plt.ylim(-4, 4)
-plt.xlim(-1.6,-0.4)
-plt.show()
-
-
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import colors
+from scipy import stats
+
+from plrelation import fitcloudrelations, updatecloudrelations, streamcloudrelations, bootstrapcloudrelations
+from bootstrap import RESAMPLES, LEVEL
+from catalogues import DSCOLUMNS, CHUNKSIZE
+from rendering import render, scatter
+
+### Distances to the LMC and SMC ### Used to Generate the P-L Relations
+
+DistSMC = 62440
+DistLMC = 49590
+
+### Creating new dataframes for the Fundamental Mode of Pulsation and the First Overtone of Pulsation ###
+
+# Fundamental mode stars have no second period, First Overtone stars are the multimode pulsators
+
+def separatemodes(cleands):
+
+    Fundamentalds = cleands.drop(cleands[cleands['P2'] != (-99.99)].index)
+
+    FirstOvertoneds = cleands.drop(cleands[cleands['mode'] == ('singlemode')].index)
+
+    return Fundamentalds, FirstOvertoneds
+
+def separate(cleansmcds, cleanlmcds):
+
+    #SMC Dataframes
+    Fundamentalsmcds, FirstOvertonesmcds = separatemodes(cleansmcds)
+
+    #LMC Dataframes
+    Fundamentallmcds, FirstOvertonelmcds = separatemodes(cleanlmcds)
+
+    print(len(Fundamentalsmcds))
+    print(len(FirstOvertonesmcds))
+
+    print(len(Fundamentallmcds))
+    print(len(FirstOvertonelmcds))
+
+    return Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds
+
+### Generating P-L Relations, Absolute Magnitude (M) vs log Period (logP) ###
+
+# Functions required:
+
+#1. Function that returns the log10 of the Period of pulsation
+
+def logperiod(P):
+    return np.log10(P)
+
+#2. Function that calculates the Absolute Magnitude given the assumed constant distance to the specific Magellanic cloud
+
+def Msmc(I):
+    return(I - 5*np.log10(DistSMC/10)) # For SMC
+
+def Mlmc(I):
+    return(I - 5*np.log10(DistLMC/10)) # For LMC
+
+# Period column of each mode (the first overtones are fitted against their second period P2), and the absolute magnitude
+# function and period column of each of the four relations (see plrelation.cloudsamples)
+
+PERIODS = {'Fund': 'P1', 'FO': 'P2'}
+MODES = {mode + galaxy: (absolute, period) for mode, period in PERIODS.items() for galaxy, absolute in [('SMC', Msmc), ('LMC', Mlmc)]}
+
+## Generating P-L relation graphs and acquiring the coefficients of the relationships ##
+
+# Draws the P-L relation graph of a fitted relation
+
+def plotrelation(M, P, relation, title, textpos, ylabel='Absolute I-band Magnitude'):
+    slope, intercept = relation
+    y = ((M).tolist())
+    x = ((logperiod(P)).tolist())
+
+    scatter(x, y, marker=".")
+    plt.xlabel('Log10 of Period(days)')
+    plt.ylabel(ylabel)
+    LOBF = [i * slope + intercept for i in x]
+    plt.plot(x, LOBF, color = "red")
+    plt.text(textpos[0], textpos[1], 'M = ' + format(slope.round(3)) + 'logP ' + "+ " + format(intercept.round(3)))
+    plt.title(title)
+    plt.ylim(-4, 4)
+    plt.xlim(-1.6,-0.4)
+
+# Returns the four P-L relations as {model name: PLFit} - each fit unpacks as (gradient, y intercept)
+# FundSMC = (a, b), FundLMC = (c, d), FOSMC = (m, n), FOLMC = (k, l)
+# M = slope * logP + intercept is fitted for all four at once (see plrelation.py)
+# magnitude is the apparent magnitude column fitted - 'I', or 'W' for the reddening-free Wesenheit relations (the stars
+# without a V magnitude are left out beforehand with catalogues.withmagnitude)
+# A list of bands (e.g. catalogues.BANDS) fits every band from the one pass over the periods and returns
+# {band: {model name: PLFit}} - the stars need all the bands (catalogues.withmagnitude)
+
+def fitrelations(Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, magnitude='I'):
+    return fitcloudrelations(MODES, [Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds], magnitude)
+
+# Merges newly released Magellanic stars (cleansed and mode separated like the originals, empty dataframes for the
+# groups without new stars) into the relations fitted by fitrelations - O(new stars), the original stars are not needed
+
+def updaterelations(relations, Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, magnitude='I'):
+    return updatecloudrelations(MODES, relations, [Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds], magnitude)
+
+# Streaming version of fitrelations for full size catalogues (see plrelation.streamcloudrelations), bounded by the chunk
+# size. halomode is 'offset' (the cut of dsdatasetgeneration) or 'none'. Returns the same {model name: PLFit} as fitrelations.
+
+def streamrelations(smcfile='smcdsdata.csv', lmcfile='lmcdsdata.csv', chunksize=CHUNKSIZE, offset=1.5, halomode='offset', magnitude='I'):
+    return streamcloudrelations(MODES, separatemodes, DSCOLUMNS, smcfile, lmcfile, chunksize, offset, halomode, magnitude)
+
+# Bootstrap confidence intervals of the four relations and of the distances they give (see plrelation.bootstrapcloudrelations)
+
+def bootstraprelations(Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, nresamples=RESAMPLES, seed=0, workers=None, level=LEVEL, magnitude='I'):
+    return bootstrapcloudrelations(MODES, [Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds], nresamples, seed, workers, level, magnitude)
+
+def plotrelations(Fundamentalsmcds, FirstOvertonesmcds, Fundamentallmcds, FirstOvertonelmcds, relations):
+
+    # Fundamental Mode P-L Relations
+    render(plotrelation, Msmc(Fundamentalsmcds['I']), Fundamentalsmcds['P1'], relations['FundSMC'], 'Delta Scuti SMC Fundamental Mode: Absolute Magnitude vs logP', (-1, -2))
+    render(plotrelation, Mlmc(Fundamentallmcds['I']), Fundamentallmcds['P1'], relations['FundLMC'], 'Delta Scuti LMC Fundamental Mode: Absolute Magnitude vs logP', (-0.8, -2), ylabel='Absolue I-band Magnitude')
+
+    # First Overtone P-L Relations
+    render(plotrelation, Msmc(FirstOvertonesmcds['I']), FirstOvertonesmcds['P2'], relations['FOSMC'], 'Delta Scuti SMC First Overtone: Absolute Magnitude vs logP', (-0.9, -2))
+    render(plotrelation, Mlmc(FirstOvertonelmcds['I']), FirstOvertonelmcds['P2'], relations['FOLMC'], 'Delta Scuti LMC First Overtone: Absolute Magnitude vs logP', (-0.9, -2))
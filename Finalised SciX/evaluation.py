@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from crossmatch import BOUND_COLUMNS
+from plkernel import MODELS, populationdistances
+
+### Distance-uncertainty-weighted accuracy of the model distances ###
+
+# The Bailer Jones distances the models are compared with are not equally good - the 16th - 84th percentile interval
+# (b_rgeo, B_rgeo) of a nearby disk star is a few per cent of its distance, that of a faint bulge star can be a third of
+# it. Every star is weighted by 1 / f² with f = (B_rgeo - b_rgeo) / (2 rgeo) its fractional distance uncertainty, and
+# every model x population pair is summarised from the signed errors e = (model - true) / true * 100 (%):
+#   - n / neff - stars, and the effective number of stars (sum w)² / sum w² of the weights,
+#   - bias - weighted mean of e,
+#   - scatter - weighted standard deviation of e about the bias,
+#   - mad - weighted median absolute deviation of e about its weighted median, scaled by 1.4826 to a gaussian sigma,
+#   - accuracy - weighted median of |e|, the weighted counterpart of the Model Accuracy % of plkernel.accuracytable.
+# Stars without bounds (extracts queried before they were kept) take the median weight of the others, so without any
+# bounds every star counts the same.
+# All the pairs are computed at once: the N x K errors are given a group per (population, model) (and per bin for the
+# accuracy curves), the sums are np.bincount over the groups and the weighted medians one lexsort of all the groups.
+
+MADSCALE = 1.4826
+BINS = 5
+
+# Weight of every star of a dataframe, normalised to a mean of 1
+
+def distanceweights(dataframe):
+    weights = np.ones(len(dataframe))
+    if not set(BOUND_COLUMNS).issubset(dataframe.columns) or len(dataframe) == 0:
+        return weights
+
+    lower, upper = (dataframe[column].to_numpy(dtype=np.float64) for column in BOUND_COLUMNS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fractional = (upper - lower) / (2 * dataframe['Distance'].to_numpy(dtype=np.float64))
+    known = np.isfinite(fractional) & (fractional > 0)
+    if known.any():
+        weights[known] = 1 / fractional[known]**2
+        weights[~known] = np.median(weights[known])
+    return weights / weights.mean()
+
+# Weighted q quantile of values within each of ngroups groups - the first value whose cumulative weight reaches q of its
+# group's total, or the mean of it and the next value where it reaches it exactly (so with equal weights the median is
+# that of np.median). NaN for empty groups.
+
+def groupedquantile(values, weights, groups, ngroups, q=0.5):
+    order = np.lexsort((values, groups))
+    values, weights, groups = values[order], weights[order], groups[order]
+    cumulative = np.cumsum(weights)
+    totals = np.bincount(groups, weights, minlength=ngroups)
+    last = np.cumsum(np.bincount(groups, minlength=ngroups)) - 1 # index of the last value of each group
+    target = np.cumsum(totals) - totals + q * totals # the weight of the groups sorted ahead of each group, plus q of its own
+    tolerance = 1e-9 * totals
+    lower = np.minimum(np.searchsorted(cumulative, target - tolerance, side='left'), last)
+    upper = np.minimum(np.searchsorted(cumulative, target + tolerance, side='left'), last)
+    quantiles = np.full(ngroups, np.nan)
+    filled = totals > 0
+    quantiles[filled] = (values[lower[filled]] + values[upper[filled]]) / 2
+    return quantiles
+
+# Metrics of signed errors e with weights w, in ngroups groups - {metric: length ngroups array}
+
+def groupmetrics(errors, weights, groups, ngroups):
+    valid = np.isfinite(errors) & (weights > 0)
+    errors, weights, groups = errors[valid], weights[valid], groups[valid]
+
+    n = np.bincount(groups, minlength=ngroups)
+    total = np.bincount(groups, weights, minlength=ngroups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        neff = total**2 / np.bincount(groups, weights**2, minlength=ngroups)
+        bias = np.bincount(groups, weights * errors, minlength=ngroups) / total
+        scatter = np.sqrt(np.bincount(groups, weights * (errors - bias[groups])**2, minlength=ngroups) / total)
+
+    median = groupedquantile(errors, weights, groups, ngroups)
+    mad = MADSCALE * groupedquantile(np.abs(errors - median[groups]), weights, groups, ngroups)
+    accuracy = groupedquantile(np.abs(errors), weights, groups, ngroups)
+    return {'n': n, 'neff': neff, 'bias': bias, 'scatter': scatter, 'mad': mad, 'accuracy': accuracy}
+
+# Signed errors (%) of the stacked model distances, the weights of the stars and their population, for the populations
+# and arguments of plkernel.populationdistances
+
+def stackederrors(populations, relations, names=MODELS, magnitude='I'):
+    modeldist, truedist, logP, labels = populationdistances(populations, relations, names, magnitude)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        errors = (modeldist - truedist[:, None]) / truedist[:, None] * 100
+    weights = np.concatenate([distanceweights(frame) for frame, period in populations.values()])
+    return errors, weights, logP, labels
+
+## Tables ##
+
+# Metrics of every model x population pair - one row per (population, model)
+
+def accuracymetrics(populations, relations, names=MODELS, magnitude='I'):
+    errors, weights, logP, labels = stackederrors(populations, relations, names, magnitude)
+    K = len(names)
+    groups = (labels[:, None] * K + np.arange(K)).ravel()
+    metrics = groupmetrics(errors.ravel(), np.repeat(weights, K), groups, len(populations) * K)
+    return pd.DataFrame(metrics, index=pd.MultiIndex.from_product([list(populations), names], names=['population', 'model']))
+
+# Accuracy curves - the metrics of every model x population pair in bins of
+#   - 'Distance' (the true distance), 'logP', or any magnitude column of the dataframes ('I', 'W' ...)
+# The bins hold equal numbers of stars of all the populations together, so every population is binned the same way.
+# Tied quantiles merge bins - with a single distinct value (or no finite one) there is one bin.
+# One row per (population, model, bin) with the bin edges in 'low' / 'high'.
+
+def accuracycurves(populations, relations, by='Distance', bins=BINS, names=MODELS, magnitude='I'):
+    errors, weights, logP, labels = stackederrors(populations, relations, names, magnitude)
+    if by == 'logP':
+        values = logP
+    else:
+        values = np.concatenate([frame[by].to_numpy(dtype=np.float64) for frame, period in populations.values()])
+
+    finite = np.isfinite(values)
+    edges = np.unique(np.quantile(values[finite], np.linspace(0, 1, bins + 1))) if finite.any() else np.array([np.nan])
+    if len(edges) < 2:
+        edges = np.repeat(edges, 2) # every star has the same value (or none) - a single bin
+    nbins = len(edges) - 1
+    binned = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, nbins - 1)
+    weights = np.where(finite, weights, 0)
+
+    K = len(names)
+    groups = ((labels[:, None] * K + np.arange(K)) * nbins + binned[:, None]).ravel()
+    metrics = groupmetrics(errors.ravel(), np.repeat(weights, K), groups, len(populations) * K * nbins)
+    index = pd.MultiIndex.from_product([list(populations), names, range(nbins)], names=['population', 'model', 'bin'])
+    curves = pd.DataFrame(metrics, index=index)
+    curves.insert(0, 'low', np.tile(edges[:-1], len(populations) * K))
+    curves.insert(1, 'high', np.tile(edges[1:], len(populations) * K))
+    return curves
@@ -0,0 +1,145 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from coordinates import radec
+from catalogues import isknown
+
+### Interstellar extinction of the bulge/disk stars from a gridded reddening map ###
+
+# The P-L relations are fitted in the Magellanic Clouds, where the I-band extinction is about 0.1 mag, but towards the
+# bulge it reaches several magnitudes, so the raw I magnitudes put the bulge/disk stars far too far away.
+# An extinction map is a regular Ra/Decl grid of A_I stored locally (extinctionmap.npz). Every star is looked up at once
+# with bilinear interpolation between the four surrounding grid points, and its extinction corrected magnitude
+# I0 = I - A_I is what the distance kernels are given (magnitude='I0', see plkernel.accuracytable).
+
+# A map can come from any gridded table of A_I (ExtinctionMap.fromtable), or be built from the colours of the OGLE stars
+# themselves: E(V-I) = (V-I) - (V-I)0 with the intrinsic colours taken from the LMC stars of the same class, the median
+# colour excess of every grid cell, and A_I = RI * E(V-I). Empty cells take the value of the nearest cell with stars.
+
+EXTINCTIONMAP = 'extinctionmap.npz'
+CELLSIZE = 0.5 # degrees
+RI = 1.217 # A_I / E(V-I) towards the bulge (Nataf et al. 2013)
+CLOUDREDDENING = {'SMC': 0.04, 'LMC': 0.09} # mean E(V-I) of the Clouds (Haschke et al. 2011)
+
+class ExtinctionMap:
+
+    # ra and decl are the increasing grid axes (degrees), AI the len(decl) x len(ra) grid of I-band extinction
+
+    def __init__(self, ra, decl, AI):
+        self.ra = np.asarray(ra, dtype=np.float64)
+        self.decl = np.asarray(decl, dtype=np.float64)
+        self.AI = np.asarray(AI, dtype=np.float64)
+        if self.AI.shape != (len(self.decl), len(self.ra)):
+            raise ValueError(f'extinction grid is {self.AI.shape}, expected {(len(self.decl), len(self.ra))}')
+
+    def save(self, path=EXTINCTIONMAP):
+        np.savez(path, ra=self.ra, decl=self.decl, AI=self.AI)
+
+    @classmethod
+    def load(cls, path=EXTINCTIONMAP):
+        with np.load(path) as grid:
+            return cls(grid['ra'], grid['decl'], grid['AI'])
+
+    # From a long table with one row per grid point (e.g. a published map exported to CSV)
+
+    @classmethod
+    def fromtable(cls, table, ra='Ra', decl='Decl', value='AI'):
+        grid = table.pivot(index=decl, columns=ra, values=value).sort_index().sort_index(axis=1)
+        return cls(grid.columns.to_numpy(), grid.index.to_numpy(), grid.to_numpy())
+
+    # A_I at every position - positions outside the grid take the value of the nearest edge
+
+    def lookup(self, ra, decl):
+        i, s = gridposition(self.ra, ra)
+        j, t = gridposition(self.decl, decl)
+        i1 = np.minimum(i + 1, len(self.ra) - 1)
+        j1 = np.minimum(j + 1, len(self.decl) - 1)
+        AI = self.AI
+        return (1 - t) * ((1 - s) * AI[j, i] + s * AI[j, i1]) + t * ((1 - s) * AI[j1, i] + s * AI[j1, i1])
+
+# Index of the grid point below every value and the fraction of the way to the next one (clamped to the grid)
+
+def gridposition(axis, values):
+    values = np.asarray(values, dtype=np.float64)
+    if len(axis) == 1:
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values))
+    i = np.clip(np.searchsorted(axis, values, side='right') - 1, 0, len(axis) - 2)
+    fraction = np.clip((values - axis[i]) / (axis[i + 1] - axis[i]), 0, 1)
+    return i, fraction
+
+## Building a map from the OGLE colours ##
+
+# Intrinsic V-I colour of a class of stars - the median colour of its Cloud stars less the mean reddening of that Cloud
+
+def intrinsiccolour(dataframe, reddening=CLOUDREDDENING['LMC']):
+    colour = np.asarray(dataframe['V-I'], dtype=np.float64)
+    return float(np.median(colour[isknown(colour)]) - reddening)
+
+# stars is a list of (dataframe, intrinsic V-I colour)
+
+def buildmap(stars, cellsize=CELLSIZE, ratio=RI):
+    ra, decl, excess = [], [], []
+    for dataframe, intrinsic in stars:
+        colour = np.asarray(dataframe['V-I'], dtype=np.float64)
+        known = isknown(colour)
+        starra, stardecl = radec(dataframe)
+        ra.append(starra[known])
+        decl.append(stardecl[known])
+        excess.append(colour[known] - intrinsic)
+    ra, decl, excess = np.concatenate(ra), np.concatenate(decl), np.concatenate(excess)
+    if len(ra) == 0:
+        raise ValueError('no stars with a V-I colour to build the extinction map from')
+
+    # grid cells covering the stars, at least two along each axis
+    origin = np.floor(np.array([ra.min(), decl.min()]) / cellsize) * cellsize
+    cells = np.floor((np.column_stack((ra, decl)) - origin) / cellsize).astype(np.int64)
+    shape = np.maximum(cells.max(axis=0) + 1, 2)
+
+    # median colour excess of every cell with stars
+    flat = cells[:, 1] * shape[0] + cells[:, 0]
+    medians = pd.Series(excess).groupby(flat).median()
+    grid = np.full(shape[1] * shape[0], np.nan)
+    grid[medians.index.to_numpy()] = medians.to_numpy()
+
+    # the empty cells take the value of the nearest cell with stars
+    filled = ~np.isnan(grid)
+    positions = np.column_stack(np.divmod(np.arange(len(grid)), shape[0]))
+    nearest = cKDTree(positions[filled]).query(positions[~filled])[1]
+    grid[~filled] = grid[filled][nearest]
+
+    AI = ratio * np.clip(grid, 0, None).reshape(shape[1], shape[0])
+    return ExtinctionMap(origin[0] + cellsize * (np.arange(shape[0]) + 0.5), origin[1] + cellsize * (np.arange(shape[1]) + 0.5), AI)
+
+# Map of the bulge/disk sky from the bulge/disk Delta Scuti and Cepheid catalogues, with the intrinsic colours of the
+# LMC Delta Scutis and Cepheids
+
+def galacticmap(rawlmcds, rawlmcceph, dsframes, cephframes, cellsize=CELLSIZE):
+    dscolour = intrinsiccolour(rawlmcds)
+    cephcolour = intrinsiccolour(rawlmcceph)
+    stars = [(frame, dscolour) for frame in dsframes] + [(frame, cephcolour) for frame in cephframes]
+    return buildmap(stars, cellsize)
+
+## Correction ##
+
+# Copy of a dataframe with its stars' extinction 'AI' and extinction corrected I magnitude 'I0'
+
+def deredden(dataframe, extinctionmap):
+    dataframe = dataframe.copy()
+    dataframe['AI'] = extinctionmap.lookup(*radec(dataframe))
+    dataframe['I0'] = np.asarray(dataframe['I'], dtype=np.float64) - dataframe['AI'].to_numpy()
+    return dataframe
+
+# Builds the map from the catalogues and stores it: python extinction.py [path]
+
+if __name__ == '__main__':
+    from catalogues import DSCOLUMNS, CEPHCOLUMNS, loadcatalogue
+    import intragen
+
+    rawblgds, rawdiskds, rawblgceph, rawdiskceph = intragen.loadgalactic()
+    extinctionmap = galacticmap(loadcatalogue('lmcdsdata.csv', DSCOLUMNS), loadcatalogue('lmccephdata.csv', CEPHCOLUMNS), [rawblgds, rawdiskds], [rawblgceph, rawdiskceph])
+    path = sys.argv[1] if len(sys.argv) > 1 else EXTINCTIONMAP
+    extinctionmap.save(path)
+    print('extinction map written', path, extinctionmap.AI.shape)
@@ -0,0 +1,433 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import dsdatasetgeneration
+import dsmodeseparation
+import dsdistances
+import cephdatasetgeneration
+import cephmodeseparation
+import cephdistances
+import intragen
+import bailerjonesqueryds
+import bailerjonesqueryceph
+import extinction
+import evaluation
+import rendering
+from catalogues import BANDS, withmagnitude
+from plrelation import coefficienttable
+from plkernel import MODELS, MODELFILE, accuracies, compilemodels, savemodels
+from dag import DAG, CACHEDIR
+from bootstrap import RESAMPLES
+from selection import HALOMODES, NSIGMA
+from crossmatch import RESOLUTIONS
+
+### SciX pipeline driver ###
+
+# Importing any of the analysis modules only defines functions - the stages are run explicitly from here:
+#   ds     - Magellanic Cloud Delta Scuti: loading, halo cleansing, mode separation, P-L relations, LMC/SMC distances
+#   ceph   - the same for the Magellanic Cloud Classical Cepheids
+#   query  - bulge/disk catalogues crossmatched with the Bailer Jones Catalogue and mode separated
+#   intra  - bulge/disk model distances and accuracies for both P-L relation sets
+#   plots  - model vs true distance graphs
+# Run with: python pipeline.py [--stages ds ceph ...] [--no-plots] [--no-cache] [--cachedir DIR] [--halo-offset MAG]
+#                               [--bootstrap RESAMPLES] [--workers N] [--halo-mode CATALOGUE=MODE ...] [--nsigma N]
+#                               [--extinction MAP] [--wesenheit] [--bands] [--save-plots DIR] [--plot-workers N]
+#                               [--plot-format FORMAT] [--match nearest|magnitude] [--metrics] [--metric-bins N]
+#                               [--save-models PATH]
+# --bootstrap adds confidence intervals of the P-L relations and of the LMC/SMC distances to the ds and ceph stages
+# --extinction corrects the bulge/disk magnitudes for extinction before the intra stage, with the map stored in MAP (an
+# .npz written by extinction.py) or, with MAP = stars, a map built from the colours of the stars in this run
+# --wesenheit also fits the reddening-free Wesenheit relations (W = I - 1.55 (V-I), see catalogues.py) and compares the
+# I-band and Wesenheit accuracies of every bulge/disk population
+# --bands fits the I and V relations together (catalogues.BANDS), prints their coefficients side by side and compares
+# the I-band accuracies with those of the band-combined distances
+# --save-plots writes every graph to DIR instead of showing it - the graphs are drawn headless (Agg) once the stages
+# have run, in a pool of --plot-workers processes (every core by default), see rendering.py
+# --match magnitude matches a star with several Bailer Jones sources in its cone to the one of consistent Gaia G
+# magnitude instead of the nearest (needs the Gaia G magnitudes of a local extract from bjindex.downloadextract -
+# without them the stars are matched by position, with a warning)
+# --metrics prints the accuracy of every model for every bulge/disk population weighted by the Bailer Jones distance
+# uncertainties - bias, scatter, MAD and median accuracy - and its curves in --metric-bins bins of true distance, period
+# and magnitude (see evaluation.py)
+# --save-models writes the fitted I band and Wesenheit relations to the model file PATH as immutable plkernel.PLModel
+# objects ('ds', 'ceph', 'dsW' and 'cephW' sets - plkernel.loadmodels reads them back without rerunning any fit)
+
+# Each stage is made of the nodes below (see dag.py). The data nodes are cached in .scixcache, so re-running the pipeline
+# only recomputes what an edit, a new input file or a new parameter actually affects.
+
+STAGES = ['ds', 'ceph', 'query', 'intra', 'plots']
+
+# halo / outlier rejection applied to each Magellanic catalogue (offset, sigmaclip or none - see selection.py)
+HALO = {
+    'smcds': 'offset',
+    'lmcds': 'offset',
+    'smcceph': 'none',
+    'lmcceph': 'none',
+}
+
+# nodes that have to be evaluated for a stage, and the ones added by --bootstrap
+TARGETS = {
+    'ds': ['dsreport'],
+    'ceph': ['cephreport'],
+    'query': ['galacticds', 'galacticceph'],
+    'intra': ['magnitudes'],
+    'plots': ['plots'],
+}
+BOOTSTRAPTARGETS = {
+    'ds': ['dsbootstrapreport'],
+    'ceph': ['cephbootstrapreport'],
+}
+
+WESENHEITTARGETS = {
+    'ds': ['dswesenheitreport'],
+    'ceph': ['cephwesenheitreport'],
+    'intra': ['wesenheitcomparison'],
+}
+
+BANDTARGETS = {
+    'ds': ['dsbandreport'],
+    'ceph': ['cephbandreport'],
+    'intra': ['bandcomparison'],
+}
+
+METRICTARGETS = {
+    'intra': ['dsmetrics', 'cephmetrics'],
+}
+
+## Delta Scuti nodes ##
+
+def dsraw():
+    return dsdatasetgeneration.loadmcds()
+
+def dsclean(raw, offset=1.5, smcmode='offset', lmcmode='offset', nsigma=NSIGMA):
+    return dsdatasetgeneration.cleanse(*raw, offset, smcmode, lmcmode, nsigma)
+
+# magnitude 'W' keeps the stars with a Wesenheit index for the Wesenheit relations, BANDS the stars with every band
+
+def dsmodes(clean, magnitude='I'):
+    return tuple(withmagnitude(frame, magnitude) for frame in dsmodeseparation.separate(*clean))
+
+def dsrelations(modes, magnitude='I'):
+    return dsmodeseparation.fitrelations(*modes, magnitude=magnitude)
+
+# graphs, summary statistics and LMC/SMC distances - always run
+
+def dsreport(raw, clean, modes, relations, plot=True, offset=1.5, smcmode='offset', lmcmode='offset'):
+    if plot:
+        dsdatasetgeneration.plotcleansing(*raw, *clean, offset, smcmode, lmcmode)
+    dsdatasetgeneration.summarise(*clean, plot)
+    if plot:
+        dsmodeseparation.plotrelations(*modes, relations)
+    dsdistances.extragalactic(relations, *modes)
+
+def dswesenheitreport(modes, relations):
+    print('DS Wesenheit relations - LMC/SMC distances')
+    dsdistances.extragalactic(relations, *modes, magnitude='W')
+
+def dsbandreport(relations):
+    print('DS P-L relations of every band')
+    print(coefficienttable(relations).to_string())
+
+def dsbootstrap(modes, resamples=RESAMPLES, seed=0, workers=None):
+    return dsmodeseparation.bootstraprelations(*modes, resamples, seed, workers)
+
+def dsbootstrapreport(summary):
+    print('DS P-L relation bootstrap 95% confidence intervals - LMC/SMC distances from the other Cloud relation')
+    print(summary)
+
+## Classical Cepheid nodes ##
+
+def cephraw():
+    return cephdatasetgeneration.loadmcceph()
+
+def cephclean(raw, smcmode='none', lmcmode='none', nsigma=NSIGMA):
+    return cephdatasetgeneration.cleanse(*raw, smcmode, lmcmode, nsigma)
+
+def cephmodes(clean, magnitude='I'):
+    return tuple(withmagnitude(frame, magnitude) for frame in cephmodeseparation.separate(*clean))
+
+def cephrelations(modes, magnitude='I'):
+    return cephmodeseparation.fitrelations(*modes, magnitude=magnitude)
+
+def cephreport(raw, clean, modes, relations, plot=True):
+    if plot:
+        cephdatasetgeneration.plotcleansing(*raw, *clean)
+    cephdatasetgeneration.summarise(*clean, plot)
+    if plot:
+        cephmodeseparation.plotrelations(*modes, relations)
+    cephdistances.extragalactic(relations, *modes)
+
+def cephwesenheitreport(modes, relations):
+    print('CEPH Wesenheit relations - LMC/SMC distances')
+    cephdistances.extragalactic(relations, *modes, magnitude='W')
+
+def cephbandreport(relations):
+    print('CEPH P-L relations of every band')
+    print(coefficienttable(relations).to_string())
+
+def cephbootstrap(modes, resamples=RESAMPLES, seed=0, workers=None):
+    return cephmodeseparation.bootstraprelations(*modes, resamples, seed, workers)
+
+def cephbootstrapreport(summary):
+    print('CEPH P-L relation bootstrap 95% confidence intervals - LMC/SMC distances from the other Cloud relation')
+    print(summary)
+
+## Bulge / disk nodes ##
+
+def galactic():
+    return intragen.loadgalactic()
+
+def galacticqueried(raw, resolution='nearest'):
+    raw1blgds, raw1diskds, raw1blgceph, raw1diskceph = raw
+
+    print('receiving dataframes')
+
+    cleanblgds, cleandiskds = bailerjonesqueryds.queryds(raw1blgds, raw1diskds, resolution)
+    cleanblgceph, cleandiskceph = bailerjonesqueryceph.queryceph(raw1blgceph, raw1diskceph, resolution)
+    return cleanblgds, cleandiskds, cleanblgceph, cleandiskceph
+
+# False when the query of any star failed even after the executor's retries (with backoff, see queryexecutor.py) - the
+# crossmatch is then not cached, and the next run queries the stars again rather than leaving them out for good
+
+def querycomplete(queried):
+    return not any(frame.attrs.get('failed', 0) for frame in queried)
+
+def galacticds(queried):
+    return intragen.separateds(*queried[:2])
+
+def galacticceph(queried):
+    return intragen.separateceph(*queried[2:])
+
+# extinction map, when the intra stage is extinction corrected
+
+def extinctionfile(path=extinction.EXTINCTIONMAP):
+    return extinction.ExtinctionMap.load(path)
+
+def extinctionstars(dsraw, cephraw, galactic):
+    rawblgds, rawdiskds, rawblgceph, rawdiskceph = galactic
+    return extinction.galacticmap(dsraw[1], cephraw[1], [rawblgds, rawdiskds], [rawblgceph, rawdiskceph])
+
+# bulge/disk frames the distances are computed from and the magnitude column they use - a list of bands (band-combined
+# distances) is passed on as it is, keeping the stars missing a band (see plkernel.combineddistances)
+
+def intraframes(galactic, extinctionmap=None, magnitude='I'):
+    if extinctionmap is not None:
+        return [extinction.deredden(frame, extinctionmap) for frame in galactic], 'I0'
+    if isinstance(magnitude, str):
+        galactic = [withmagnitude(frame, magnitude) for frame in galactic]
+    return galactic, magnitude
+
+def dsintra(relations, galactic, extinctionmap=None, magnitude='I'):
+    frames, magnitude = intraframes(galactic, extinctionmap, magnitude)
+    return dsdistances.intragalactic(relations, *frames, magnitude=magnitude)
+
+def cephintra(relations, galactic, extinctionmap=None, magnitude='I'):
+    frames, magnitude = intraframes(galactic, extinctionmap, magnitude)
+    return cephdistances.intragalactic(relations, *frames, magnitude=magnitude)
+
+# weighted accuracy metrics of every model for every population, and the weighted median accuracy of every model in
+# bins of true distance, logP and magnitude (one table per binning, the bin edges in low / high)
+
+def metricsreport(kind, populations, relations, galactic, extinctionmap=None, bins=evaluation.BINS):
+    frames, magnitude = intraframes(galactic, extinctionmap)
+    populations = {name: (frame, period) for (name, (period, smcmodel, lmcmodel)), frame in zip(populations.items(), frames)}
+
+    print(kind + ' Model Accuracy % weighted by the Bailer Jones distance uncertainties')
+    print(evaluation.accuracymetrics(populations, relations, magnitude=magnitude).to_string(float_format='%.3f'))
+    for by in ['Distance', 'logP', magnitude]:
+        curves = evaluation.accuracycurves(populations, relations, by, bins, magnitude=magnitude)
+        edges = curves.xs(MODELS[0], level='model')[['low', 'high']]
+        print(kind + ' weighted median Model Accuracy % by ' + by)
+        print(edges.join(curves['accuracy'].unstack('model')[MODELS]).to_string(float_format='%.3f'))
+
+def dsmetrics(relations, galactic, extinctionmap=None, bins=evaluation.BINS):
+    metricsreport('DS', dsdistances.POPULATIONS, relations, galactic, extinctionmap, bins)
+
+def cephmetrics(relations, galactic, extinctionmap=None, bins=evaluation.BINS):
+    metricsreport('CEPH', cephdistances.POPULATIONS, relations, galactic, extinctionmap, bins)
+
+# median Model Accuracy % of the SMC/LMC model distances of every population, side by side for several intra results
+# intras are the ds and cephs frames of each label in turn, e.g. dsintra, cephintra, dsintraW, cephintraW for I, W
+
+def accuracycomparison(*intras, labels=('I', 'W')):
+    table = {}
+    for kind, populations, offset in [('DS', dsdistances.POPULATIONS, 0), ('CEPH', cephdistances.POPULATIONS, 1)]:
+        for i, name in enumerate(populations):
+            row = {}
+            for label, frames in zip(labels, intras[offset::2]):
+                dataframe = frames[i]
+                accuracy = accuracies(dataframe[['SMCmodeldist', 'LMCmodeldist']].to_numpy(), dataframe['Distance'])
+                row['SMC ' + label], row['LMC ' + label] = np.median(accuracy, axis=0) if len(dataframe) else (np.nan, np.nan)
+            table[kind + ' ' + name] = row
+    print('Model Accuracy % (median) - ' + ' vs '.join(labels) + ' relations')
+    print(pd.DataFrame.from_dict(table, orient='index')[[galaxy + ' ' + label for galaxy in ('SMC', 'LMC') for label in labels]])
+
+# the fitted relations as compiled models in a model file - provenance is {set name: where its relations come from}
+
+def exportmodels(dsrelations, cephrelations, dsrelationsW, cephrelationsW, path=MODELFILE, provenance=None):
+    provenance = provenance or {}
+    relations = {'ds': (dsrelations, 'I'), 'ceph': (cephrelations, 'I'), 'dsW': (dsrelationsW, 'W'), 'cephW': (cephrelationsW, 'W')}
+    savemodels({name: compilemodels(fits, magnitude, provenance.get(name, '')) for name, (fits, magnitude) in relations.items()}, path)
+    print('P-L models written to', path)
+
+def magnitudes(dsrelations, dsmodes, dsframes, cephrelations, cephmodes, cephframes):
+    dsdistances.absolutemagnitudes(dsrelations, *dsmodes, *dsframes)
+    cephdistances.absolutemagnitudes(cephrelations, *cephmodes, *cephframes)
+
+def plots(dsframes, cephframes, plot=True):
+    if plot:
+        import Datavisualisation
+        Datavisualisation.plotmodelvstrue(dsframes, cephframes)
+
+# The whole pipeline as a DAG - offset is the Delta Scuti halo cut in magnitudes, extinction the extinction map file
+# ('stars' to build one from the star colours, None for no correction), resolution how a star with several Bailer Jones
+# sources in its cone is matched (crossmatch.RESOLUTIONS), bins the number of bins of the accuracy curves. The Wesenheit,
+# multi-band and metrics nodes are always defined, they are only evaluated when asked for (WESENHEITTARGETS, BANDTARGETS,
+# METRICTARGETS).
+
+def builddag(plot=True, offset=1.5, cachedir=CACHEDIR, usecache=True, resamples=RESAMPLES, workers=None, halo=HALO, nsigma=NSIGMA, extinction=None, resolution='nearest', bins=evaluation.BINS, modelfile=MODELFILE):
+    dag = DAG(cachedir, usecache)
+    dshalo = {'smcmode': halo['smcds'], 'lmcmode': halo['lmcds']}
+    cephhalo = {'smcmode': halo['smcceph'], 'lmcmode': halo['lmcceph']}
+
+    dag.add('dsraw', dsraw, files=['smcdsdata.csv', 'lmcdsdata.csv'])
+    dag.add('dsclean', dsclean, ['dsraw'], params={'offset': offset, **dshalo, 'nsigma': nsigma})
+    dag.add('dsmodes', dsmodes, ['dsclean'])
+    dag.add('dsrelations', dsrelations, ['dsmodes'])
+    dag.add('dsreport', dsreport, ['dsraw', 'dsclean', 'dsmodes', 'dsrelations'], params={'plot': plot, 'offset': offset, **dshalo}, cache=False)
+    dag.add('dsbootstrap', dsbootstrap, ['dsmodes'], params={'resamples': resamples}, options={'workers': workers})
+    dag.add('dsbootstrapreport', dsbootstrapreport, ['dsbootstrap'], cache=False)
+    dag.add('dsmodesW', dsmodes, ['dsclean'], params={'magnitude': 'W'})
+    dag.add('dsrelationsW', dsrelations, ['dsmodesW'], params={'magnitude': 'W'})
+    dag.add('dswesenheitreport', dswesenheitreport, ['dsmodesW', 'dsrelationsW'], cache=False)
+    dag.add('dsmodesbands', dsmodes, ['dsclean'], params={'magnitude': BANDS})
+    dag.add('dsrelationsbands', dsrelations, ['dsmodesbands'], params={'magnitude': BANDS})
+    dag.add('dsbandreport', dsbandreport, ['dsrelationsbands'], cache=False)
+
+    dag.add('cephraw', cephraw, files=['smccephdata.csv', 'lmccephdata.csv'])
+    dag.add('cephclean', cephclean, ['cephraw'], params={**cephhalo, 'nsigma': nsigma})
+    dag.add('cephmodes', cephmodes, ['cephclean'])
+    dag.add('cephrelations', cephrelations, ['cephmodes'])
+    dag.add('cephreport', cephreport, ['cephraw', 'cephclean', 'cephmodes', 'cephrelations'], params={'plot': plot}, cache=False)
+    dag.add('cephbootstrap', cephbootstrap, ['cephmodes'], params={'resamples': resamples}, options={'workers': workers})
+    dag.add('cephbootstrapreport', cephbootstrapreport, ['cephbootstrap'], cache=False)
+    dag.add('cephmodesW', cephmodes, ['cephclean'], params={'magnitude': 'W'})
+    dag.add('cephrelationsW', cephrelations, ['cephmodesW'], params={'magnitude': 'W'})
+    dag.add('cephwesenheitreport', cephwesenheitreport, ['cephmodesW', 'cephrelationsW'], cache=False)
+    dag.add('cephmodesbands', cephmodes, ['cephclean'], params={'magnitude': BANDS})
+    dag.add('cephrelationsbands', cephrelations, ['cephmodesbands'], params={'magnitude': BANDS})
+    dag.add('cephbandreport', cephbandreport, ['cephrelationsbands'], cache=False)
+
+    dag.add('galactic', galactic, files=['blgdsdatafinal.csv', 'diskdsdatafinal.csv', 'blgcephdatafinal.csv', 'diskcephdatafinal.csv'])
+    dag.add('galacticqueried', galacticqueried, ['galactic'], params={'resolution': resolution}, files=['bailerjonesextract.csv'],
+            complete=querycomplete)
+    dag.add('galacticds', galacticds, ['galacticqueried'])
+    dag.add('galacticceph', galacticceph, ['galacticqueried'])
+
+    extinctiondeps = []
+    if extinction == 'stars':
+        dag.add('extinctionmap', extinctionstars, ['dsraw', 'cephraw', 'galactic'])
+        extinctiondeps = ['extinctionmap']
+    elif extinction is not None:
+        dag.add('extinctionmap', extinctionfile, params={'path': extinction}, files=[extinction])
+        extinctiondeps = ['extinctionmap']
+
+    dag.add('dsintra', dsintra, ['dsrelations', 'galacticds'] + extinctiondeps)
+    dag.add('cephintra', cephintra, ['cephrelations', 'galacticceph'] + extinctiondeps)
+    # the Wesenheit index is reddening-free, so magnitude 'W' is never extinction corrected
+    dag.add('dsintraW', dsintra, ['dsrelationsW', 'galacticds'], params={'magnitude': 'W'})
+    dag.add('cephintraW', cephintra, ['cephrelationsW', 'galacticceph'], params={'magnitude': 'W'})
+    dag.add('wesenheitcomparison', accuracycomparison, ['dsintra', 'cephintra', 'dsintraW', 'cephintraW'], params={'labels': ['I', 'W']}, cache=False)
+    dag.add('dsintrabands', dsintra, ['dsrelationsbands', 'galacticds'], params={'magnitude': BANDS})
+    dag.add('cephintrabands', cephintra, ['cephrelationsbands', 'galacticceph'], params={'magnitude': BANDS})
+    dag.add('bandcomparison', accuracycomparison, ['dsintra', 'cephintra', 'dsintrabands', 'cephintrabands'], params={'labels': ['I', '+'.join(BANDS)]}, cache=False)
+    dag.add('dsmetrics', dsmetrics, ['dsrelations', 'galacticds'] + extinctiondeps, params={'bins': bins}, cache=False)
+    dag.add('cephmetrics', cephmetrics, ['cephrelations', 'galacticceph'] + extinctiondeps, params={'bins': bins}, cache=False)
+    provenance = {name: f'{kind}modeseparation.fitrelations of {files} ({magnitude} band, halo rejection {halos})'
+                  for kind, files, halos in [('ds', 'smcdsdata.csv, lmcdsdata.csv', f"SMC {halo['smcds']} / LMC {halo['lmcds']}, offset {offset}"),
+                                             ('ceph', 'smccephdata.csv, lmccephdata.csv', f"SMC {halo['smcceph']} / LMC {halo['lmcceph']}")]
+                  for name, magnitude in [(kind, 'I'), (kind + 'W', 'W')]}
+    dag.add('exportmodels', exportmodels, ['dsrelations', 'cephrelations', 'dsrelationsW', 'cephrelationsW'], params={'path': modelfile, 'provenance': provenance}, cache=False)
+    dag.add('magnitudes', magnitudes, ['dsrelations', 'dsmodes', 'dsintra', 'cephrelations', 'cephmodes', 'cephintra'], cache=False)
+    dag.add('plots', plots, ['dsintra', 'cephintra'], params={'plot': plot}, cache=False)
+    return dag
+
+# Runs the requested stages and returns their results by stage name
+
+# resamples = 0 leaves out the bootstrap, modelfile None the model file
+
+def run(stages=STAGES, plot=True, offset=1.5, cachedir=CACHEDIR, usecache=True, resamples=0, workers=None, halo=HALO, nsigma=NSIGMA, extinction=None, wesenheit=False, bands=False, plotdir=None, plotworkers=None, plotformat=rendering.FORMAT, resolution='nearest', metrics=False, bins=evaluation.BINS, modelfile=None):
+    if plotdir is not None:
+        rendering.configure(plotdir, plotworkers, plotformat)
+    dag = builddag(plot, offset, cachedir, usecache, resamples, workers, halo, nsigma, extinction, resolution, bins, modelfile or MODELFILE)
+    for stage in STAGES:
+        if stage in stages:
+            dag.run(TARGETS[stage])
+            if resamples:
+                dag.run(BOOTSTRAPTARGETS.get(stage, []))
+            if wesenheit:
+                dag.run(WESENHEITTARGETS.get(stage, []))
+            if bands:
+                dag.run(BANDTARGETS.get(stage, []))
+            if metrics:
+                dag.run(METRICTARGETS.get(stage, []))
+
+    if modelfile is not None:
+        dag.run(['exportmodels'])
+
+    if rendering.headless():
+        paths = rendering.flush()
+        print(len(paths), 'graphs written to', plotdir)
+
+    print('cached:', ', '.join(dag.hits) or 'none')
+    print('computed:', ', '.join(dag.computed) or 'none')
+    if dag.incomplete:
+        print('not cached (Bailer Jones queries failed):', ', '.join(dag.incomplete))
+
+    results = {}
+    if 'dsrelations' in dag.results:
+        results['ds'] = (dag.results['dsrelations'], dag.evaluate('dsmodes'))
+    if 'cephrelations' in dag.results:
+        results['ceph'] = (dag.results['cephrelations'], dag.evaluate('cephmodes'))
+    if 'galacticds' in dag.results:
+        results['query'] = (dag.results['galacticds'], dag.results['galacticceph'])
+    if 'dsintra' in dag.results:
+        results['intra'] = (dag.results['dsintra'], dag.results['cephintra'])
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Delta Scuti / Classical Cepheid P-L relation distance pipeline')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='stages to run (their prerequisites are added)')
+    parser.add_argument('--no-plots', dest='plot', action='store_false', help='skip every graph')
+    parser.add_argument('--no-cache', dest='usecache', action='store_false', help='recompute every node (the cache is still refreshed)')
+    parser.add_argument('--cachedir', default=CACHEDIR, help='directory of the cached stage outputs')
+    parser.add_argument('--halo-offset', dest='offset', type=float, default=1.5, help='Delta Scuti halo cut in magnitudes below the m vs logP fit')
+    parser.add_argument('--bootstrap', dest='resamples', type=int, default=0, metavar='RESAMPLES', help=f'bootstrap the P-L relations and LMC/SMC distances (e.g. {RESAMPLES} resamples)')
+    parser.add_argument('--workers', type=int, default=None, help='processes used by the bootstrap')
+    parser.add_argument('--halo-mode', dest='halo', nargs='+', default=[], metavar='CATALOGUE=MODE', help=f'halo rejection per catalogue, CATALOGUE one of {list(HALO)} and MODE one of {HALOMODES} (defaults: {HALO})')
+    parser.add_argument('--nsigma', type=float, default=NSIGMA, help='clipping threshold of the sigmaclip halo rejection')
+    parser.add_argument('--wesenheit', action='store_true', help='also fit the Wesenheit index relations and compare their accuracies with the I band ones')
+    parser.add_argument('--bands', action='store_true', help=f'also fit the {BANDS} relations together and compare the band-combined accuracies with the I band ones')
+    parser.add_argument('--save-plots', dest='plotdir', default=None, metavar='DIR', help='write the graphs to DIR (headless) instead of showing them')
+    parser.add_argument('--plot-workers', dest='plotworkers', type=int, default=None, help='processes drawing the saved graphs (default: every core)')
+    parser.add_argument('--plot-format', dest='plotformat', default=rendering.FORMAT, help='file format of the saved graphs, e.g. png, pdf or svg')
+    parser.add_argument('--match', dest='resolution', choices=RESOLUTIONS, default='nearest', help='how a star with several Bailer Jones sources in its cone is matched')
+    parser.add_argument('--metrics', action='store_true', help='print the distance-uncertainty-weighted accuracy metrics and accuracy curves of every model for every bulge/disk population')
+    parser.add_argument('--metric-bins', dest='bins', type=int, default=evaluation.BINS, help='bins of the accuracy curves')
+    parser.add_argument('--save-models', dest='modelfile', default=None, metavar='PATH', help='write the fitted relations to the model file PATH (see plkernel.savemodels)')
+    parser.add_argument('--extinction', default=None, metavar='MAP', help="extinction correct the bulge/disk stars with the map file MAP (see extinction.py), or 'stars' to build the map from the star colours")
+    args = parser.parse_args(argv)
+
+    halo = dict(HALO)
+    for choice in args.halo:
+        catalogue, _, mode = choice.partition('=')
+        if catalogue not in HALO or mode not in HALOMODES:
+            parser.error(f'--halo-mode expects CATALOGUE=MODE with CATALOGUE in {list(HALO)} and MODE in {HALOMODES}, got {choice!r}')
+        halo[catalogue] = mode
+
+    return run(args.stages, args.plot, args.offset, args.cachedir, args.usecache, args.resamples, args.workers, halo, args.nsigma, args.extinction, args.wesenheit, args.bands, args.plotdir, args.plotworkers, args.plotformat, args.resolution, args.metrics, args.bins, args.modelfile)
+
+if __name__ == '__main__':
+    main()
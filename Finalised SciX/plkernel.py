@@ -0,0 +1,320 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from catalogues import isknown
+from plrelation import MODELS, TOLERANCE, changedmodels
+
+### Vectorized P-L model evaluation ###
+
+# A stack of K P-L relations evaluated against N stars in one broadcast operation - the results are N x K arrays with
+# one row per star and one column per model. logP is computed once per star and shared by every model.
+
+# The four models of the analysis (plrelation.MODELS) are the columns, in that order
+
+# Slopes and zero points of the models as two length K arrays
+
+def modelstack(relations, names=MODELS):
+    coefficients = np.array([tuple(relations[name]) for name in names], dtype=np.float64).reshape(-1, 2)
+    return coefficients[:, 0], coefficients[:, 1]
+
+def logperiod(P):
+    return np.log10(np.asarray(P, dtype=np.float64))
+
+# Absolute magnitude M = slope * logP + zero point of every star under every model
+
+def modelmagnitudes(logP, slopes, zeropoints):
+    return np.multiply.outer(logP, slopes) + zeropoints
+
+# Distance (parsecs) of every star under every model, from the distance modulus I - M = 5log10(d) - 5
+
+def modeldistances(I, logP, slopes, zeropoints):
+    dm = modelmagnitudes(logP, slopes, zeropoints)
+    var2 = (np.asarray(I, dtype=np.float64)[:, None] - dm) / 5
+    return 10 * 10 ** var2
+
+# Band-combined distance of every star under every model: the distance moduli m - M of the bands are averaged with the
+# inverse variance (1 / scatter²) of each band's relation as weights. magnitudes is {band: apparent magnitudes} and
+# relations {band: {model name: PLFit}}, as fitted by a multi-band PLRelation. A band a star has no magnitude in (NaN
+# or the MISSING marker) is left out of its average, so stars without V still get their I-band distance.
+
+def combineddistances(magnitudes, logP, relations, names=MODELS):
+    total, weight = 0, 0
+    for band, fits in relations.items():
+        slopes, zeropoints = modelstack(fits, names)
+        scatter = np.array([fits[name].scatter for name in names], dtype=np.float64)
+        m = np.asarray(magnitudes[band], dtype=np.float64)
+        modulus = np.where(isknown(m), m, np.nan)[:, None] - modelmagnitudes(logP, slopes, zeropoints)
+        with np.errstate(divide='ignore'):
+            w = np.where(np.isfinite(modulus) & (scatter > 0), 1 / scatter**2, 0)
+        total = total + w * np.nan_to_num(modulus)
+        weight = weight + w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 10 * 10 ** (total / weight / 5)
+
+# Model Accuracy (%) of every model distance against the true distances
+
+def accuracies(modeldist, truedist):
+    truedist = np.asarray(truedist, dtype=np.float64)[:, None]
+    return np.abs(((truedist - modeldist) / truedist) * 100)
+
+# Model distances of several populations of stars stacked into one N x K array
+# populations is {label: (dataframe, period column)} and magnitude the apparent magnitude column ('I', or 'I0' once
+# extinction corrected - see extinction.py), or a list of bands for band-combined distances from {band: relations} - returns
+#   - the N x K model distances, the true distances and logP of the stars,
+#   - the population (index in the order given) of every star
+
+def populationdistances(populations, relations, names=MODELS, magnitude='I'):
+    frames = [frame for frame, period in populations.values()]
+    sizes = [len(frame) for frame in frames]
+
+    logP = np.concatenate([logperiod(frame[period]) for frame, period in populations.values()])
+    truedist = np.concatenate([frame['Distance'].to_numpy(dtype=np.float64) for frame in frames])
+    labels = np.repeat(np.arange(len(frames)), sizes)
+
+    if isinstance(magnitude, str):
+        I = np.concatenate([frame[magnitude].to_numpy(dtype=np.float64) for frame in frames])
+        modeldist = modeldistances(I, logP, *modelstack(relations, names))
+    else:
+        magnitudes = {band: np.concatenate([frame[band].to_numpy(dtype=np.float64) for frame in frames]) for band in magnitude}
+        modeldist = combineddistances(magnitudes, logP, relations, names)
+    return modeldist, truedist, logP, labels
+
+# Every model against several populations of stars with true distances in one call (arguments as populationdistances) - returns
+#   - the median accuracy (%) table, one row per population and one column per model,
+#   - the N x K model distances of each population, in the order given
+
+def accuracytable(populations, relations, names=MODELS, magnitude='I'):
+    modeldist, truedist, logP, labels = populationdistances(populations, relations, names, magnitude)
+    table = pd.DataFrame(accuracies(modeldist, truedist), columns=names).groupby(labels).median()
+    table = table.reindex(range(len(populations)))
+    table.index = list(populations)
+    return table, np.split(modeldist, np.cumsum(np.bincount(labels, minlength=len(populations)))[:-1])
+
+## Cloud and bulge/disk distances of a set of relations ##
+
+# One implementation for dsdistances and cephdistances, which only differ in their period columns and the kind ('DS' /
+# 'CEPH') their printouts are labelled with. relations is {model name: PLFit}, populations a {bulge/disk population:
+# (period column, SMC model, LMC model)} mapping in the order of the bulge/disk dataframes and periods the period columns
+# of the Magellanic modes ({'Fund': column, 'FO': column}).
+
+# SMC / LMC Distance Error
+
+def SMCperror(dist):
+    print(dist)
+    print(np.abs((dist - 62440) / 62440)*100)
+
+def LMCperror(dist):
+    print(dist)
+    print(np.abs((dist - 49590) / 49590)*100)
+
+# Mean distance of the Magellanic stars of each mode under the models of the other Cloud / mode, and its % error
+
+def extragalacticdistances(relations, periods, Fundamentalsmc, FirstOvertonesmc, Fundamentallmc, FirstOvertonelmc, magnitude='I'):
+    slopes, zeropoints = modelstack(relations)
+    fundamental, firstovertone = periods['Fund'], periods['FO']
+
+    # heading, dataframe, period column, %Error function, models applied (the galaxy's own relation is left out)
+    galaxies = [
+        ("SMC Fund Dists", Fundamentalsmc, fundamental, SMCperror, ['FundLMC', 'FOSMC', 'FOLMC']), # Fundamental Mode SMC Distances
+        ("LMC Fund Dists", Fundamentallmc, fundamental, LMCperror, ['FundSMC', 'FOSMC', 'FOLMC']), # Fundamental Mode LMC Distances
+        ("SMC FO Dists", FirstOvertonesmc, firstovertone, SMCperror, ['FundSMC', 'FundLMC', 'FOLMC']), # First Overtone SMC Distances
+        ("LMC FO Dists", FirstOvertonelmc, firstovertone, LMCperror, ['FundSMC', 'FundLMC', 'FOSMC']), # First Overtone LMC Distances
+    ]
+
+    for heading, dataframe, period, perror, models in galaxies:
+        print(heading)
+        meandist = modeldistances(dataframe[magnitude], logperiod(dataframe[period]), slopes, zeropoints).mean(axis=0)
+        for model in models:
+            print(perror(meandist[MODELS.index(model)]))
+
+# Copies of the bulge/disk dataframes with the SMC/LMC model distances added, and the median Model Accuracy % of every
+# model for every population. magnitude is the apparent magnitude column the distances come from - 'I0' for extinction
+# corrected dataframes (see extinction.py)
+
+def intragalacticdistances(kind, populations, relations, frames, magnitude='I'):
+    populations = {name: (dataframe,) + models for (name, models), dataframe in zip(populations.items(), frames)}
+
+    # every model against every population in one call - median Model Accuracy %
+    table, modeldists = accuracytable({name: (dataframe, period) for name, (dataframe, period, smcmodel, lmcmodel) in populations.items()}, relations, magnitude=magnitude)
+
+    ### Generating copies of the imported datasets with the model distances ###
+
+    results = []
+    for (name, (dataframe, period, smcmodel, lmcmodel)), modeldist in zip(populations.items(), modeldists):
+        frame = dataframe.copy()
+        frame['SMCmodeldist'] = modeldist[:, MODELS.index(smcmodel)]
+        frame['LMCmodeldist'] = modeldist[:, MODELS.index(lmcmodel)]
+
+        print(name + f' SMC {kind} Accuracy %', table.loc[name, smcmodel])
+        print(name + f' LMC {kind} Accuracy %', table.loc[name, lmcmodel])
+        results.append(frame)
+
+    print(f'{kind} Model Accuracy % (median) of every model for every population')
+    print(table)
+
+    # The resulting model and true distances will be exported to the Datavis file (Data visualiation file), Truedist vs Modeldist visualised.
+
+    print(f'{kind.lower()} distances complete, sending dataframes to datavis')
+
+    return tuple(results)
+
+# After the relations were updated with new Magellanic stars (see plrelation.updatecloudrelations): recomputes the model distance
+# columns of the already processed bulge/disk dataframes only for the models whose coefficients moved by more than
+# tolerance - returns the dataframes (the same objects where nothing changed) and the recomputed models
+
+def updateintragalacticdistances(populations, previous, relations, frames, tolerance=TOLERANCE, magnitude='I'):
+    changed = changedmodels(previous, relations, tolerance, MODELS)
+    frames = list(frames)
+    if not changed:
+        return tuple(frames), changed
+
+    slopes, zeropoints = modelstack(relations, changed)
+    for i, (period, smcmodel, lmcmodel) in enumerate(populations.values()):
+        stale = {column: model for column, model in [('SMCmodeldist', smcmodel), ('LMCmodeldist', lmcmodel)] if model in changed}
+        if stale:
+            frame = frames[i].copy()
+            modeldist = modeldistances(frame[magnitude], logperiod(frame[period]), slopes, zeropoints)
+            for column, model in stale.items():
+                frame[column] = modeldist[:, changed.index(model)]
+            frames[i] = frame
+
+    return tuple(frames), changed
+
+# Mean absolute magnitude each model predicts for the other populations (period column P1)
+
+def populationmagnitudes(relations, Fundamentalsmc, FirstOvertonesmc, Fundamentallmc, FirstOvertonelmc, FundamentalblgF, FirstOvertoneblgF, FundamentaldiskF, FirstOvertonediskF):
+    slopes, zeropoints = modelstack(relations)
+
+    predictions = [
+        ('FundSMC', [Fundamentallmc, FundamentalblgF, FundamentaldiskF]), # Using SMC Fundamental
+        ('FOSMC', [FirstOvertonelmc, FirstOvertoneblgF, FirstOvertonediskF]), # Using SMC First Overtone
+        ('FundLMC', [Fundamentalsmc, FundamentalblgF, FundamentaldiskF]), # Using LMC Fundamental
+        ('FOLMC', [FirstOvertonesmc, FirstOvertoneblgF, FirstOvertonediskF]), # Using LMC First Overtone
+    ]
+
+    for model, dataframes in predictions:
+        for dataframe in dataframes:
+            print(modelmagnitudes(logperiod(dataframe['P1']), slopes, zeropoints)[:, MODELS.index(model)].mean())
+
+## Compiled models ##
+
+# A fitted relation frozen into a small immutable object that needs nothing but its own coefficients - it can be saved,
+# loaded and shared between processes or served (see savemodels / loadmodels), and unpacks as (slope, zeropoint) and has
+# a scatter like PLFit, so a {name: PLModel} dict can be used wherever a {name: PLFit} relations dict is.
+#   magnitude  - the magnitude the relation was fitted to ('I', 'W', 'V' ...)
+#   provenance - where the relation comes from (fitting stage, catalogues, halo rejection ...)
+# absolutemagnitude and distance take single stars (Python / NumPy floats, evaluated with plain float arithmetic) or
+# arrays of stars (evaluated with NumPy), with the same formulas as modelmagnitudes / modeldistances.
+
+class PLModel:
+
+    __slots__ = ('name', 'magnitude', 'slope', 'zeropoint', 'covariance', 'scatter', 'n', 'provenance')
+
+    def __init__(self, name, slope, zeropoint, covariance=None, scatter=np.nan, n=0, magnitude='I', provenance=''):
+        covariance = np.full((2, 2), np.nan) if covariance is None else np.array(covariance, dtype=np.float64).reshape(2, 2)
+        covariance.flags.writeable = False
+        for attribute, value in [('name', str(name)), ('magnitude', str(magnitude)), ('slope', float(slope)), ('zeropoint', float(zeropoint)),
+                                 ('covariance', covariance), ('scatter', float(scatter)), ('n', int(n)), ('provenance', str(provenance))]:
+            object.__setattr__(self, attribute, value)
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError(f'PLModel {self.name!r} is immutable')
+
+    def __delattr__(self, attribute):
+        raise AttributeError(f'PLModel {self.name!r} is immutable')
+
+    def __iter__(self):
+        return iter((self.slope, self.zeropoint))
+
+    def __reduce__(self):
+        return (PLModel, (self.name, self.slope, self.zeropoint, self.covariance, self.scatter, self.n, self.magnitude, self.provenance))
+
+    # NaN coefficients, covariances and scatters (e.g. of a fit to 2 stars) compare equal, so a loaded model equals the saved one
+
+    def __eq__(self, other):
+        return (isinstance(other, PLModel) and (self.name, self.magnitude, self.n, self.provenance) == (other.name, other.magnitude, other.n, other.provenance)
+                and np.array_equal([self.slope, self.zeropoint, self.scatter], [other.slope, other.zeropoint, other.scatter], equal_nan=True)
+                and np.array_equal(self.covariance, other.covariance, equal_nan=True))
+
+    def __hash__(self):
+        return hash((self.name, self.magnitude, self.n, self.provenance))
+
+    @classmethod
+    def fromfit(cls, fit, magnitude='I', provenance=''):
+        return cls(fit.name, fit.slope, fit.zeropoint, fit.covariance, fit.scatter, fit.n, magnitude, provenance)
+
+    # M = slope * logP + zeropoint
+
+    def absolutemagnitude(self, logP):
+        if isinstance(logP, float):
+            return self.slope * logP + self.zeropoint
+        return self.slope * np.asarray(logP, dtype=np.float64) + self.zeropoint
+
+    # Distance (parsecs) from the apparent magnitude (of the model's band) and logP
+
+    def distance(self, magnitude, logP):
+        if isinstance(magnitude, float) and isinstance(logP, float):
+            return 10 * 10 ** ((magnitude - (self.slope * logP + self.zeropoint)) / 5)
+        return 10 * 10 ** ((np.asarray(magnitude, dtype=np.float64) - self.absolutemagnitude(logP)) / 5)
+
+    def todict(self):
+        return {'name': self.name, 'magnitude': self.magnitude, 'slope': self.slope, 'zeropoint': self.zeropoint,
+                'covariance': self.covariance.tolist(), 'scatter': self.scatter, 'n': self.n, 'provenance': self.provenance}
+
+    def __repr__(self):
+        return (f'PLModel({self.name!r}, {self.magnitude} = {self.slope:.4f} logP + {self.zeropoint:.4f}, '
+                f'scatter = {self.scatter:.4f}, n = {self.n})')
+
+# {name: PLModel} of a {name: PLFit} relations dict, or {band: {name: PLModel}} of multi-band relations
+
+def compilemodels(relations, magnitude='I', provenance=''):
+    if all(isinstance(fits, dict) for fits in relations.values()):
+        return {band: compilemodels(fits, band, provenance) for band, fits in relations.items()}
+    return {name: PLModel.fromfit(fit, magnitude, provenance) for name, fit in relations.items()}
+
+# Model files are a few kilobytes of JSON - {set name: [model, ...]}, e.g. {'ds': [...], 'ceph': [...]}, and
+# {set name: {band: [model, ...]}} for the multi-band sets of compilemodels - the floats are written with repr, so a
+# loaded model gives exactly the distances of the one saved. NaN (JSON has none) is written as null and read back as NaN.
+# MODELFORMAT is bumped whenever the layout changes.
+MODELFILE = 'plmodels.json'
+MODELFORMAT = 1
+
+# A model as a JSON record, null in place of NaN - and back
+
+def modelrecord(model):
+    record = model.todict()
+    for key in ['slope', 'zeropoint', 'scatter']:
+        if np.isnan(record[key]):
+            record[key] = None
+    record['covariance'] = np.where(np.isnan(model.covariance), None, model.covariance).tolist()
+    return record
+
+def recordmodel(record):
+    record = {key: np.nan if value is None else value for key, value in record.items()}
+    return PLModel(**record) # null covariance entries become NaN in the float array
+
+def savemodels(modelsets, path=MODELFILE):
+    models = {}
+    for setname, modelset in modelsets.items():
+        if all(isinstance(bandmodels, dict) for bandmodels in modelset.values()):
+            models[setname] = {band: [modelrecord(model) for model in bandmodels.values()] for band, bandmodels in modelset.items()}
+        else:
+            models[setname] = [modelrecord(model) for model in modelset.values()]
+    with open(path, 'w') as f:
+        json.dump({'format': MODELFORMAT, 'models': models}, f, allow_nan=False)
+    return path
+
+def loadmodels(path=MODELFILE):
+    with open(path) as f:
+        document = json.load(f)
+    if document.get('format') != MODELFORMAT:
+        raise ValueError(f'{path} is a model file of format {document.get("format")}, expected {MODELFORMAT}')
+    modelsets = {}
+    for setname, models in document['models'].items():
+        if isinstance(models, dict):
+            modelsets[setname] = {band: {record['name']: recordmodel(record) for record in records} for band, records in models.items()}
+        else:
+            modelsets[setname] = {record['name']: recordmodel(record) for record in models}
+    return modelsets
@@ -0,0 +1,330 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import RESAMPLES, LEVEL, bootstrap
+from catalogues import CHUNKSIZE, streamcatalogue, withmagnitude
+from selection import halocut
+
+### Batched Period-Luminosity relation fitting ###
+
+# Fits M = slope * logP + zeropoint by least squares for any number of groups of stars in one go - the four
+# (galaxy, mode) relations of the analysis, or any (population, mode, band) split, field, period bin or colour cut.
+# Every group is solved at once: the per-group sums are accumulated over all the stars with np.bincount and the 2x2
+# normal equations are solved in closed form for all the groups together.
+# Several bands (I, V, W ...) can be fitted in the same call: the normal matrix of a group only depends on the periods
+# (its centred form is W, mean logP and Σw·dx²), so it is built once per group and shared by every band - each extra
+# band only adds its Σw·dx·dy, Σw·dy² and mean magnitude.
+
+# Result of one group fit. Unpacks as (slope, zeropoint), like the (gradient, y intercept) tuples it replaces.
+#   covariance - 2x2 covariance matrix of (slope, zeropoint)
+#   scatter    - rms of the residuals about the relation (n - 2 degrees of freedom)
+#   n          - number of stars in the fit
+#   statistics - the PLStatistics of the stars (unweighted fits only), which update() merges new stars into
+
+# coefficient change below which a relation counts as unchanged (see changedmodels)
+TOLERANCE = 1e-6
+
+class PLFit:
+
+    def __init__(self, name, slope, zeropoint, covariance, scatter, n, statistics=None):
+        self.name = name
+        self.slope = slope
+        self.zeropoint = zeropoint
+        self.covariance = covariance
+        self.scatter = scatter
+        self.n = n
+        self.statistics = statistics
+
+    def __iter__(self):
+        return iter((self.slope, self.zeropoint))
+
+    # The relation refitted with new stars (absolute magnitudes, periods in days) appended, in O(new stars)
+
+    def update(self, magnitude, period):
+        if self.statistics is None:
+            raise ValueError(f'{self.name!r} was not fitted from PLStatistics and cannot be updated')
+        return self.statistics.merge(PLStatistics.fromstars(magnitude, period)).fit(self.name)
+
+    def __repr__(self):
+        return (f'PLFit({self.name!r}, M = {self.slope:.4f} logP + {self.zeropoint:.4f}, '
+                f'errors = ({np.sqrt(self.covariance[0, 0]):.4f}, {np.sqrt(self.covariance[1, 1]):.4f}), '
+                f'scatter = {self.scatter:.4f}, n = {self.n})')
+
+# Per-group sufficient statistics of straight line fits of y against x, for group labels 0..ngroups-1, in one pass:
+# number of stars, total weight, means of x and y and the centred sums Σw·dx², Σw·dx·dy, Σw·dy²
+# (centred, so there is no cancellation between large Σx² and (Σx)² terms)
+# y is one magnitude per star, or N x B for B bands - then ymean, Sxy and Syy are ngroups x B
+
+def groupstatistics(x, y, groups, ngroups, weights=None):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if weights is None:
+        weights = np.ones_like(x)
+
+    def groupsum(values):
+        if values.ndim == 1:
+            return np.bincount(groups, values, ngroups)
+        return np.stack([np.bincount(groups, column, ngroups) for column in values.T], axis=1)
+
+    n = np.bincount(groups, minlength=ngroups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        W = np.bincount(groups, weights, ngroups)
+        xmean = np.bincount(groups, weights * x, ngroups) / W
+        dx = x - xmean[groups]
+        Sxx = np.bincount(groups, weights * dx * dx, ngroups)
+
+        # the band terms - the weights and logP deviations broadcast over the bands
+        if y.ndim > 1:
+            weights, dx, W = weights[:, None], dx[:, None], W[:, None]
+        ymean = groupsum(weights * y) / W
+        dy = y - ymean[groups]
+        Sxy = groupsum(weights * dx * dy)
+        Syy = groupsum(weights * dy * dy)
+    return n, np.ravel(W), xmean, ymean, Sxx, Sxy, Syy
+
+# Slope, zeropoint, covariance (ngroups x 2 x 2) and scatter from the sufficient statistics
+# groups with fewer than 3 stars get NaN - their scatter and errors are undefined
+# with ngroups x B band statistics the results are ngroups x B (covariance ngroups x B x 2 x 2), the period terms of
+# every group being shared by its bands
+
+def solvelines(n, W, xmean, ymean, Sxx, Sxy, Syy):
+    n, W, xmean, ymean, Sxx, Sxy, Syy = (np.atleast_1d(np.asarray(value, dtype=np.float64)) for value in (n, W, xmean, ymean, Sxx, Sxy, Syy))
+    if ymean.ndim > n.ndim:
+        n, W, xmean, Sxx = (value[:, None] for value in (n, W, xmean, Sxx))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = Sxy / Sxx
+        zeropoint = ymean - slope * xmean
+
+        RSS = np.maximum(Syy - slope * Sxy, 0)
+        variance = np.where(n > 2, RSS / (n - 2) * n / W, np.nan)
+
+        covariance = np.empty(slope.shape + (2, 2))
+        covariance[..., 0, 0] = variance / Sxx
+        covariance[..., 0, 1] = covariance[..., 1, 0] = -xmean * variance / Sxx
+        covariance[..., 1, 1] = variance * (1 / W + xmean * xmean / Sxx)
+    return slope, zeropoint, covariance, np.sqrt(variance)
+
+# Slope, zero point, scatter and number of stars of every relation, one row per relation - with {band: relations} the
+# columns are (band, coefficient), so the bands can be compared side by side
+
+def coefficienttable(relations):
+    def rows(fits):
+        table = pd.DataFrame({name: {'slope': fit.slope, 'zeropoint': fit.zeropoint, 'scatter': fit.scatter, 'n': fit.n} for name, fit in fits.items()}).T
+        return table.astype({'n': np.int64})
+
+    if all(isinstance(fits, dict) for fits in relations.values()):
+        return pd.concat({band: rows(fits) for band, fits in relations.items()}, axis=1)
+    return rows(relations)
+
+# Names of the relations whose slope or zero point moved by more than tolerance between two {name: relation} dicts
+
+def changedmodels(previous, relations, tolerance=TOLERANCE, names=None):
+    names = list(relations) if names is None else names
+    return [name for name in names if np.any(np.abs(np.subtract(tuple(relations[name]), tuple(previous[name]))) > tolerance)]
+
+# Weighted straight line fits of y against x for every group label at once
+# returns arrays of slope, zeropoint, covariance, scatter and number of stars
+
+def fitlines(x, y, groups, ngroups, weights=None):
+    statistics = groupstatistics(x, y, groups, ngroups, weights)
+    return solvelines(*statistics) + (statistics[0],)
+
+## Streaming / incremental fits ##
+
+# Sufficient statistics of one (unweighted) P-L relation: stars can be added chunk by chunk and statistics of separate
+# chunks merged in O(1) with the pairwise update of Chan, Golub & LeVeque, so a fit over millions of stars never needs
+# more than one chunk in memory. The centred sums hold the same information as Σx, Σy, Σxy, Σx², Σy² (x = logP, y = M)
+# without their round off.
+
+class PLStatistics:
+
+    def __init__(self, n=0, xmean=0.0, ymean=0.0, Sxx=0.0, Sxy=0.0, Syy=0.0):
+        self.n = n
+        self.xmean = xmean
+        self.ymean = ymean
+        self.Sxx = Sxx
+        self.Sxy = Sxy
+        self.Syy = Syy
+
+    @classmethod
+    def fromstars(cls, magnitude, period):
+        logP = np.log10(np.asarray(period, dtype=np.float64))
+        n, W, xmean, ymean, Sxx, Sxy, Syy = groupstatistics(logP, magnitude, np.zeros(len(logP), dtype=np.intp), 1)
+        if n[0] == 0:
+            return cls()
+        return cls(int(n[0]), xmean[0], ymean[0], Sxx[0], Sxy[0], Syy[0])
+
+    # Statistics of the union of both sets of stars
+
+    def merge(self, other):
+        if other.n == 0:
+            return PLStatistics(self.n, self.xmean, self.ymean, self.Sxx, self.Sxy, self.Syy)
+        if self.n == 0:
+            return PLStatistics(other.n, other.xmean, other.ymean, other.Sxx, other.Sxy, other.Syy)
+
+        n = self.n + other.n
+        dx = other.xmean - self.xmean
+        dy = other.ymean - self.ymean
+        factor = self.n * other.n / n
+        return PLStatistics(n, self.xmean + dx * other.n / n, self.ymean + dy * other.n / n,
+                            self.Sxx + other.Sxx + dx * dx * factor,
+                            self.Sxy + other.Sxy + dx * dy * factor,
+                            self.Syy + other.Syy + dy * dy * factor)
+
+    # Adds a chunk of stars (absolute magnitudes, periods in days) in place
+
+    def update(self, magnitude, period):
+        merged = self.merge(PLStatistics.fromstars(magnitude, period))
+        self.__dict__.update(merged.__dict__)
+        return self
+
+    # Raw sums Σx, Σy, Σxy, Σx² of x = logP, y = M
+
+    def sums(self):
+        Sx = self.n * self.xmean
+        Sy = self.n * self.ymean
+        return Sx, Sy, self.Sxy + Sx * self.ymean, self.Sxx + Sx * self.xmean
+
+    def fit(self, name=None):
+        slope, zeropoint, covariance, scatter = solvelines(self.n, self.n, self.xmean, self.ymean, self.Sxx, self.Sxy, self.Syy)
+        return PLFit(name, slope[0], zeropoint[0], covariance[0], scatter[0], self.n, self)
+
+# bands names the magnitude columns of a multi-band relation (None for a single band): every group is then added with
+# an N x len(bands) array of magnitudes - stars with all the bands, see catalogues.withmagnitude - and fit() returns
+# {band: {name: PLFit}}, one relation set per band from a single pass over the periods
+
+class PLRelation:
+
+    def __init__(self, bands=None):
+        self.bands = None if bands is None else list(bands)
+        self.names = []
+        self.logperiods = []
+        self.magnitudes = []
+
+    # Adds a group of stars - name is any label, e.g. 'FundSMC' or ('SMC', 'Fundamental', 'I')
+
+    def add(self, name, magnitude, period):
+        if self.bands is not None and np.shape(magnitude)[1:] != (len(self.bands),):
+            raise ValueError(f'{name!r}: expected one magnitude per band {self.bands}, got shape {np.shape(magnitude)}')
+        self.names.append(name)
+        self.logperiods.append(np.log10(np.asarray(period, dtype=np.float64)))
+        self.magnitudes.append(np.asarray(magnitude, dtype=np.float64))
+        return self
+
+    # One group per distinct value of the by column(s) of a dataframe - a list of magnitude columns fits every band
+
+    @classmethod
+    def fromdataframe(cls, dataframe, by, magnitude='I', period='P1'):
+        grouped = dataframe.groupby(by, observed=True, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        order = np.argsort(codes, kind='stable')
+        bounds = np.cumsum(np.bincount(codes))[:-1]
+
+        relation = cls(None if isinstance(magnitude, str) else magnitude)
+        magnitudes = np.split(dataframe[magnitude].to_numpy()[order], bounds)
+        periods = np.split(dataframe[period].to_numpy()[order], bounds)
+        for name, M, P in zip(grouped.groups.keys(), magnitudes, periods):
+            relation.add(name, M, P)
+        return relation
+
+    # Fits every group at once - returns {name: PLFit} in the order the groups were added ({band: {name: PLFit}} for
+    # multi-band relations)
+    # unweighted fits keep the sufficient statistics of every group, so they can be updated with new stars later
+
+    def fit(self, weights=None):
+        sizes = [len(x) for x in self.logperiods]
+        groups = np.repeat(np.arange(len(self.names)), sizes)
+        x = np.concatenate(self.logperiods) if self.names else np.empty(0)
+        y = np.concatenate(self.magnitudes) if self.names else np.empty((0,) + ((len(self.bands),) if self.bands else ()))
+
+        n, W, xmean, ymean, Sxx, Sxy, Syy = groupstatistics(x, y, groups, len(self.names), weights)
+        slope, zeropoint, covariance, scatter = solvelines(n, W, xmean, ymean, Sxx, Sxy, Syy)
+
+        def fits(slope, zeropoint, covariance, scatter, ymean, Sxy, Syy):
+            fits = {}
+            for i, name in enumerate(self.names):
+                statistics = None
+                if weights is None:
+                    statistics = PLStatistics(int(n[i]), xmean[i], ymean[i], Sxx[i], Sxy[i], Syy[i]) if n[i] else PLStatistics()
+                fits[name] = PLFit(name, slope[i], zeropoint[i], covariance[i], scatter[i], int(n[i]), statistics)
+            return fits
+
+        if self.bands is None:
+            return fits(slope, zeropoint, covariance, scatter, ymean, Sxy, Syy)
+        return {band: fits(slope[:, j], zeropoint[:, j], covariance[:, j], scatter[:, j], ymean[:, j], Sxy[:, j], Syy[:, j]) for j, band in enumerate(self.bands)}
+
+## The four relations of the Magellanic modes ##
+
+# dsmodeseparation and cephmodeseparation fit the same four relations - the fundamental and first overtone stars of each
+# Cloud - and differ only in how a mode's stars are turned into absolute magnitudes and periods. modes is a catalogue's
+# {model name: (absolute magnitude function of its Cloud, period column of its mode)} and frames the mode separated
+# Magellanic dataframes in the order separate returns them (FRAMES).
+
+MODELS = ['FundSMC', 'FundLMC', 'FOSMC', 'FOLMC']
+FRAMES = ['FundSMC', 'FOSMC', 'FundLMC', 'FOLMC']
+
+# {model name: (absolute magnitudes, periods, dataframe)} of the stars of every relation, in the order of modes
+
+def cloudsamples(modes, frames, magnitude='I'):
+    frames = dict(zip(FRAMES, frames))
+    return {name: (absolute(frames[name][magnitude]), frames[name][period], frames[name]) for name, (absolute, period) in modes.items()}
+
+# Merges newly released Magellanic stars (cleansed and mode separated like the originals, empty dataframes for the
+# groups without new stars) into fitted relations - O(new stars), the original stars are not needed
+
+def updatecloudrelations(modes, relations, frames, magnitude='I'):
+    return {name: relations[name].update(M, P) for name, (M, P, frame) in cloudsamples(modes, frames, magnitude).items()}
+
+# Fits the four relations at once, returns {model name: PLFit} (or {band: {model name: PLFit}} for a list of bands)
+
+def fitcloudrelations(modes, frames, magnitude='I'):
+    relation = PLRelation(None if isinstance(magnitude, str) else magnitude)
+    for name, (M, P, frame) in cloudsamples(modes, frames, magnitude).items():
+        relation.add(name, M, P)
+    return relation.fit()
+
+# The other Cloud's stars of the same mode - the ones a relation gives the distance to
+
+def othercloud(name):
+    return name[:-3] + ('LMC' if name.endswith('SMC') else 'SMC')
+
+# Bootstrap confidence intervals of the four relations and of the distance each one gives to the other Cloud
+# returns the bootstrap summaries of the models stacked into one table: (model, slope / zeropoint / distance) x (low, median, high, std)
+
+def bootstrapcloudrelations(modes, frames, nresamples=RESAMPLES, seed=0, workers=None, level=LEVEL, magnitude='I'):
+    samples = cloudsamples(modes, frames, magnitude)
+    summaries = {}
+    for name, (M, P, frame) in samples.items():
+        target, period = samples[othercloud(name)][2], modes[othercloud(name)][1]
+        result = bootstrap(M, P, (target[magnitude], target[period]), nresamples, seed, workers)
+        summaries[name] = result.summary(level)
+    return pd.concat(summaries)
+
+# Streaming version of loading -> halo cut -> mode separation -> fitcloudrelations for full size catalogues: only the
+# sufficient statistics of the fits are kept, so memory is bounded by the chunk size. With halomode 'offset' each
+# catalogue is read twice - the halo cut needs the m vs logP relation of the whole thresholded catalogue first; 'none'
+# reads it once. Sigma clipping needs the stars themselves.
+
+def streamcloudrelations(modes, separatemodes, columns, smcfile, lmcfile, chunksize=CHUNKSIZE, offset=1.5, halomode='offset', magnitude='I'):
+    if halomode not in ('offset', 'none'):
+        raise ValueError(f'streamrelations supports the offset and none halo modes, not {halomode!r}')
+
+    statistics = {name: PLStatistics() for name in modes}
+    for filename, galaxy in [(smcfile, 'SMC'), (lmcfile, 'LMC')]:
+
+        # 1st pass - apparent magnitude vs logP relation for the halo cut
+        if halomode == 'offset':
+            apparent = PLStatistics()
+            for chunk in streamcatalogue(filename, columns, chunksize):
+                apparent.update(chunk['I'], chunk['P1'])
+            slope, intercept = apparent.fit()
+
+        # 2nd pass - halo cut, mode separation and the P-L statistics of each mode
+        for chunk in streamcatalogue(filename, columns, chunksize):
+            if halomode == 'offset':
+                chunk = halocut(chunk, slope, intercept, offset)
+            for mode, stars in zip(['Fund', 'FO'], separatemodes(withmagnitude(chunk, magnitude))):
+                absolute, period = modes[mode + galaxy]
+                statistics[mode + galaxy].update(absolute(stars[magnitude]), stars[period])
+
+    return {name: statistic.fit(name) for name, statistic in statistics.items()}
@@ -0,0 +1,150 @@
+import json
+import sqlite3
+import threading
+import time
+import pandas as pd
+import numpy as np
+
+from crossmatch import CANDIDATE_COLUMNS, CATALOGUE
+
+### Persistent on-disk cache of Vizier crossmatch results ###
+
+# Every cone search answer is stored in a SQLite file, keyed on the catalogue id, the search radius and the target
+# position rounded to a fixed number of decimals. Re-running the pipeline then only sends positions that have never been
+# queried (or whose entry has expired) to Vizier, so adding stars to a catalogue only costs the new stars.
+# "No match" answers are cached too (as an empty candidate list) - failed queries are never cached.
+
+CACHEFILE = 'bailerjonescache.sqlite'
+PRECISION = 6 # decimals of Ra/Decl kept in the key, 1e-6 deg = 0.0036 arcsec
+TTL = 180 * 24 * 3600 # seconds before an entry is considered stale (None keeps entries forever)
+MAXENTRIES = 2000000 # least recently used entries beyond this are evicted (None for no limit)
+
+class QueryCache:
+
+    def __init__(self, path=CACHEFILE, precision=PRECISION, ttl=TTL, maxentries=MAXENTRIES):
+        self.path = path
+        self.precision = precision
+        self.ttl = ttl
+        self.maxentries = maxentries
+        self.hits = 0
+        self.misses = 0
+
+        # the connection is shared by the crossmatch worker threads, every access goes through the lock
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS queries ('
+            'catalog TEXT, radius REAL, rakey INTEGER, declkey INTEGER, payload TEXT, created REAL, accessed REAL, '
+            'PRIMARY KEY (catalog, radius, rakey, declkey))'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS accessed ON queries (accessed)')
+        self.connection.commit()
+
+    # Integer keys of the rounded positions
+
+    def keys(self, ra, decl):
+        scale = 10 ** self.precision
+        rakey = np.rint(np.asarray(ra, dtype=np.float64) * scale).astype(np.int64)
+        declkey = np.rint(np.asarray(decl, dtype=np.float64) * scale).astype(np.int64)
+        return rakey, declkey
+
+    # Looks up a block of positions at once - returns {position in block: list of candidate records}
+
+    def lookup(self, catalog, radius, ra, decl):
+        rakey, declkey = self.keys(ra, decl)
+        now = time.time()
+        oldest = -np.inf if self.ttl is None else now - self.ttl
+
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS lookup (pos INTEGER, rakey INTEGER, declkey INTEGER)')
+            cursor.execute('DELETE FROM lookup')
+            cursor.executemany('INSERT INTO lookup VALUES (?, ?, ?)', zip(range(len(rakey)), rakey.tolist(), declkey.tolist()))
+            rows = cursor.execute(
+                'SELECT lookup.pos, queries.payload, queries.rakey, queries.declkey FROM lookup JOIN queries '
+                'ON queries.rakey = lookup.rakey AND queries.declkey = lookup.declkey '
+                'WHERE queries.catalog = ? AND queries.radius = ? AND queries.created >= ?',
+                (catalog, float(radius), oldest)
+            ).fetchall()
+
+            found = {pos: json.loads(payload) for pos, payload, _, _ in rows}
+            cursor.executemany(
+                'UPDATE queries SET accessed = ? WHERE catalog = ? AND radius = ? AND rakey = ? AND declkey = ?',
+                [(now, catalog, float(radius), r, d) for _, _, r, d in rows]
+            )
+            self.connection.commit()
+
+            self.hits += len(found)
+            self.misses += len(rakey) - len(found)
+        return found
+
+    # Stores the candidate records of a block of positions (an empty list records "no match")
+
+    def store(self, catalog, radius, ra, decl, payloads):
+        rakey, declkey = self.keys(ra, decl)
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(catalog, float(radius), r, d, json.dumps(p), now, now) for r, d, p in zip(rakey.tolist(), declkey.tolist(), payloads)]
+            )
+            self.connection.commit()
+            self.evict()
+
+    # Removes expired entries, then the least recently accessed ones beyond maxentries
+
+    def evict(self):
+        with self.lock:
+            if self.ttl is not None:
+                self.connection.execute('DELETE FROM queries WHERE created < ?', (time.time() - self.ttl,))
+            if self.maxentries is not None:
+                self.connection.execute(
+                    'DELETE FROM queries WHERE rowid IN (SELECT rowid FROM queries ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                    (self.maxentries,)
+                )
+            self.connection.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM queries').fetchone()[0]
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self)}
+
+    def close(self):
+        self.connection.close()
+
+## Cached backend - wraps any crossmatch backend, only the cache misses are passed on to it ##
+
+class CachedBackend:
+
+    def __init__(self, backend, cache, catalog=None):
+        self.backend = backend
+        self.cache = cache
+        self.catalog = catalog if catalog is not None else getattr(backend, 'catalog', CATALOGUE)
+
+    def query(self, ra, decl, radius):
+        ra = np.asarray(ra, dtype=np.float64)
+        decl = np.asarray(decl, dtype=np.float64)
+
+        found = self.cache.lookup(self.catalog, radius, ra, decl)
+        missing = np.setdiff1d(np.arange(len(ra)), np.fromiter(found.keys(), dtype=np.int64, count=len(found)))
+        print('Bailer Jones cache hits', len(found), 'misses', len(missing))
+
+        records = [dict(record, _q=pos) for pos, payload in found.items() for record in payload]
+        blocks = [pd.DataFrame.from_records(records)] if len(records) > 0 else []
+
+        if len(missing) > 0:
+            fresh = self.backend.query(ra[missing], decl[missing], radius).copy()
+            fresh['_q'] = missing[fresh['_q'].to_numpy(dtype=np.int64)]
+
+            # one payload per queried position, empty for the positions without a match
+            fields = [i for i in fresh.columns if i != '_q']
+            grouped = {pos: group[fields].to_dict('records') for pos, group in fresh.groupby('_q')}
+            payloads = [grouped.get(pos, []) for pos in missing.tolist()]
+            self.cache.store(self.catalog, radius, ra[missing], decl[missing], payloads)
+            blocks.append(fresh)
+
+        if len(blocks) == 0:
+            return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+        return pd.concat(blocks, ignore_index=True)
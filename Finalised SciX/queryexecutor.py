@@ -0,0 +1,74 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+### Concurrent execution of crossmatch queries ###
+
+# Blocks of targets are sent to the backend from a bounded thread pool. A token bucket shared by all the threads keeps
+# the request rate to Vizier under control, and a failing block is retried with exponential backoff. A block that still
+# fails after every retry is reported as failed (instead of "no match") so its stars can be queried again later.
+
+WORKERS = 4 # parallel requests
+RATE = 2.0 # requests per second across all the workers (None for no limit)
+BURST = 4 # requests allowed back to back before the rate limit applies
+RETRIES = 3 # extra attempts for a failing block
+BACKOFF = 2.0 # seconds before the first retry, doubled on every further retry
+MAXBACKOFF = 60.0
+
+# Token bucket rate limiter - acquire() blocks until a request is allowed
+
+class TokenBucket:
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class QueryExecutor:
+
+    def __init__(self, workers=WORKERS, rate=RATE, burst=BURST, retries=RETRIES, backoff=BACKOFF, maxbackoff=MAXBACKOFF):
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst) if rate is not None else None
+        self.retries = retries
+        self.backoff = backoff
+        self.maxbackoff = maxbackoff
+
+    # Queries one block, retrying on any exception - returns None once every attempt has failed
+
+    def attempt(self, backend, ra, decl, radius):
+        for attempt in range(self.retries + 1):
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                return backend.query(ra, decl, radius)
+            except Exception as e:
+                print(f"Error querying block of {len(ra)} stars (attempt {attempt + 1} of {self.retries + 1}): {e}")
+                if attempt < self.retries:
+                    delay = min(self.maxbackoff, self.backoff * 2**attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.0)) # jitter keeps the workers from retrying in lockstep
+        return None
+
+    # Runs every (ra, decl) block through the backend - results come back in the order of the blocks
+
+    def run(self, backend, blocks, radius):
+        if self.workers <= 1:
+            return [self.attempt(backend, ra, decl, radius) for ra, decl in blocks]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.attempt, backend, ra, decl, radius) for ra, decl in blocks]
+            return [future.result() for future in futures]
@@ -0,0 +1,79 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+
+### Rendering the graphs of a run ###
+
+# Every graph of the analysis is drawn by a plot function (dsdatasetgeneration.plotapparent, dsmodeseparation.plotrelation,
+# Datavisualisation.modelvstrue ...) that is called through render():
+#   - interactive (the default) - the graph is drawn and shown with plt.show() straight away, as the analysis always did
+#   - headless (configure(outdir)) - the call is only queued; flush() then draws every queued graph with the Agg backend
+#     in a process pool and writes it to outdir, so a run never waits on a window and the plotting wall time scales
+#     with the number of processes
+# Scatter layers of more than DENSE points are rasterized (scatter()), which keeps vector output (pdf / svg) small and
+# quick to write - the axes, lines and text stay vector.
+
+DENSE = 2000
+FORMAT = 'png'
+DPI = 150
+
+settings = {'outdir': None, 'workers': None, 'format': FORMAT, 'rendered': 0}
+queue = []
+
+# outdir None goes back to interactive mode, workers None uses every core, format is any matplotlib file format
+
+def configure(outdir=None, workers=None, format=FORMAT):
+    settings.update(outdir=outdir, workers=workers, format=format)
+    if outdir is not None:
+        os.makedirs(outdir, exist_ok=True)
+        plt.switch_backend('Agg')
+
+def headless():
+    return settings['outdir'] is not None
+
+def scatter(x, y, **kwargs):
+    kwargs.setdefault('rasterized', len(x) > DENSE)
+    return plt.scatter(x, y, **kwargs)
+
+def render(plot, *args, **kwargs):
+    if headless():
+        queue.append((plot, args, kwargs))
+    else:
+        plot(*args, **kwargs)
+        plt.show()
+
+# File name of a graph - its position in the run and its title
+
+def figurename(index, title, format=FORMAT):
+    slug = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-') or 'figure'
+    return f'{index:02d}-{slug}.{format}'
+
+# Draws and writes one queued graph - runs in the pool processes
+
+def renderfigure(job):
+    index, plot, args, kwargs, outdir, format = job
+    plt.switch_backend('Agg')
+    figure = plt.figure()
+    plot(*args, **kwargs)
+    path = os.path.join(outdir, figurename(index, plt.gca().get_title(), format))
+    figure.savefig(path, dpi=DPI)
+    plt.close(figure)
+    return path
+
+# Renders every queued graph - returns the paths written, in the order the graphs were queued
+
+def flush():
+    if not queue:
+        return []
+    start = settings['rendered']
+    jobs = [(start + i, plot, args, kwargs, settings['outdir'], settings['format']) for i, (plot, args, kwargs) in enumerate(queue)]
+    queue.clear()
+    settings['rendered'] += len(jobs)
+
+    workers = min(settings['workers'] or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(renderfigure, jobs))
+    return [renderfigure(job) for job in jobs]
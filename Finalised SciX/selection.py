@@ -0,0 +1,91 @@
+import numpy as np
+
+### Vectorized star selection ###
+
+## Milkyway Halo star rejection ##
+
+# A star is kept when its apparent magnitude is fainter than the line of best fit magnitude (m = slope * logP + intercept)
+# minus the offset, i.e. it is not more than offset magnitudes brighter than the P-L relation of the cloud.
+# Works on any survey table - the magnitude and period columns can be chosen.
+
+def halomask(dataframe, slope, intercept, offset=1.5, magnitude='I', period='P1'):
+    mag = dataframe[magnitude].to_numpy(dtype=np.float64)
+    logp = np.log10(dataframe[period].to_numpy(dtype=np.float64))
+    return mag > logp * slope + intercept - offset
+
+# Returns the stars that pass the halo cut as a compact copy with a fresh index (as the old row by row cleansing did)
+
+def halocut(dataframe, slope, intercept, offset=1.5, magnitude='I', period='P1'):
+    mask = halomask(dataframe, slope, intercept, offset, magnitude, period)
+    return dataframe[mask].reset_index(drop=True)
+
+## Robust halo / outlier rejection ##
+
+# Iterative sigma clipping: fit m = slope * logP + intercept to the kept stars, measure the scatter about the line
+# robustly (1.4826 x median absolute deviation of the kept residuals, which the halo stars barely move), keep every star
+# within nsigma of the line and refit - until the kept stars stop changing, usually after a few passes.
+# Every pass is one fit and one comparison over the whole table. Clipping stops with the current stars when the scatter
+# is 0 (more than half of them on the line, or only 2 stars) or when fewer than MINSTARS would be left for the fit.
+
+NSIGMA = 3.0
+MAXITER = 10
+MINSTARS = 3
+
+# Returns slope, intercept, the mask of kept stars, the number of passes and whether the kept stars stopped changing
+# (or sit on the line) - when the passes run out or too few stars would be left, it is False. The returned line is
+# always the fit of the returned stars: after the last allowed pass it is refitted on the final mask.
+
+def sigmaclipfit(logp, mag, nsigma=NSIGMA, maxiter=MAXITER):
+    keep = np.ones(len(mag), dtype=bool)
+    converged = False
+    for iteration in range(1, maxiter + 1):
+        slope, intercept = np.polyfit(logp[keep], mag[keep], 1)
+        residuals = mag - (logp * slope + intercept)
+        sigma = 1.4826 * np.median(np.abs(residuals[keep] - np.median(residuals[keep])))
+        if sigma == 0:
+            converged = True
+            break
+        clipped = np.abs(residuals) <= nsigma * sigma
+        if clipped.sum() < MINSTARS:
+            break
+        if (clipped == keep).all():
+            converged = True
+            break
+        keep = clipped
+    else:
+        slope, intercept = np.polyfit(logp[keep], mag[keep], 1)
+    return slope, intercept, keep, iteration, converged
+
+# Rejection modes, selectable per catalogue:
+#   offset    - the original cut: stars more than offset magnitudes brighter than an unclipped fit are removed
+#   sigmaclip - iterative sigma clipping about the P-L relation (both sides)
+#   none      - every star is kept
+HALOMODES = ['offset', 'sigmaclip', 'none']
+
+# Returns the kept stars and a report {mode, slope, intercept, iterations, converged, rejected}
+
+def rejecthalo(dataframe, mode='offset', offset=1.5, nsigma=NSIGMA, maxiter=MAXITER, magnitude='I', period='P1'):
+    if mode not in HALOMODES:
+        raise ValueError(f'unknown halo rejection mode {mode!r}, expected one of {HALOMODES}')
+
+    mag = dataframe[magnitude].to_numpy(dtype=np.float64)
+    logp = np.log10(dataframe[period].to_numpy(dtype=np.float64))
+
+    if mode == 'offset':
+        slope, intercept = np.polyfit(logp, mag, 1)
+        clean = halocut(dataframe, slope, intercept, offset, magnitude, period)
+        iterations, converged = 1, True
+    elif mode == 'sigmaclip':
+        slope, intercept, keep, iterations, converged = sigmaclipfit(logp, mag, nsigma, maxiter)
+        clean = dataframe[keep].reset_index(drop=True)
+    else:
+        slope, intercept = np.polyfit(logp, mag, 1)
+        clean = dataframe.copy()
+        iterations, converged = 0, True
+
+    report = {'mode': mode, 'slope': slope, 'intercept': intercept, 'iterations': iterations, 'converged': converged, 'rejected': len(dataframe) - len(clean)}
+    return clean, report
+
+def describe(report):
+    converged = '' if report['converged'] else ' (not converged)'
+    return f"{report['mode']}, {report['iterations']} iteration(s){converged}, {report['rejected']} stars rejected, m = {report['slope']:.3f}logP + {report['intercept']:.3f}"
@@ -0,0 +1,109 @@
+import numpy as np
+from matplotlib.path import Path
+from scipy.spatial import cKDTree
+
+from coordinates import radec
+
+### Sky index over the positions of a catalogue ###
+
+# Built once per catalogue from its Ra/Decl, then asked which stars lie in a region - an OGLE field, the cell of an
+# extinction map, the cone around a Bailer Jones source - without scanning the whole dataframe. Every query returns row
+# indices (positions, for dataframe.iloc) in increasing order.
+#   - cone and crossmatch pairs: a KD-tree on unit vectors of the positions, searched with the chord length of the radius
+#   - box (Ra/Decl limits): the declinations are kept sorted, so only the stars of the declination band are looked at
+#   - polygon: the stars of the cone around the polygon, tested against the polygon in the gnomonic projection about its
+#     centre - great circles project to straight lines, so the sides are exact
+
+# Unit vectors on the celestial sphere for positions in degrees
+
+def radectoxyz(ra, decl):
+    ra = np.radians(np.asarray(ra, dtype=np.float64))
+    decl = np.radians(np.asarray(decl, dtype=np.float64))
+    return np.column_stack((np.cos(decl) * np.cos(ra), np.cos(decl) * np.sin(ra), np.sin(decl)))
+
+def xyztoradec(xyz):
+    xyz = np.asarray(xyz, dtype=np.float64)
+    ra = np.degrees(np.arctan2(xyz[..., 1], xyz[..., 0])) % 360
+    decl = np.degrees(np.arcsin(np.clip(xyz[..., 2] / np.linalg.norm(xyz, axis=-1), -1, 1)))
+    return ra, decl
+
+# Straight line (chord) length between two unit vectors separated by an angle in degrees - the KD-tree search radius
+
+def chordlength(radius):
+    return 2 * np.sin(np.radians(radius) / 2)
+
+class SkyIndex:
+
+    def __init__(self, ra, decl):
+        self.ra = np.asarray(ra, dtype=np.float64)
+        self.decl = np.asarray(decl, dtype=np.float64)
+        self.tree = cKDTree(radectoxyz(self.ra, self.decl))
+        self.order = np.argsort(self.decl, kind='stable')
+        self.sorteddecl = self.decl[self.order]
+
+    @classmethod
+    def fromdataframe(cls, dataframe):
+        return cls(*radec(dataframe))
+
+    def __len__(self):
+        return len(self.ra)
+
+    # Stars within radius degrees of a position
+
+    def cone(self, ra, decl, radius):
+        rows = self.tree.query_ball_point(radectoxyz(ra, decl)[0], chordlength(radius))
+        return np.sort(np.asarray(rows, dtype=np.int64))
+
+    # Stars within radius degrees of each of many positions - one array of rows per position
+
+    def cones(self, ra, decl, radius):
+        rows = self.tree.query_ball_point(radectoxyz(ra, decl), chordlength(radius), return_sorted=True)
+        return [np.asarray(i, dtype=np.int64) for i in rows]
+
+    # Every (target, row) pair closer than radius degrees, for arrays of target positions - the crossmatch primitive
+
+    def pairs(self, ra, decl, radius):
+        targets = cKDTree(radectoxyz(ra, decl))
+        pairs = targets.sparse_distance_matrix(self.tree, chordlength(radius), output_type='ndarray')
+        return pairs['i'].astype(np.int64), pairs['j'].astype(np.int64)
+
+    # Stars with ramin <= Ra <= ramax and declmin <= Decl <= declmax - ramin > ramax is a box across Ra = 0
+
+    def box(self, ramin, ramax, declmin, declmax):
+        start = np.searchsorted(self.sorteddecl, declmin, side='left')
+        stop = np.searchsorted(self.sorteddecl, declmax, side='right')
+        rows = self.order[start:stop]
+        ra = self.ra[rows]
+        if ramin <= ramax:
+            inside = (ra >= ramin) & (ra <= ramax)
+        else:
+            inside = (ra >= ramin) | (ra <= ramax)
+        return np.sort(rows[inside])
+
+    # Stars inside the spherical polygon with the given vertices (in order, either direction, at most a hemisphere across)
+
+    def polygon(self, ra, decl):
+        vertices = radectoxyz(ra, decl)
+        centre = vertices.sum(axis=0)
+        centre /= np.linalg.norm(centre)
+        radius = np.degrees(np.arccos(np.clip((vertices @ centre).min(), -1, 1)))
+        if radius >= 90:
+            raise ValueError('polygon does not fit in a hemisphere')
+
+        # every point of the polygon lies in the cone through its vertices (the tiny margin keeps the vertices themselves)
+        rows = self.cone(*xyztoradec(centre), radius * (1 + 1e-9))
+        if len(rows) == 0:
+            return rows
+
+        # tangent plane axes at the centre of the polygon
+        east = np.cross([0.0, 0.0, 1.0], centre)
+        if np.linalg.norm(east) < 1e-12: # polygon centred on a pole
+            east = np.array([1.0, 0.0, 0.0])
+        east /= np.linalg.norm(east)
+        north = np.cross(centre, east)
+
+        def gnomonic(xyz):
+            return np.column_stack((xyz @ east, xyz @ north)) / (xyz @ centre)[:, None]
+
+        stars = radectoxyz(self.ra[rows], self.decl[rows])
+        return rows[Path(gnomonic(vertices)).contains_points(gnomonic(stars))]
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from catalogues import CATEGORICAL, DSCOLUMNS, FLOAT32, loadcatalogue, magthreshold, readcsv, streamcatalogue
+from coordinates import FIRSTHOUR, radec
+
+### Catalogue loading and streaming ###
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# A new export with truncated right ascensions, under a name coordinates.FIRSTHOUR knows nothing about
+
+def newcatalogue(tmp_path, lines=500):
+    path = tmp_path / 'newsmcdsdata.csv'
+    with open(os.path.join(HERE, 'smcdsdata.csv')) as source, open(path, 'w') as f:
+        f.writelines(source.readlines()[:lines])
+    return str(path)
+
+def test_streams_catalogue_not_in_firsthour(tmp_path):
+    path = newcatalogue(tmp_path)
+    assert os.path.basename(path) not in FIRSTHOUR
+
+    streamed = pd.concat(streamcatalogue(path, DSCOLUMNS, chunksize=100), ignore_index=True)
+    loaded = magthreshold(readcsv(path, DSCOLUMNS)).reset_index(drop=True)
+    assert len(streamed) == len(loaded) > 0
+    assert np.array_equal(streamed['I'].to_numpy(), loaded['I'].to_numpy(dtype=np.float32))
+    assert np.array_equal(streamed['P1'].to_numpy(), loaded['P1'].to_numpy())
+
+def test_unknown_hours_are_nan(tmp_path, capsys):
+    ra, decl = radec(readcsv(newcatalogue(tmp_path), DSCOLUMNS))
+    assert np.isnan(ra).all()
+    assert np.isfinite(decl).all()
+    assert 'Warning' in capsys.readouterr().out
+
+def test_known_hours_are_recovered(tmp_path):
+    shutil.copy(os.path.join(HERE, 'TESTINGSET.csv'), tmp_path / 'TESTINGSET.csv')
+    shutil.copy(os.path.join(HERE, 'TESTINGSET2.csv'), tmp_path / 'TESTINGSET2.csv')
+    truncated = readcsv(str(tmp_path / 'TESTINGSET.csv'), DSCOLUMNS)
+    decimal = readcsv(str(tmp_path / 'TESTINGSET2.csv'), DSCOLUMNS).set_index('ID').loc[truncated['ID']]
+    assert np.allclose(radec(truncated)[0], decimal['Ra'].to_numpy(dtype=np.float64), rtol=0, atol=1 / 3600)
+
+# Streamed chunks hold the same dtypes and values as the columnar copy, and the streamed relations are those of the
+# catalogues loaded whole
+
+def test_chunks_match_columnar_copy(tmp_path):
+    path = newcatalogue(tmp_path, lines=2000)
+    loaded = magthreshold(loadcatalogue(path, DSCOLUMNS)).reset_index(drop=True)
+    chunks = list(streamcatalogue(path, DSCOLUMNS, chunksize=300))
+    for chunk in chunks:
+        assert all(isinstance(chunk[column].dtype, pd.CategoricalDtype) for column in CATEGORICAL)
+        assert all(chunk[column].dtype == np.float32 for column in FLOAT32)
+
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert list(streamed.columns) == list(loaded.columns)
+    for column in loaded.columns:
+        assert np.array_equal(streamed[column].to_numpy(dtype=str), loaded[column].to_numpy(dtype=str)), column
+
+def test_streamed_relations_match_fit(tmp_path):
+    from dsmodeseparation import fitrelations, separatemodes, streamrelations
+
+    smcfile = newcatalogue(tmp_path, lines=3000)
+    lmcfile = str(tmp_path / 'newlmcdsdata.csv')
+    with open(os.path.join(HERE, 'lmcdsdata.csv')) as source, open(lmcfile, 'w') as f:
+        f.writelines(source.readlines()[:3000])
+
+    frames = [magthreshold(loadcatalogue(filename, DSCOLUMNS)) for filename in (smcfile, lmcfile)]
+    (Fundamentalsmc, FirstOvertonesmc), (Fundamentallmc, FirstOvertonelmc) = (separatemodes(frame) for frame in frames)
+    fitted = fitrelations(Fundamentalsmc, FirstOvertonesmc, Fundamentallmc, FirstOvertonelmc)
+    streamed = streamrelations(smcfile, lmcfile, chunksize=400, halomode='none')
+    for name, relation in fitted.items():
+        assert streamed[name].n == relation.n
+        assert np.allclose(tuple(streamed[name]), tuple(relation), rtol=1e-9, atol=1e-9)
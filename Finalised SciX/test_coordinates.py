@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import pytest
+
+import coordinates
+from catalogues import CATALOGUES, loadcatalogue
+from coordinates import checkhours, radec, verifiedhours
+
+### Coordinates with recovered right ascension hours ###
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def path(filename):
+    return os.path.join(HERE, filename)
+
+def test_testingset_hours_are_verified():
+    assert verifiedhours(path('TESTINGSET.csv'))
+    ra, decl = radec(loadcatalogue(path('TESTINGSET.csv'), CATALOGUES['TESTINGSET.csv'], columnar=False))
+    assert np.isfinite(ra).all()
+
+def test_wrong_hour_fails_verification(monkeypatch):
+    monkeypatch.setitem(coordinates.FIRSTHOUR, 'TESTINGSET.csv', 16)
+    assert checkhours(path('TESTINGSET.csv')) > 14
+    assert not verifiedhours(path('TESTINGSET.csv'))
+
+def test_unverified_hours_are_refused():
+    assert not verifiedhours(path('lmcdsdata.csv'))
+    dataframe = loadcatalogue(path('lmcdsdata.csv'), CATALOGUES['lmcdsdata.csv'], columnar=False)
+    with pytest.raises(ValueError, match='not verified'):
+        radec(dataframe)
+    ra, decl = radec(dataframe, unverified=True)
+    assert np.isfinite(ra).all()
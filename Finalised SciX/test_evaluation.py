@@ -0,0 +1,30 @@
+import os
+
+import numpy as np
+
+from catalogues import DSCOLUMNS, readcsv
+from evaluation import accuracycurves
+from plkernel import MODELS
+
+### Accuracy curves ###
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Stars of the Delta Scuti catalogue given true distances, and four made-up relations
+
+def populations(distances):
+    frame = readcsv(os.path.join(HERE, 'lmcdsdata.csv'), DSCOLUMNS).iloc[:200].reset_index(drop=True)
+    return {'disk': (frame.assign(Distance=distances(len(frame))), 'P1')}
+
+RELATIONS = {name: (-3.0, -1.0) for name in MODELS}
+
+def test_curves_bin_by_quantile():
+    curves = accuracycurves(populations(lambda n: np.linspace(1000, 10000, n)), RELATIONS, bins=4)
+    assert len(curves) == len(MODELS) * 4
+    assert (curves['n'].groupby('model').sum() == 200).all()
+
+def test_single_value_gives_one_bin():
+    curves = accuracycurves(populations(lambda n: np.full(n, 5000.0)), RELATIONS, bins=4)
+    assert len(curves) == len(MODELS)
+    assert (curves['low'] == 5000).all() and (curves['high'] == 5000).all()
+    assert (curves['n'] == 200).all()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from selection import describe, rejecthalo, sigmaclipfit
+
+### Halo rejection ###
+
+# A P-L relation with scatter and a bright halo of stars well above it
+
+def haloed(n=400, halo=40, seed=0):
+    rng = np.random.default_rng(seed)
+    P = 10 ** rng.uniform(-1.3, -0.6, n)
+    I = -3.0 * np.log10(P) + 15.0 + rng.normal(0, 0.1, n)
+    I[:halo] -= rng.uniform(1, 3, halo)
+    return pd.DataFrame({'I': I, 'P1': P})
+
+def test_line_is_fit_of_returned_stars_at_maxiter():
+    stars = haloed()
+    logp, mag = np.log10(stars['P1'].to_numpy()), stars['I'].to_numpy()
+    slope, intercept, keep, iterations, converged = sigmaclipfit(logp, mag, maxiter=1)
+    assert iterations == 1 and not converged
+    assert not keep.all()
+    assert np.allclose((slope, intercept), np.polyfit(logp[keep], mag[keep], 1))
+
+def test_report_flags_convergence():
+    stars = haloed()
+    clean, report = rejecthalo(stars, 'sigmaclip', maxiter=1)
+    assert not report['converged']
+    assert 'not converged' in describe(report)
+    assert np.allclose((report['slope'], report['intercept']), np.polyfit(np.log10(clean['P1']), clean['I'], 1))
+
+    clean, report = rejecthalo(stars, 'sigmaclip')
+    assert report['converged'] and report['iterations'] > 1
+    assert report['rejected'] >= 40
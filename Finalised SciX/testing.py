@@ -1,8 +1,7 @@
-import pandas as pd
-from astroquery.vizier import Vizier
-from astropy.coordinates import SkyCoord
-from astropy import units as u
-import astropy.coordinates as coord
-import statistics
-import numpy as np
-
+import pandas as pd
+from astroquery.vizier import Vizier
+from astropy.coordinates import SkyCoord
+from astropy import units as u
+import astropy.coordinates as coord
+import numpy as np
+